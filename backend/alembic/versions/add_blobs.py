@@ -0,0 +1,40 @@
+"""Add Blobs: content-addressed file storage with reference counts
+
+Revision ID: add_blobs
+Revises: add_store_file_checksums
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_blobs"
+down_revision: Union[str, Sequence[str], None] = "add_store_file_checksums"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "Blobs",
+        sa.Column("Sha256", sa.String(length=64), primary_key=True),
+        sa.Column("Size", sa.BigInteger(), nullable=False),
+        sa.Column("RefCount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("CreateDate", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    # Сборщик мусора выбирает только строки без ссылок
+    op.create_index(
+        "ix_Blobs_unreferenced", "Blobs", ["Sha256"],
+        postgresql_where=sa.text('"RefCount" <= 0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Файлы из Uploads/blobs обратно в плоский каталог не переносятся
+    op.drop_index("ix_Blobs_unreferenced", table_name="Blobs")
+    op.drop_table("Blobs")
@@ -0,0 +1,63 @@
+"""Add UpdatedAt/RowVersion columns and Tombstones table for delta sync
+
+Revision ID: add_change_tracking
+Revises: add_project_version
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_change_tracking"
+down_revision: Union[str, Sequence[str], None] = "add_project_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# таблица -> колонка, по которой строки выбираются в пределах проекта
+TRACKED_TABLES = {
+    "Tasks": "GroupId",
+    "TaskGroups": "ProjectId",
+    "ProjectMembers": "ProjectId",
+    "Comments": "TaskId",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, parent in TRACKED_TABLES.items():
+        op.add_column(
+            table,
+            sa.Column("UpdatedAt", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        )
+        # Существующие строки получают версию 0 и попадают только в полную выгрузку (since не задан)
+        op.add_column(
+            table,
+            sa.Column("RowVersion", sa.BigInteger(), nullable=False, server_default="0"),
+        )
+        op.create_index(f"ix_{table}_{parent}_RowVersion", table, [parent, "RowVersion"])
+
+    op.create_table(
+        "Tombstones",
+        sa.Column("Id", sa.BigInteger(), primary_key=True),
+        sa.Column("ProjectId", sa.Integer(), sa.ForeignKey("Projects.Id", ondelete="CASCADE"), nullable=False),
+        sa.Column("Kind", sa.String(length=16), nullable=False),
+        sa.Column("EntityId", sa.Integer(), nullable=False),
+        sa.Column("RowVersion", sa.BigInteger(), nullable=False),
+        sa.Column("DeleteDate", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_Tombstones_ProjectId_RowVersion", "Tombstones", ["ProjectId", "RowVersion"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_Tombstones_ProjectId_RowVersion", table_name="Tombstones")
+    op.drop_table("Tombstones")
+
+    for table, parent in TRACKED_TABLES.items():
+        op.drop_index(f"ix_{table}_{parent}_RowVersion", table_name=table)
+        op.drop_column(table, "RowVersion")
+        op.drop_column(table, "UpdatedAt")
@@ -0,0 +1,30 @@
+"""Add Version counter to Projects
+
+Revision ID: add_project_version
+Revises: add_search_vectors
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_project_version"
+down_revision: Union[str, Sequence[str], None] = "add_search_vectors"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "Projects",
+        sa.Column("Version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("Projects", "Version")
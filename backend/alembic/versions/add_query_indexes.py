@@ -0,0 +1,73 @@
+"""Composite and partial indexes for the hot crud queries
+
+Revision ID: add_query_indexes
+Revises: add_change_tracking
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_query_indexes"
+down_revision: Union[str, Sequence[str], None] = "add_change_tracking"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (имя, таблица, колонки, условие частичного индекса); порядок (CreateDate, Id) совпадает с app.pagination
+NEW_INDEXES = [
+    # get_project_tasks(closed=...), сводки и доска проекта
+    ("ix_Tasks_GroupId_IsClosed_CreateDate", "Tasks", ["GroupId", "IsClosed", "CreateDate", "Id"], None),
+    # get_user_tasks: AuthorId OR TargetId собирается BitmapOr из двух индексов
+    ("ix_Tasks_AuthorId_CreateDate", "Tasks", ["AuthorId", "CreateDate", "Id"], None),
+    ("ix_Tasks_TargetId_CreateDate", "Tasks", ["TargetId", "CreateDate", "Id"], None),
+    # get_projects: удалённые проекты в индекс не попадают
+    ("ix_Projects_CreateDate_active", "Projects", ["CreateDate", "Id"], '"IsDeleted" = false'),
+    # get_user_by_email и поиск по Email без фильтра IsDeleted (OTP)
+    ("ix_Users_Email_IsDeleted", "Users", ["Email", "IsDeleted"], None),
+    # скачивание файла по имени в хранилище
+    ("ix_StoreFiles_TagName", "StoreFiles", ["TagName"], None),
+    ("ix_Comments_TaskId_CreateDate", "Comments", ["TaskId", "CreateDate"], None),
+    ("ix_Marks_TargetTask_CreateDate", "Marks", ["TargetTask", "CreateDate", "Id"], None),
+]
+
+# Одноколоночные индексы, которые новые покрывают ведущей колонкой.
+# ix_Tasks_IsClosed по булеву полю планировщик не использует.
+REPLACED_INDEXES = [
+    ("ix_Tasks_GroupId", "Tasks", ["GroupId"]),
+    ("ix_Tasks_IsClosed", "Tasks", ["IsClosed"]),
+    ("ix_Tasks_AuthorId", "Tasks", ["AuthorId"]),
+    ("ix_Tasks_TargetId", "Tasks", ["TargetId"]),
+    ("ix_Users_Email", "Users", ["Email"]),
+    ("ix_Comments_TaskId", "Comments", ["TaskId"]),
+    ("ix_Marks_TargetTask", "Marks", ["TargetTask"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в таблицы, но не может выполняться в транзакции.
+    # IF NOT EXISTS / IF EXISTS позволяют перезапустить миграцию после прерванной сборки
+    # (невалидный индекс от неудачного CONCURRENTLY нужно удалить вручную).
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in NEW_INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table, _ in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _, _ in reversed(NEW_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
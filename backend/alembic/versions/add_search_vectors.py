@@ -0,0 +1,54 @@
+"""Add generated full-text search vectors to Tasks and Comments
+
+Revision ID: add_search_vectors
+Revises: add_task_tags_table
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_search_vectors"
+down_revision: Union[str, Sequence[str], None] = "add_task_tags_table"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Копия выражений из app.models на момент миграции
+TASK_SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(\"Title\", '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(\"Title\", '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(\"Text\", '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(\"Text\", '')), 'B')"
+)
+COMMENT_SEARCH_VECTOR = (
+    "to_tsvector('russian', coalesce(\"Text\", '')) || "
+    "to_tsvector('english', coalesce(\"Text\", ''))"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # STORED-колонка пересчитывается при каждом INSERT/UPDATE строки,
+    # добавление переписывает таблицу целиком
+    op.add_column(
+        "Tasks",
+        sa.Column("SearchVector", postgresql.TSVECTOR(), sa.Computed(TASK_SEARCH_VECTOR, persisted=True)),
+    )
+    op.add_column(
+        "Comments",
+        sa.Column("SearchVector", postgresql.TSVECTOR(), sa.Computed(COMMENT_SEARCH_VECTOR, persisted=True)),
+    )
+    op.create_index("ix_Tasks_SearchVector", "Tasks", ["SearchVector"], postgresql_using="gin")
+    op.create_index("ix_Comments_SearchVector", "Comments", ["SearchVector"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_Comments_SearchVector", table_name="Comments")
+    op.drop_index("ix_Tasks_SearchVector", table_name="Tasks")
+    op.drop_column("Comments", "SearchVector")
+    op.drop_column("Tasks", "SearchVector")
@@ -0,0 +1,30 @@
+"""Add Size and Sha256 to StoreFiles
+
+Revision ID: add_store_file_checksums
+Revises: seed_task_states
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_store_file_checksums"
+down_revision: Union[str, Sequence[str], None] = "seed_task_states"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable: у уже загруженных файлов размер и хеш неизвестны
+    op.add_column("StoreFiles", sa.Column("Size", sa.BigInteger(), nullable=True))
+    op.add_column("StoreFiles", sa.Column("Sha256", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("StoreFiles", "Sha256")
+    op.drop_column("StoreFiles", "Size")
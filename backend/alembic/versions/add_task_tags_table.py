@@ -0,0 +1,44 @@
+"""Add normalized TaskTags table and backfill it from Tasks.Tags
+
+Revision ID: add_task_tags_table
+Revises: add_task_tags
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_task_tags_table"
+down_revision: Union[str, Sequence[str], None] = "add_task_tags"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "TaskTags",
+        sa.Column("TaskId", sa.Integer(), sa.ForeignKey("Tasks.Id", ondelete="CASCADE"), nullable=False),
+        sa.Column("Tag", sa.String(length=512), nullable=False),
+        sa.PrimaryKeyConstraint("TaskId", "Tag"),
+    )
+    op.create_index("ix_TaskTags_Tag", "TaskTags", ["Tag"])
+
+    # Переносим существующие строки Tags ("a,b,c") в отдельные записи
+    op.execute(
+        """
+        INSERT INTO "TaskTags" ("TaskId", "Tag")
+        SELECT DISTINCT t."Id", btrim(tag)
+        FROM "Tasks" t, unnest(string_to_array(t."Tags", ',')) AS tag
+        WHERE btrim(tag) <> ''
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_TaskTags_Tag", table_name="TaskTags")
+    op.drop_table("TaskTags")
@@ -0,0 +1,42 @@
+"""Add UploadSessions for resumable chunked uploads
+
+Revision ID: add_upload_sessions
+Revises: add_blobs
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_upload_sessions"
+down_revision: Union[str, Sequence[str], None] = "add_blobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "UploadSessions",
+        sa.Column("Id", sa.String(length=32), primary_key=True),
+        sa.Column("AuthorId", sa.Integer(), sa.ForeignKey("Users.Id", ondelete="CASCADE"), nullable=False),
+        sa.Column("SourceName", sa.String(length=150), nullable=False),
+        sa.Column("Size", sa.BigInteger(), nullable=False),
+        sa.Column("ChunkSize", sa.Integer(), nullable=False),
+        sa.Column("Sha256", sa.String(length=64), nullable=True),
+        sa.Column("CreateDate", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("ExpiresAt", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_UploadSessions_AuthorId", "UploadSessions", ["AuthorId"])
+    op.create_index("ix_UploadSessions_ExpiresAt", "UploadSessions", ["ExpiresAt"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Части в Uploads/staging остаются на диске
+    op.drop_index("ix_UploadSessions_ExpiresAt", table_name="UploadSessions")
+    op.drop_index("ix_UploadSessions_AuthorId", table_name="UploadSessions")
+    op.drop_table("UploadSessions")
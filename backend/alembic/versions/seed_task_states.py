@@ -0,0 +1,37 @@
+"""Seed default task states
+
+Revision ID: seed_task_states
+Revises: add_query_indexes
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "seed_task_states"
+down_revision: Union[str, Sequence[str], None] = "add_query_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Совпадает с app.crud.task_state.DEFAULT_TASK_STATES; первое состояние получают новые задачи без StateId
+DEFAULT_TASK_STATES = ("To Do", "In Progress", "Done")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Только в пустую таблицу: существующие справочники не трогаем
+    defaults = " UNION ALL ".join(f"SELECT '{name}'" for name in DEFAULT_TASK_STATES)
+    op.execute(sa.text(
+        f'INSERT INTO "TaskStates" ("Name") SELECT * FROM ({defaults}) AS defaults '
+        f'WHERE NOT EXISTS (SELECT 1 FROM "TaskStates")'
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Состояния могли уже получить задачи (и новые имена); удалять их небезопасно
+    pass
@@ -0,0 +1,150 @@
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database, models
+from app.auth import check_project_access, get_current_active_user, get_user_by_token
+from app.cache import project_access_cache
+from app.database import get_db
+from app.realtime import RESYNC_EVENT, get_event_hub
+from app.versioning import ENTITY_MEMBER
+
+router = APIRouter()
+
+# Пустое сообщение раз в N секунд, чтобы прокси не закрывали простаивающее соединение
+HEARTBEAT_INTERVAL = 15.0
+# Доступ проверяется при подключении, затем раз в N секунд и после каждого события участников
+ACCESS_CHECK_INTERVAL = 60.0
+
+
+def _bearer_token(websocket: WebSocket) -> Optional[str]:
+    scheme, _, token = websocket.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token
+    # Браузерный WebSocket не умеет передавать заголовки
+    return websocket.query_params.get("token")
+
+
+async def _ws_user(token: Optional[str], project_id: int) -> Optional[int]:
+    """Id of the token's user if they may watch the project"""
+    if not token:
+        return None
+    # Своя короткая сессия: соединение живёт часами и не должно держать подключение к БД
+    async with database.SessionLocal() as db:
+        user = await get_user_by_token(db, token)
+        if user is None or user.IsDeleted:
+            return None
+        return user.Id if await check_project_access(db, project_id, user.Id) else None
+
+
+async def _still_has_access(project_id: int, user_id: int) -> bool:
+    async with database.SessionLocal() as db:
+        user = await db.get(models.User, user_id)
+        if user is None or user.IsDeleted:
+            return False
+        return await check_project_access(db, project_id, user_id)
+
+
+def _may_change_access(payload: dict) -> bool:
+    # resync может скрывать потерянное событие участников
+    return payload["Type"].startswith(f"{ENTITY_MEMBER}.") or payload["Type"] == RESYNC_EVENT["Type"]
+
+
+async def _watch_events(queue: asyncio.Queue, project_id: int, user_id: int, timeout: float) -> AsyncIterator[Optional[dict]]:
+    """Events from the queue, None after `timeout` idle seconds; ends once the user loses access"""
+    loop = asyncio.get_running_loop()
+    next_check = loop.time() + ACCESS_CHECK_INTERVAL
+    while True:
+        try:
+            payload = await asyncio.wait_for(queue.get(), timeout=min(timeout, max(next_check - loop.time(), 0)))
+        except asyncio.TimeoutError:
+            payload = None
+        if payload is not None and _may_change_access(payload):
+            # Участника могли удалить в другом воркере, кэш этого воркера ещё помнит его
+            project_access_cache.pop((project_id, user_id))
+            next_check = loop.time()
+        if loop.time() >= next_check:
+            if not await _still_has_access(project_id, user_id):
+                return
+            next_check = loop.time() + ACCESS_CHECK_INTERVAL
+        yield payload
+
+
+@router.websocket("/ws/projects/{project_id}")
+async def project_events_ws(websocket: WebSocket, project_id: int):
+    """Task, group, member and comment events of the project as JSON messages"""
+    user_id = await _ws_user(_bearer_token(websocket), project_id)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    hub = get_event_hub()
+    queue = hub.subscribe(project_id)
+
+    async def send_events():
+        async for payload in _watch_events(queue, project_id, user_id, ACCESS_CHECK_INTERVAL):
+            if payload is not None:
+                await websocket.send_json(payload)
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+
+    async def wait_disconnect():
+        # Входящие сообщения клиента не используются, ждём только закрытия
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    sender = asyncio.create_task(send_events())
+    receiver = asyncio.create_task(wait_disconnect())
+    try:
+        done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            # Ошибка отправки означает, что клиент уже отключился
+            task.exception()
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        hub.unsubscribe(project_id, queue)
+
+
+@router.get("/api/projects/{project_id}/events")
+async def project_events_sse(
+    project_id: int,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Server-Sent Events fallback for /ws/projects/{project_id}"""
+    if not await check_project_access(db, project_id, current_user.Id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+    # Сессия зависимости живёт до конца ответа; отпускаем подключение к БД сразу
+    await db.close()
+
+    async def stream():
+        hub = get_event_hub()
+        queue = hub.subscribe(project_id)
+        try:
+            yield ": connected\n\n"
+            # Поток заканчивается, когда доступ отозван: переподключение клиента получит 403
+            async for payload in _watch_events(queue, project_id, current_user.Id, HEARTBEAT_INTERVAL):
+                if payload is None:
+                    yield ": ping\n\n"
+                    continue
+                event_id = f"id: {payload['Version']}\n" if "Version" in payload else ""
+                yield f"{event_id}event: {payload['Type']}\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            hub.unsubscribe(project_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
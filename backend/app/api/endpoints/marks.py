@@ -1,10 +1,10 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import schemas, models
-from app.auth import get_current_active_user, check_project_access, check_project_admin_access
+from app.auth import get_current_active_user, check_project_access, check_project_admin_access, get_group_project_id
 from app.crud.mark import (
     get_mark,
     get_task_marks,
@@ -13,27 +13,26 @@ from app.crud.mark import (
     delete_mark,
 )
 from app.crud.task import get_task
-from app.crud.task_group import get_task_group
 from app.database import get_db
+from app.pagination import PageParams, page_response
 
 
 router = APIRouter()
 
 
-def _get_task_project_id(db: Session, task: models.Task) -> int | None:
+async def _get_task_project_id(db: AsyncSession, task: models.Task) -> int | None:
     if not task.GroupId:
         return None
-    group = get_task_group(db, task.GroupId)
-    return group.ProjectId if group else None
+    return await get_group_project_id(db, task.GroupId)
 
 
-def _ensure_can_manage_mark_for_task(
-    db: Session,
+async def _ensure_can_manage_mark_for_task(
+    db: AsyncSession,
     task: models.Task,
     current_user: models.User,
 ) -> int:
     """Return project_id if user is allowed to manage marks for this task."""
-    project_id = _get_task_project_id(db, task)
+    project_id = await _get_task_project_id(db, task)
     if project_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -41,7 +40,7 @@ def _ensure_can_manage_mark_for_task(
         )
 
     # Admin of project always can
-    if check_project_admin_access(db, project_id, current_user.Id):
+    if await check_project_admin_access(db, project_id, current_user.Id):
         return project_id
 
     # Responsible user (TargetId) can create/update/delete their own marks
@@ -52,7 +51,7 @@ def _ensure_can_manage_mark_for_task(
         )
 
     # Also verify at least project access
-    if not check_project_access(db, project_id, current_user.Id):
+    if not await check_project_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this project",
@@ -64,25 +63,28 @@ def _ensure_can_manage_mark_for_task(
 @router.get("/tasks/{task_id}/marks", response_model=List[schemas.Mark])
 async def list_task_marks(
     task_id: int,
+    response: Response,
+    page: PageParams = Depends(),
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """List all marks for a task - requires project access."""
-    task = get_task(db, task_id)
+    task = await get_task(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
 
-    project_id = _get_task_project_id(db, task)
-    if project_id is not None and not check_project_access(db, project_id, current_user.Id):
+    project_id = await _get_task_project_id(db, task)
+    if project_id is not None and not await check_project_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this project",
         )
 
-    return get_task_marks(db, task_id)
+    marks = await get_task_marks(db, task_id, cursor=page.cursor, limit=page.limit, skip=page.skip)
+    return page_response(response, marks)
 
 
 @router.post("/tasks/{task_id}/marks", response_model=schemas.Mark)
@@ -90,17 +92,17 @@ async def create_task_mark(
     task_id: int,
     mark_data: schemas.MarkCreate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a mark for a task - only assignee (TargetId) or project admin."""
-    task = get_task(db, task_id)
+    task = await get_task(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
 
-    _ensure_can_manage_mark_for_task(db, task, current_user)
+    await _ensure_can_manage_mark_for_task(db, task, current_user)
 
     # Ensure MarkCreate.TargetTask matches path
     if mark_data.TargetTask != task_id:
@@ -109,7 +111,7 @@ async def create_task_mark(
             detail="TargetTask mismatch with path parameter",
         )
 
-    return create_mark(db, mark_data, current_user.Id)
+    return await create_mark(db, mark_data, current_user.Id)
 
 
 @router.put("/marks/{mark_id}", response_model=schemas.Mark)
@@ -117,33 +119,33 @@ async def update_task_mark(
     mark_id: int,
     mark_data: schemas.MarkUpdate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update existing mark - only its author (assignee) or project admin."""
-    db_mark = get_mark(db, mark_id)
+    db_mark = await get_mark(db, mark_id)
     if not db_mark:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Mark not found",
         )
 
-    task = get_task(db, db_mark.TargetTask)
+    task = await get_task(db, db_mark.TargetTask)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
 
-    project_id = _ensure_can_manage_mark_for_task(db, task, current_user)
+    project_id = await _ensure_can_manage_mark_for_task(db, task, current_user)
 
     # If user is not project admin, they must be author of the mark
-    if not check_project_admin_access(db, project_id, current_user.Id) and db_mark.MarkedById != current_user.Id:
+    if not await check_project_admin_access(db, project_id, current_user.Id) and db_mark.MarkedById != current_user.Id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can edit only your own marks",
         )
 
-    updated = update_mark(db, mark_id, mark_data)
+    updated = await update_mark(db, mark_id, mark_data)
     if not updated:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -157,33 +159,33 @@ async def update_task_mark(
 async def delete_task_mark(
     mark_id: int,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a mark - only its author (assignee) or project admin."""
-    db_mark = get_mark(db, mark_id)
+    db_mark = await get_mark(db, mark_id)
     if not db_mark:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Mark not found",
         )
 
-    task = get_task(db, db_mark.TargetTask)
+    task = await get_task(db, db_mark.TargetTask)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
 
-    project_id = _ensure_can_manage_mark_for_task(db, task, current_user)
+    project_id = await _ensure_can_manage_mark_for_task(db, task, current_user)
 
     # If user is not project admin, they must be author of the mark
-    if not check_project_admin_access(db, project_id, current_user.Id) and db_mark.MarkedById != current_user.Id:
+    if not await check_project_admin_access(db, project_id, current_user.Id) and db_mark.MarkedById != current_user.Id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can delete only your own marks",
         )
 
-    success = delete_mark(db, mark_id)
+    success = await delete_mark(db, mark_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
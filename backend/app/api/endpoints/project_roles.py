@@ -1,11 +1,10 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import schemas, models
 from app.auth import get_current_active_user, check_project_admin_access
-from app.crud.project import get_project
 from app.crud.project_role import (
     get_project_roles,
     get_project_role,
@@ -14,6 +13,7 @@ from app.crud.project_role import (
     delete_project_role,
 )
 from app.database import get_db
+from app.pagination import PageParams, page_response
 
 
 router = APIRouter()
@@ -25,24 +25,20 @@ router = APIRouter()
 )
 async def list_project_roles(
     project_id: int,
+    response: Response,
+    page: PageParams = Depends(),
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get all roles for a project - requires project admin access."""
-    if not check_project_admin_access(db, project_id, current_user.Id):
+    if not await check_project_admin_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have admin access to this project",
         )
 
-    project = get_project(db, project_id)
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found",
-        )
-
-    return get_project_roles(db, project_id)
+    roles = await get_project_roles(db, project_id, cursor=page.cursor, limit=page.limit, skip=page.skip)
+    return page_response(response, roles)
 
 
 @router.post(
@@ -53,23 +49,16 @@ async def create_role_for_project(
     project_id: int,
     role_data: schemas.ProjectRoleCreate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a new role for project - requires admin access."""
-    if not check_project_admin_access(db, project_id, current_user.Id):
+    if not await check_project_admin_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have admin access to this project",
         )
 
-    project = get_project(db, project_id)
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found",
-        )
-
-    return create_project_role(db, project_id, role_data)
+    return await create_project_role(db, project_id, role_data)
 
 
 @router.put(
@@ -80,23 +69,23 @@ async def update_project_role_endpoint(
     role_id: int,
     role_data: schemas.ProjectRoleUpdate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update a project role - requires admin access for that project."""
-    db_role = get_project_role(db, role_id)
+    db_role = await get_project_role(db, role_id)
     if not db_role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Role not found",
         )
 
-    if not check_project_admin_access(db, db_role.ProjectId, current_user.Id):
+    if not await check_project_admin_access(db, db_role.ProjectId, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have admin access to this project",
         )
 
-    updated = update_project_role(db, role_id, role_data)
+    updated = await update_project_role(db, role_id, role_data)
     if not updated:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -110,23 +99,23 @@ async def update_project_role_endpoint(
 async def delete_project_role_endpoint(
     role_id: int,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a project role - requires admin access for that project."""
-    db_role = get_project_role(db, role_id)
+    db_role = await get_project_role(db, role_id)
     if not db_role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Role not found",
         )
 
-    if not check_project_admin_access(db, db_role.ProjectId, current_user.Id):
+    if not await check_project_admin_access(db, db_role.ProjectId, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have admin access to this project",
         )
 
-    success = delete_project_role(db, role_id)
+    success = await delete_project_role(db, role_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,8 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.crud.project import get_user_projects, get_project, create_project, update_project, get_projects
+from app.crud.project import (
+    get_user_projects,
+    get_project,
+    get_project_with_details,
+    create_project,
+    update_project,
+    get_projects,
+    get_project_summaries,
+    get_project_board,
+    get_project_changes,
+)
 from app.crud.project_member import (
     get_project_members,
     add_project_member,
@@ -10,10 +20,15 @@ from app.crud.project_member import (
     remove_project_member,
     get_project_member,
 )
+from app.crud.project_role import project_has_role
+from app.crud.search import search_project
 from app.crud.user import get_user
 from app.database import get_db
+from app.etag import check_project_etag
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PageParams, page_response
+from app.serialization import PROJECT_BOARD, PROJECT_CHANGES, PROJECT_MEMBER_LIST, model_response, orm_response
 
-from app.auth import get_current_active_user, check_project_access, check_project_admin_access
+from app.auth import get_current_active_user, check_project_access, check_project_admin_access, get_project_access
 from app import schemas, models
 
 router = APIRouter()
@@ -21,27 +36,129 @@ router = APIRouter()
 router = APIRouter()
 
 @router.get("/my")
-async def get_my_projects(current_user: models.User = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    projects = get_user_projects(db, current_user.Id)
-    return projects
+async def get_my_projects(
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    projects = await get_user_projects(db, current_user.Id, cursor=page.cursor, limit=page.limit, skip=page.skip)
+    return page_response(response, projects)
 
 @router.get("/", response_model=List[schemas.Project])
-async def get_all_projects(current_user: models.User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+async def get_all_projects(
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
     """Get all projects (accessible to all authenticated users)"""
-    projects = get_projects(db)
-    return projects
+    projects = await get_projects(db, skip=page.skip, limit=page.limit, cursor=page.cursor)
+    return page_response(response, projects)
+
+MAX_SUMMARY_PROJECTS = 200
+
+@router.get("/summary", response_model=List[schemas.ProjectSummary])
+async def get_projects_summary(
+    ids: List[int] = Query(..., min_length=1, max_length=MAX_SUMMARY_PROJECTS),
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Summaries for several projects at once; inaccessible projects are omitted"""
+    return await get_project_summaries(db, ids, current_user.Id)
+
+@router.get("/{project_id}/summary", response_model=schemas.ProjectSummary)
+async def get_project_summary(
+    project_id: int,
+    request: Request,
+    response: Response,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Task counts by group, state, assignee and deadline - requires project access"""
+    if not await check_project_access(db, project_id, current_user.Id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    await check_project_etag(db, request, response, project_id, current_user.Id)
+
+    summaries = await get_project_summaries(db, [project_id], current_user.Id)
+    if not summaries:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    return summaries[0]
+
+@router.get("/{project_id}/board", response_model=schemas.ProjectBoard)
+async def get_project_board_endpoint(
+    project_id: int,
+    request: Request,
+    response: Response,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Project, members, roles, groups and task cards in one response - requires project access"""
+    access = await get_project_access(db, project_id, current_user.Id)
+    if access is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    if access.owner_id != current_user.Id and access.access_level is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    await check_project_etag(db, request, response, project_id, current_user.Id)
+
+    is_admin = access.owner_id == current_user.Id or access.access_level == "Admin"
+    board = await get_project_board(project_id, include_roles=is_admin)
+    if board is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    return model_response(PROJECT_BOARD, board, response)
+
+@router.get("/{project_id}/changes", response_model=schemas.ProjectChanges)
+async def get_project_changes_endpoint(
+    project_id: int,
+    since: Optional[int] = Query(None, ge=0, description="Cursor из предыдущего ответа; без него возвращается весь проект"),
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Tasks, groups, members and comments created, updated or deleted after `since`"""
+    if not await check_project_access(db, project_id, current_user.Id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    changes = await get_project_changes(db, project_id, since)
+    if changes is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    return model_response(PROJECT_CHANGES, changes)
 
 @router.get("/{project_id}", response_model=schemas.ProjectWithDetails)
-async def get_project_details(project_id: int, current_user: models.User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+async def get_project_details(project_id: int, request: Request, response: Response, current_user: models.User = Depends(get_current_active_user), db: AsyncSession = Depends(get_db)):
     """Get project details - requires project access"""
     # Check if user has access to the project
-    if not check_project_access(db, project_id, current_user.Id):
+    if not await check_project_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this project"
         )
-    
-    project = get_project(db, project_id)
+
+    await check_project_etag(db, request, response, project_id, current_user.Id)
+
+    project = await get_project_with_details(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,10 +171,10 @@ async def get_project_details(project_id: int, current_user: models.User = Depen
 async def create_new_project(
     project_data: schemas.ProjectCreate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new project"""
-    project = create_project(db, project_data, current_user.Id)
+    project = await create_project(db, project_data, current_user.Id)
     return project
 
 @router.put("/{project_id}", response_model=schemas.Project)
@@ -65,17 +182,17 @@ async def update_existing_project(
     project_id: int,
     project_data: schemas.ProjectUpdate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update project - requires admin access"""
     # Check if user has admin access to the project
-    if not check_project_admin_access(db, project_id, current_user.Id):
+    if not await check_project_admin_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have admin access to this project"
         )
     
-    project = update_project(db, project_id, project_data)
+    project = await update_project(db, project_id, project_data)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -89,18 +206,18 @@ async def add_project_member_endpoint(
     project_id: int,
     member_data: schemas.ProjectMemberCreate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Add a member to project - requires admin access"""
     # Check if user has admin access to the project
-    if not check_project_admin_access(db, project_id, current_user.Id):
+    if not await check_project_admin_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have admin access to this project"
         )
     
     # Check if the user to add exists
-    user_to_add = get_user(db, member_data.MemnerId)
+    user_to_add = await get_user(db, member_data.MemnerId)
     if not user_to_add:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -108,14 +225,20 @@ async def add_project_member_endpoint(
         )
     
     # Check if user is already a member
-    existing_member = get_project_member(db, project_id, member_data.MemnerId)
+    existing_member = await get_project_member(db, project_id, member_data.MemnerId)
     if existing_member:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is already a member of this project"
         )
     
-    member = add_project_member(
+    if member_data.RoleId is not None and not await project_has_role(db, project_id, member_data.RoleId):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Role not found in this project"
+        )
+
+    member = await add_project_member(
         db,
         project_id,
         member_data.MemnerId,
@@ -130,25 +253,31 @@ async def update_project_member_role_endpoint(
     member_id: int,
     role_data: schemas.ProjectMemberBase,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update project member role - requires admin access"""
     # Check if user has admin access to the project
-    if not check_project_admin_access(db, project_id, current_user.Id):
+    if not await check_project_admin_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have admin access to this project"
         )
     
     # Check if trying to modify owner's role (not allowed)
-    project = get_project(db, project_id)
-    if project and project.OwnerId == member_id:
+    access = await get_project_access(db, project_id, current_user.Id)
+    if access and access.owner_id == member_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot modify owner's role"
         )
     
-    member = update_project_member_access(
+    if role_data.RoleId is not None and not await project_has_role(db, project_id, role_data.RoleId):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Role not found in this project"
+        )
+
+    member = await update_project_member_access(
         db,
         project_id,
         member_id,
@@ -168,19 +297,19 @@ async def remove_project_member_endpoint(
     project_id: int,
     member_id: int,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Remove project member - requires admin access"""
     # Check if user has admin access to the project
-    if not check_project_admin_access(db, project_id, current_user.Id):
+    if not await check_project_admin_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have admin access to this project"
         )
     
     # Check if trying to remove owner (not allowed)
-    project = get_project(db, project_id)
-    if project and project.OwnerId == member_id:
+    access = await get_project_access(db, project_id, current_user.Id)
+    if access and access.owner_id == member_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot remove owner from project"
@@ -193,7 +322,7 @@ async def remove_project_member_endpoint(
             detail="Cannot remove yourself from project"
         )
     
-    success = remove_project_member(db, project_id, member_id)
+    success = await remove_project_member(db, project_id, member_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -205,16 +334,46 @@ async def remove_project_member_endpoint(
 @router.get("/{project_id}/members", response_model=List[schemas.ProjectMemberWithUser])
 async def get_project_members_endpoint(
     project_id: int,
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get project members - requires project access"""
     # Check if user has access to the project
-    if not check_project_access(db, project_id, current_user.Id):
+    if not await check_project_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this project"
         )
-    
-    members = get_project_members(db, project_id)
-    return members
+
+    await check_project_etag(db, request, response, project_id, current_user.Id)
+
+    members = await get_project_members(db, project_id, cursor=page.cursor, limit=page.limit, skip=page.skip)
+    return orm_response(PROJECT_MEMBER_LIST, page_response(response, members), response)
+
+@router.get("/{project_id}/search", response_model=List[schemas.SearchHit])
+async def search_project_endpoint(
+    project_id: int,
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=256),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over tasks and comments of a project - requires project access.
+
+    Hits are ordered by relevance, so paging uses skip/limit instead of a cursor.
+    """
+    if not await check_project_access(db, project_id, current_user.Id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    await check_project_etag(db, request, response, project_id, current_user.Id)
+
+    return await search_project(db, project_id, q, skip=skip, limit=limit)
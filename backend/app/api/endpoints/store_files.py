@@ -1,95 +1,222 @@
 import os
 import uuid
-import os
-import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Response
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+from starlette.concurrency import run_in_threadpool
 
-from app.crud.store_file import create_store_file, get_store_file_by_filename
+from app.blobs import acquire_blob, blob_path, blob_path_for, touch_blob
+from app.crud.store_file import (
+    create_store_file, delete_store_file, get_store_file_by_filename, lock_store_file, store_file_in_use,
+)
 from app.database import get_db
+from app.crud.upload_session import create_upload_session, extend_upload_session, get_upload_session, take_upload_session
+from app.downloads import file_response
+from app.upload_sessions import (
+    assemble_session, chunk_path, expected_chunk_size, received_offsets, remove_staging, staging_path, store_assembled, write_chunk,
+)
+from app.uploads import MAX_UPLOAD_SIZE, UPLOAD_DIR, LimitedUploadRoute, digest_upload, write_upload
 
 from app.auth import get_current_active_user
 from app import schemas, models
 
-router = APIRouter()
+# Тело загрузки ограничено MAX_UPLOAD_SIZE ещё до разбора формы
+router = APIRouter(route_class=LimitedUploadRoute)
 
 # Ensure Uploads directory exists
-UPLOAD_DIR = "Uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 @router.post("/upload", response_model=schemas.StoreFile)
 async def upload_file(
     file: UploadFile = File(...),
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload a file and create a store file record"""
     
     # Generate unique filename
     file_extension = os.path.splitext(file.filename)[1]
     unique_filename = f"{uuid.uuid4().hex}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
     
+    # Размер и хеш считаются до записи: повторная загрузка тех же байт на диск не пишется
+    digest = await digest_upload(file)
     try:
-        # Save file to disk
-        with open(file_path, "wb") as buffer:
-            buffer.write(await file.read())
+        await acquire_blob(db, digest.sha256, digest.size)
+        if not await run_in_threadpool(touch_blob, digest.sha256):
+            await write_upload(file, blob_path(digest.sha256))
         
         # Create store file record
         store_file_data = schemas.StoreFileCreate(
             SourceName=file.filename,
-            TagName=unique_filename
+            TagName=unique_filename,
+            Size=digest.size,
+            Sha256=digest.sha256,
         )
         
-        store_file = create_store_file(db, store_file_data, current_user.Id)
+        store_file = await create_store_file(db, store_file_data, current_user.Id)
+        # Фиксируем сразу, чтобы ошибка commit стала ответом 500. Файл blob при этом
+        # не удаляется: он может быть общим, а ничейный уберёт app.blobs.sweep_orphans
+        await db.commit()
         
         return store_file
         
     except Exception as e:
-        # Clean up if file was partially saved
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"File upload failed: {str(e)}"
         )
 
-@router.get("/download/{filename}")
-async def download_file(
-    filename: str,
-    db: Session = Depends(get_db)
+def _session_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Upload session not found"
+    )
+
+def _session_schema(session: models.UploadSession, received: list) -> schemas.UploadSession:
+    result = schemas.UploadSession.model_validate(session)
+    result.Received = received
+    return result
+
+@router.post("/uploads", response_model=schemas.UploadSession)
+async def create_upload(
+    upload: schemas.UploadSessionCreate,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Download a file by its unique filename - no authentication required"""
-    
-    # Check if file exists in database
-    store_file = get_store_file_by_filename(db, filename)
+    """Start a resumable upload; the file is then sent in ChunkSize pieces"""
+    if upload.Size > MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File is larger than {MAX_UPLOAD_SIZE} bytes"
+        )
+    session = await create_upload_session(db, upload, current_user.Id)
+    await run_in_threadpool(os.makedirs, staging_path(session.Id), exist_ok=True)
+    return _session_schema(session, [])
+
+@router.get("/uploads/{upload_id}", response_model=schemas.UploadSession)
+async def get_upload(
+    upload_id: str,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Session state with the offsets already received - to resume after a reconnect"""
+    session = await get_upload_session(db, upload_id, current_user.Id)
+    if not session:
+        raise _session_not_found()
+    return _session_schema(session, await run_in_threadpool(received_offsets, upload_id))
+
+@router.put("/uploads/{upload_id}")
+async def put_upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(...),
+    chunk_sha256: str = Header(..., alias="X-Chunk-Sha256", pattern="^[0-9a-fA-F]{64}$"),
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Store the chunk at offset; resending a chunk replaces it"""
+    session = await get_upload_session(db, upload_id, current_user.Id)
+    if not session:
+        raise _session_not_found()
+    size = expected_chunk_size(session, offset)
+    # Транзакция завершается до приёма тела: иначе соединение пула простаивало бы,
+    # пока идут мегабайты части. Сессия проверяется ещё раз при продлении
+    await db.commit()
+    await write_chunk(request.stream(), chunk_path(upload_id, offset), size, chunk_sha256)
+    if not await extend_upload_session(db, upload_id, current_user.Id):
+        # Сессию успели завершить или удалить, пока принималась часть
+        raise _session_not_found()
+    return {"Offset": offset, "Size": size}
+
+@router.post("/uploads/{upload_id}/complete", response_model=schemas.StoreFile)
+async def complete_upload(
+    upload_id: str,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Assemble the received chunks into a store file"""
+    # Удаление строки - блокировка: второй complete той же сессии получит 404
+    session = await take_upload_session(db, upload_id, current_user.Id)
+    if not session:
+        raise _session_not_found()
+    part_path, digest = await assemble_session(session)
+
+    await acquire_blob(db, digest.sha256, digest.size)
+    await run_in_threadpool(store_assembled, part_path, digest.sha256)
+    store_file = await create_store_file(
+        db,
+        schemas.StoreFileCreate(
+            SourceName=session.SourceName,
+            TagName=f"{uuid.uuid4().hex}{os.path.splitext(session.SourceName)[1]}",
+            Size=digest.size,
+            Sha256=digest.sha256,
+        ),
+        current_user.Id,
+    )
+    await db.commit()
+    # Части больше не нужны; при сбое здесь каталог уберёт python -m app.upload_sessions
+    await run_in_threadpool(remove_staging, upload_id)
+    return store_file
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(
+    upload_id: str,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Cancel the upload and drop the received chunks"""
+    if not await take_upload_session(db, upload_id, current_user.Id):
+        raise _session_not_found()
+    await db.commit()
+    await run_in_threadpool(remove_staging, upload_id)
+    return {"message": "Upload cancelled"}
+
+@router.delete("/{file_id}")
+async def delete_file(
+    file_id: int,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete a store file record - only its author can do it, and only once nothing uses it"""
+    # Блокировка до проверки ссылок: параллельное прикрепление файла дождётся удаления
+    store_file = await lock_store_file(db, file_id)
     if not store_file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
-    
-    # Check if file exists on disk
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    if not os.path.exists(file_path):
+    if store_file.AuthorId != current_user.Id:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found on server"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the author can delete this file"
         )
-    
-    try:
-        # Return file with appropriate headers
-        return FileResponse(
-            file_path,
-            filename=store_file.SourceName,
-            media_type="application/octet-stream"
+    if await store_file_in_use(db, file_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="File is attached to tasks or used as a project logo"
         )
-        
-    except Exception as e:
+    
+    await delete_store_file(db, file_id)
+    return {"message": "File deleted successfully"}
+
+@router.api_route("/download/{filename}", methods=["GET", "HEAD"])
+async def download_file(
+    filename: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Download a file by its unique filename - no authentication required.
+
+    Supports Range/If-Range (resume, parallel chunks), ETag/Last-Modified and HEAD.
+    """
+    
+    # Check if file exists in database
+    store_file = await get_store_file_by_filename(db, filename)
+    if not store_file:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"File download failed: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
         )
+    
+    # 404, если файла нет на диске
+    return await file_response(request, blob_path_for(store_file), store_file)
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.crud.task_group import get_task_group, get_project_task_groups, create_task_group, update_task_group, delete_task_group
-from app.crud.project import get_project
 from app.database import get_db
+from app.etag import check_project_etag
+from app.pagination import PageParams, page_response
+from app.purge import PURGE_INLINE_LIMIT, count_group_tasks, create_purge_job, get_purge_job, run_purge_job
+from app.serialization import TASK_GROUP_LIST, orm_response
 
 from app.auth import get_current_active_user, check_project_access, check_project_admin_access
 from app import schemas, models
@@ -14,36 +17,35 @@ router = APIRouter()
 @router.get("/projects/{project_id}/groups", response_model=List[schemas.TaskGroup])
 async def get_task_groups_for_project(
     project_id: int,
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all task groups for a project - requires project access"""
     # Check if user has access to the project
-    if not check_project_access(db, project_id, current_user.Id):
+    if not await check_project_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this project"
         )
+
+    await check_project_etag(db, request, response, project_id, current_user.Id)
     
-    # Check if project exists
-    project = get_project(db, project_id)
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    task_groups = get_project_task_groups(db, project_id)
-    return task_groups
+    task_groups = await get_project_task_groups(db, project_id, cursor=page.cursor, limit=page.limit, skip=page.skip)
+    return orm_response(TASK_GROUP_LIST, page_response(response, task_groups), response)
 
 @router.get("/groups/{group_id}", response_model=schemas.TaskGroup)
 async def get_single_task_group(
     group_id: int,
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a single task group - requires project access"""
-    task_group = get_task_group(db, group_id)
+    task_group = await get_task_group(db, group_id)
     if not task_group:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -51,11 +53,13 @@ async def get_single_task_group(
         )
     
     # Check if user has access to the project
-    if not check_project_access(db, task_group.ProjectId, current_user.Id):
+    if not await check_project_access(db, task_group.ProjectId, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this project"
         )
+
+    await check_project_etag(db, request, response, task_group.ProjectId, current_user.Id)
     
     return task_group
 
@@ -64,27 +68,19 @@ async def create_new_task_group(
     project_id: int,
     group_data: schemas.TaskGroupCreate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new task group - requires project access"""
     # Check if user has access to the project
-    if not check_project_access(db, project_id, current_user.Id):
+    if not await check_project_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this project"
         )
     
-    # Check if project exists
-    project = get_project(db, project_id)
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
     # Create task group with project_id from path parameter
     task_group_data = schemas.TaskGroupBase(Name=group_data.Name, ProjectId=project_id)
-    task_group = create_task_group(db, task_group_data)
+    task_group = await create_task_group(db, task_group_data)
     return task_group
 
 @router.put("/groups/{group_id}", response_model=schemas.TaskGroup)
@@ -92,10 +88,10 @@ async def update_existing_task_group(
     group_id: int,
     name: str,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update task group name - requires project access"""
-    task_group = get_task_group(db, group_id)
+    task_group = await get_task_group(db, group_id)
     if not task_group:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -103,13 +99,13 @@ async def update_existing_task_group(
         )
     
     # Check if user has access to the project
-    if not check_project_access(db, task_group.ProjectId, current_user.Id):
+    if not await check_project_access(db, task_group.ProjectId, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this project"
         )
     
-    updated_group = update_task_group(db, group_id, name)
+    updated_group = await update_task_group(db, group_id, name)
     if not updated_group:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -121,11 +117,13 @@ async def update_existing_task_group(
 @router.delete("/groups/{group_id}")
 async def delete_existing_task_group(
     group_id: int,
+    response: Response,
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete task group - requires project access"""
-    task_group = get_task_group(db, group_id)
+    task_group = await get_task_group(db, group_id)
     if not task_group:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -133,17 +131,46 @@ async def delete_existing_task_group(
         )
     
     # Check if user has access to the project
-    if not check_project_access(db, task_group.ProjectId, current_user.Id):
+    if not await check_project_access(db, task_group.ProjectId, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this project"
         )
     
-    success = delete_task_group(db, group_id)
+    # Большие группы удаляются порциями в фоне, клиент опрашивает /purge/{job_id}
+    total = await count_group_tasks(db, group_id)
+    if total > PURGE_INLINE_LIMIT:
+        job = create_purge_job("group", task_group.ProjectId, group_id, total)
+        background_tasks.add_task(run_purge_job, job)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return job
+
+    success = await delete_task_group(db, group_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task group not found"
         )
     
-    return {"message": "Task group deleted successfully"}
\ No newline at end of file
+    return {"message": "Task group deleted successfully"}
+
+@router.get("/purge/{job_id}", response_model=schemas.PurgeJob)
+async def get_purge_job_status(
+    job_id: str,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Progress of a background task group deletion - requires project access"""
+    entry = get_purge_job(job_id)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Purge job not found"
+        )
+    project_id, job = entry
+    if not await check_project_access(db, project_id, current_user.Id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+    return job
@@ -1,17 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 
 from app.crud.task import (
-    get_task, get_tasks, get_user_tasks, get_project_tasks, 
-    create_task, update_task, delete_task
+    get_task, get_task_with_details, get_tasks, get_user_tasks, get_project_tasks,
+    create_task, update_task, delete_task, apply_task_batch, get_project_tag_counts
 )
 from app.crud.task_group import get_task_group
-from app.crud.project import get_project
 from app.crud.user import get_user
 from app.database import get_db
+from app.etag import check_project_etag
+from app.pagination import PageParams, page_response
+from app.serialization import TASK_CARD_LIST, TASK_DETAILS_LIST, TASK_LIST, orm_response
 
-from app.auth import get_current_active_user, check_project_access
+from app.auth import get_current_active_user, check_project_access, get_group_project_id
 from app import schemas, models
 
 router = APIRouter()
@@ -19,11 +21,13 @@ router = APIRouter()
 @router.get("/{task_id}", response_model=schemas.TaskWithDetails)
 async def get_single_task(
     task_id: int,
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a single task by ID - requires project access"""
-    task = get_task(db, task_id)
+    task = await get_task(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -32,62 +36,81 @@ async def get_single_task(
     
     # Check if user has access to the project (if task has a group)
     if task.GroupId:
-        task_group = get_task_group(db, task.GroupId)
-        if task_group and not check_project_access(db, task_group.ProjectId, current_user.Id):
+        project_id = await get_group_project_id(db, task.GroupId)
+        if project_id is not None and not await check_project_access(db, project_id, current_user.Id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have access to this project"
             )
+        if project_id is not None:
+            await check_project_etag(db, request, response, project_id, current_user.Id)
     
-    return task
+    # Связи грузим только после проверки ETag
+    return await get_task_with_details(db, task_id)
 
-@router.get("/", response_model=List[schemas.Task])
+@router.get("/", response_model=Union[List[schemas.Task], List[schemas.TaskCard]])
 async def get_all_tasks(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    view: schemas.TaskView = "full",
+    page: PageParams = Depends(),
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all tasks (accessible to all authenticated users)"""
-    tasks = get_tasks(db, skip=skip, limit=limit)
-    return tasks
+    """Get all tasks (accessible to all authenticated users); `view=card` omits Text"""
+    tasks = await get_tasks(db, skip=page.skip, limit=page.limit, cursor=page.cursor, view=view)
+    adapter = TASK_CARD_LIST if view == "card" else TASK_LIST
+    return orm_response(adapter, page_response(response, tasks), response)
 
-@router.get("/my", response_model=List[schemas.TaskWithDetails])
+@router.get("/my", response_model=Union[List[schemas.TaskWithDetails], List[schemas.TaskCard]])
 async def get_my_tasks(
+    response: Response,
     closed: Optional[bool] = None,
+    view: schemas.TaskView = "full",
+    page: PageParams = Depends(),
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get tasks assigned to or created by the current user"""
-    tasks = get_user_tasks(db, current_user.Id, closed)
-    return tasks
+    """Get tasks assigned to or created by the current user; `view=card` returns TaskCard"""
+    tasks = await get_user_tasks(db, current_user.Id, closed, cursor=page.cursor, limit=page.limit, skip=page.skip, view=view)
+    adapter = TASK_CARD_LIST if view == "card" else TASK_DETAILS_LIST
+    return orm_response(adapter, page_response(response, tasks), response)
 
-@router.get("/projects/{project_id}/tasks", response_model=List[schemas.TaskWithDetails])
+@router.get("/projects/{project_id}/tasks", response_model=Union[List[schemas.TaskWithDetails], List[schemas.TaskCard]])
 async def get_project_tasks_endpoint(
     project_id: int,
+    request: Request,
+    response: Response,
     closed: Optional[bool] = None,
+    tags_any: Optional[List[str]] = Query(None),
+    tags_all: Optional[List[str]] = Query(None),
+    view: schemas.TaskView = "full",
+    page: PageParams = Depends(),
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all tasks for a project - requires project access"""
+    """Get all tasks for a project - requires project access.
+
+    `tags_any` keeps tasks having at least one of the tags, `tags_all` keeps
+    tasks having every tag; both accept repeated or comma-separated values.
+    `view=card` returns TaskCard rows: no Text, comments, files or pins.
+    """
     # Check if user has access to the project
-    if not check_project_access(db, project_id, current_user.Id):
+    if not await check_project_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this project"
         )
-    
-    # Check if project exists
-    project = get_project(db, project_id)
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
+
+    await check_project_etag(db, request, response, project_id, current_user.Id)
     
     try:
-        tasks = get_project_tasks(db, project_id, closed)
-        return tasks
+        tasks = await get_project_tasks(
+            db, project_id, closed,
+            cursor=page.cursor, limit=page.limit, skip=page.skip,
+            tags_any=tags_any, tags_all=tags_all, view=view,
+        )
+        adapter = TASK_CARD_LIST if view == "card" else TASK_DETAILS_LIST
+        return orm_response(adapter, page_response(response, tasks), response)
     except Exception as e:
         # If the DB schema is out of date (missing columns), provide a clear error for debugging
         import sqlalchemy
@@ -100,32 +123,44 @@ async def get_project_tasks_endpoint(
             )
         raise
 
+@router.get("/projects/{project_id}/tags", response_model=List[schemas.TagCount])
+async def get_project_tags(
+    project_id: int,
+    request: Request,
+    response: Response,
+    closed: Optional[bool] = None,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Tag usage counts for a project, most used first - requires project access"""
+    if not await check_project_access(db, project_id, current_user.Id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    await check_project_etag(db, request, response, project_id, current_user.Id)
+
+    return await get_project_tag_counts(db, project_id, closed)
+
 @router.post("/projects/{project_id}/tasks", response_model=schemas.Task)
 async def create_new_task(
     project_id: int,
     task_data: schemas.TaskCreate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new task in a project - requires project access"""
     # Check if user has access to the project
-    if not check_project_access(db, project_id, current_user.Id):
+    if not await check_project_access(db, project_id, current_user.Id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this project"
         )
     
-    # Check if project exists
-    project = get_project(db, project_id)
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
     # Check if target user exists (if specified)
     if task_data.TargetId:
-        target_user = get_user(db, task_data.TargetId)
+        target_user = await get_user(db, task_data.TargetId)
         if not target_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -134,7 +169,7 @@ async def create_new_task(
     
     # Check if task group belongs to this project (if specified)
     if task_data.GroupId:
-        task_group = get_task_group(db, task_data.GroupId)
+        task_group = await get_task_group(db, task_data.GroupId)
         if not task_group:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -146,18 +181,40 @@ async def create_new_task(
                 detail="Task group does not belong to this project"
             )
     
-    task = create_task(db, task_data, current_user.Id)
+    task = await create_task(db, task_data, current_user.Id)
     return task
 
+@router.post("/projects/{project_id}/tasks:batch", response_model=schemas.TaskBatchResponse)
+async def batch_tasks(
+    project_id: int,
+    batch: schemas.TaskBatch,
+    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create/update/move/close/reopen many tasks of a project in one transaction.
+
+    Access is checked once for the whole batch; invalid operations are
+    reported per item and do not prevent the others from being applied.
+    """
+    if not await check_project_access(db, project_id, current_user.Id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    results = await apply_task_batch(db, project_id, current_user.Id, batch.Operations)
+    applied = sum(1 for r in results if r.Ok)
+    return schemas.TaskBatchResponse(Applied=applied, Failed=len(results) - applied, Results=results)
+
 @router.put("/{task_id}", response_model=schemas.Task)
 async def update_existing_task(
     task_id: int,
     task_update: schemas.TaskUpdate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a task - requires project access"""
-    task = get_task(db, task_id)
+    task = await get_task(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -166,8 +223,8 @@ async def update_existing_task(
     
     # Check if user has access to the project (if task has a group)
     if task.GroupId:
-        task_group = get_task_group(db, task.GroupId)
-        if task_group and not check_project_access(db, task_group.ProjectId, current_user.Id):
+        project_id = await get_group_project_id(db, task.GroupId)
+        if project_id is not None and not await check_project_access(db, project_id, current_user.Id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have access to this project"
@@ -175,7 +232,7 @@ async def update_existing_task(
     
     # Check if trying to change target user to non-existent user
     if task_update.TargetId is not None:
-        target_user = get_user(db, task_update.TargetId)
+        target_user = await get_user(db, task_update.TargetId)
         if not target_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -184,21 +241,21 @@ async def update_existing_task(
     
     # Check if trying to change task group to one from different project
     if task_update.GroupId is not None and task_update.GroupId != task.GroupId:
-        new_group = get_task_group(db, task_update.GroupId)
+        new_group = await get_task_group(db, task_update.GroupId)
         if not new_group:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="New task group not found"
             )
         # Find the project ID of the current task
-        current_group = get_task_group(db, task.GroupId)
-        if current_group and current_group.ProjectId != new_group.ProjectId:
+        current_project_id = await get_group_project_id(db, task.GroupId) if task.GroupId else None
+        if current_project_id is not None and current_project_id != new_group.ProjectId:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cannot move task to group in different project"
             )
     
-    updated_task = update_task(db, task_id, task_update)
+    updated_task = await update_task(db, task_id, task_update)
     if not updated_task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -211,10 +268,10 @@ async def update_existing_task(
 async def delete_existing_task(
     task_id: int,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a task - requires project access"""
-    task = get_task(db, task_id)
+    task = await get_task(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -223,14 +280,14 @@ async def delete_existing_task(
     
     # Check if user has access to the project (if task has a group)
     if task.GroupId:
-        task_group = get_task_group(db, task.GroupId)
-        if task_group and not check_project_access(db, task_group.ProjectId, current_user.Id):
+        project_id = await get_group_project_id(db, task.GroupId)
+        if project_id is not None and not await check_project_access(db, project_id, current_user.Id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have access to this project"
             )
     
-    success = delete_task(db, task_id)
+    success = await delete_task(db, task_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -243,10 +300,10 @@ async def delete_existing_task(
 async def close_task(
     task_id: int,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Close a task - requires project access"""
-    task = get_task(db, task_id)
+    task = await get_task(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -255,8 +312,8 @@ async def close_task(
     
     # Check if user has access to the project (if task has a group)
     if task.GroupId:
-        task_group = get_task_group(db, task.GroupId)
-        if task_group and not check_project_access(db, task_group.ProjectId, current_user.Id):
+        project_id = await get_group_project_id(db, task.GroupId)
+        if project_id is not None and not await check_project_access(db, project_id, current_user.Id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have access to this project"
@@ -264,7 +321,7 @@ async def close_task(
     
     # Update task to set IsClosed = True
     task_update = schemas.TaskUpdate(IsClosed=True)
-    updated_task = update_task(db, task_id, task_update)
+    updated_task = await update_task(db, task_id, task_update)
     
     if not updated_task:
         raise HTTPException(
@@ -278,10 +335,10 @@ async def close_task(
 async def reopen_task(
     task_id: int,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Reopen a closed task - requires project access"""
-    task = get_task(db, task_id)
+    task = await get_task(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -290,8 +347,8 @@ async def reopen_task(
     
     # Check if user has access to the project (if task has a group)
     if task.GroupId:
-        task_group = get_task_group(db, task.GroupId)
-        if task_group and not check_project_access(db, task_group.ProjectId, current_user.Id):
+        project_id = await get_group_project_id(db, task.GroupId)
+        if project_id is not None and not await check_project_access(db, project_id, current_user.Id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have access to this project"
@@ -299,7 +356,7 @@ async def reopen_task(
     
     # Update task to set IsClosed = False
     task_update = schemas.TaskUpdate(IsClosed=False)
-    updated_task = update_task(db, task_id, task_update)
+    updated_task = await update_task(db, task_id, task_update)
     
     if not updated_task:
         raise HTTPException(
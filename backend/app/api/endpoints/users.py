@@ -1,29 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app import schemas, models
 from app.crud.user import get_user_by_email, create_user, get_users, get_user
 from app.database import get_db
+from app.pagination import PageParams, page_response
 from app.auth import get_current_active_user
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = get_user_by_email(db, email=user.email)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return create_user(db=db, user=user)
+    return await create_user(db=db, user=user)
 
 @router.get("/", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    users = get_users(db, skip=skip, limit=limit)
-    return users
+async def read_users(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
+    users = await get_users(db, skip=page.skip, limit=page.limit, cursor=page.cursor)
+    return page_response(response, users)
 
 @router.get("/{user_id}", response_model=schemas.User)
-def read_user(user_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    db_user = get_user(db, user_id=user_id)
+async def read_user(user_id: int, db: AsyncSession = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
+    db_user = await get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
\ No newline at end of file
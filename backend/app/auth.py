@@ -3,11 +3,23 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select, and_, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from app import models, schemas
 from app.database import get_db
+from app.cache import (
+    MISSING,
+    REQUEST_ACCESS_KEY,
+    group_project_cache,
+    project_access_cache,
+    request_cache,
+    token_cache,
+    user_cache,
+)
+from typing import NamedTuple, Optional
 import hashlib
+import time
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
 ALGORITHM = "HS256"
@@ -38,73 +50,146 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(models.User).filter(models.User.Username == username or models.User.Email == username).first()
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await db.scalar(select(models.User).where(models.User.Username == username or models.User.Email == username))
     if not user:
         return False
     if not verify_password(password, user.PasswordHash):
         return False
     return user
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme), db: Session = Depends(get_db)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme), db: AsyncSession = Depends(get_db)):
     token = credentials.credentials
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = db.query(models.User).filter(models.User.Username == username).first()
+    user = await get_user_by_token(db, token)
     if user is None:
         raise credentials_exception
     return user
 
-def get_current_active_user(current_user: models.User = Depends(get_current_user)):
+
+async def get_user_by_token(db: AsyncSession, token: str) -> Optional[models.User]:
+    """Resolve a bearer token to its user, None if the token or the user is invalid"""
+    payload = _decode_token(token)
+    if payload is None:
+        return None
+    username: str = payload.get("sub")
+    if username is None:
+        return None
+
+    user = user_cache.get(username)
+    if user is None:
+        db_user = await db.scalar(select(models.User).where(models.User.Username == username))
+        if db_user is None:
+            return None
+        user = _detached_user(db_user)
+        user_cache.set(username, user)
+    return user
+
+
+def _decode_token(token: str) -> Optional[dict]:
+    """Verify the JWT once and reuse the payload until the token expires"""
+    payload = token_cache.get(token)
+    now = time.time()
+    if payload is not None:
+        return payload if payload.get("exp", 0) > now else None
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    exp = payload.get("exp")
+    if exp is not None:
+        token_cache.set(token, payload, ttl=min(token_cache.ttl, exp - now))
+    return payload
+
+
+def _detached_user(db_user: models.User) -> models.User:
+    # Кэшируем копию только с колонками: она не привязана к сессии запроса
+    # и не тянет за собой ленивые связи.
+    columns = {attr.key: getattr(db_user, attr.key) for attr in inspect(models.User).column_attrs}
+    return models.User(**columns)
+
+async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
     if current_user.IsDeleted:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
-def check_project_access(db: Session, project_id: int, user_id: int) -> bool:
+class ProjectAccess(NamedTuple):
+    owner_id: Optional[int]
+    # None => пользователь не является участником проекта
+    access_level: Optional[str]
+
+
+async def _load_project_access(db: AsyncSession, project_id: int, user_id: int) -> Optional[ProjectAccess]:
+    # Владелец и членство одним запросом вместо get_project + get_project_member
+    row = (await db.execute(
+        select(models.Project.OwnerId, models.ProjectMember.AccessLevel)
+        .outerjoin(
+            models.ProjectMember,
+            and_(
+                models.ProjectMember.ProjectId == models.Project.Id,
+                models.ProjectMember.MemnerId == user_id,
+            ),
+        )
+        .where(models.Project.Id == project_id, models.Project.IsDeleted == False)
+    )).first()
+    if row is None:
+        return None
+    return ProjectAccess(owner_id=row.OwnerId, access_level=row.AccessLevel)
+
+
+async def get_project_access(db: AsyncSession, project_id: int, user_id: int) -> Optional[ProjectAccess]:
+    """Return the user's access to the project, None if the project does not exist.
+
+    Memoized for the request on the session and shared between requests
+    through cache.project_access_cache; crud writes invalidate both.
+    """
+    key = (project_id, user_id)
+    memo = request_cache(db, REQUEST_ACCESS_KEY)
+    if key in memo:
+        return memo[key]
+
+    access = project_access_cache.get(key, MISSING)
+    if access is MISSING:
+        access = await _load_project_access(db, project_id, user_id)
+        project_access_cache.set(key, access)
+
+    memo[key] = access
+    return access
+
+
+async def get_group_project_id(db: AsyncSession, group_id: int) -> Optional[int]:
+    """Project of a task group; groups never move between projects, so it is cached"""
+    project_id = group_project_cache.get(group_id)
+    if project_id is None:
+        project_id = await db.scalar(
+            select(models.TaskGroup.ProjectId).where(models.TaskGroup.Id == group_id)
+        )
+        if project_id is not None:
+            group_project_cache.set(group_id, project_id)
+    return project_id
+
+
+async def check_project_access(db: AsyncSession, project_id: int, user_id: int) -> bool:
     """Check if user has access to the project (is owner or member)"""
-    from app.crud.project import get_project
-    from app.crud.project_member import get_project_member
-    
-    project = get_project(db, project_id)
-    if not project:
+    access = await get_project_access(db, project_id, user_id)
+    if access is None:
         return False
     
-    # Check if user is owner
-    if project.OwnerId == user_id:
-        return True
-    
-    # Check if user is member
-    member = get_project_member(db, project_id, user_id)
-    return member is not None
+    # Owner or any member
+    return access.owner_id == user_id or access.access_level is not None
 
 
-def check_project_admin_access(db: Session, project_id: int, user_id: int) -> bool:
+async def check_project_admin_access(db: AsyncSession, project_id: int, user_id: int) -> bool:
     """Check if user has admin access to the project (is owner or admin member)"""
-    from app.crud.project import get_project
-    from app.crud.project_member import get_project_member
-    
-    project = get_project(db, project_id)
-    if not project:
+    access = await get_project_access(db, project_id, user_id)
+    if access is None:
         return False
     
-    # Check if user is owner
-    if project.OwnerId == user_id:
-        return True
-    
-    # Check if user is admin member
-    member = get_project_member(db, project_id, user_id)
-    if member and member.AccessLevel == "Admin":
-        return True
-    
-    return False
\ No newline at end of file
+    # Owner or admin member
+    return access.owner_id == user_id or access.access_level == "Admin"
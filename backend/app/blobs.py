@@ -0,0 +1,236 @@
+"""Content-addressed storage of uploaded files.
+
+File content lives once per SHA-256 in Uploads/blobs/ab/cd/abcd..., and
+StoreFiles rows point to it through Sha256. Each row still gets its own
+TagName, so download URLs stay per file. models.Blob counts the rows that
+reference the content. An upload of bytes that are already stored only
+increments the counter and inserts the StoreFile; nothing is written to disk.
+
+Blob rows are the lock for their file. acquire_blob locks the row, or
+inserts it, before it checks whether the file is on disk. collect_garbage
+deletes unreferenced rows and unlinks their files before committing. An
+upload of the same content waits for that commit, finds no row, inserts it
+and writes the file again. Files written by transactions that then rolled
+back have no row; sweep_orphans removes them once they are older than
+BLOB_GRACE_SECONDS.
+
+Files uploaded before this store sit in Uploads/ under their TagName.
+blob_path_for falls back to them. import_legacy_files moves them into the
+store:
+
+    python -m app.blobs gc
+    python -m app.blobs import-legacy
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app import models
+from app.database import engine, unit_of_work
+from app.uploads import UPLOAD_CHUNK_SIZE, UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = os.path.join(UPLOAD_DIR, "blobs")
+BLOB_GC_BATCH_SIZE = int(os.getenv("BLOB_GC_BATCH_SIZE", "500"))
+# Файл без строки Blobs моложе этого может принадлежать ещё не завершённой транзакции
+BLOB_GRACE_SECONDS = int(os.getenv("BLOB_GRACE_SECONDS", "3600"))
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(BLOB_DIR, sha256[:2], sha256[2:4], sha256)
+
+
+def blob_path_for(store_file: models.StoreFile) -> str:
+    """Where the file's bytes are: the blob, or the flat Uploads/ path of older uploads"""
+    if store_file.Sha256:
+        path = blob_path(store_file.Sha256)
+        if os.path.exists(path):
+            return path
+    return os.path.join(UPLOAD_DIR, store_file.TagName)
+
+
+def touch_blob(sha256: str) -> bool:
+    """True if the blob file exists; refreshes its mtime so sweep_orphans leaves it alone"""
+    try:
+        os.utime(blob_path(sha256))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+async def acquire_blob(db: AsyncSession, sha256: str, size: int) -> None:
+    """Add a reference to the content, creating its row; the row stays locked until commit"""
+    if await _increment(db, sha256):
+        return
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(models.Blob).values(Sha256=sha256, Size=size, RefCount=1))
+    except IntegrityError:
+        # Параллельная загрузка того же содержимого вставила строку первой
+        await _increment(db, sha256)
+
+
+async def release_blob(db: AsyncSession, sha256: Optional[str]) -> None:
+    if sha256:
+        await db.execute(
+            update(models.Blob)
+            .where(models.Blob.Sha256 == sha256, models.Blob.RefCount > 0)
+            .values(RefCount=models.Blob.RefCount - 1)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def _increment(db: AsyncSession, sha256: str) -> bool:
+    return await db.scalar(
+        update(models.Blob)
+        .where(models.Blob.Sha256 == sha256)
+        .values(RefCount=models.Blob.RefCount + 1)
+        .returning(models.Blob.Sha256)
+        .execution_options(synchronize_session=False)
+    ) is not None
+
+
+def _unlink_blobs(hashes: Iterable[str]) -> None:
+    for sha256 in hashes:
+        try:
+            os.remove(blob_path(sha256))
+        except FileNotFoundError:
+            pass
+
+
+async def collect_garbage(batch_size: int = BLOB_GC_BATCH_SIZE) -> int:
+    """Delete unreferenced blobs batch by batch; returns the number of files removed"""
+    removed = 0
+    while True:
+        async with unit_of_work() as db:
+            hashes = (await db.scalars(
+                select(models.Blob.Sha256)
+                .where(models.Blob.RefCount <= 0)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not hashes:
+                break
+            await db.execute(delete(models.Blob).where(models.Blob.Sha256.in_(hashes)))
+            # До commit, пока строки заблокированы: загрузка того же содержимого
+            # дождётся commit и запишет файл заново
+            await run_in_threadpool(_unlink_blobs, hashes)
+        removed += len(hashes)
+        logger.info("blob gc: %s unreferenced blobs removed", removed)
+    return removed + await sweep_orphans(batch_size)
+
+
+def _old_blob_files(min_age: float) -> List[str]:
+    cutoff = time.time() - min_age
+    found = []
+    for root, _, names in os.walk(BLOB_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    found.append(path)
+            except FileNotFoundError:
+                pass
+    return found
+
+
+async def sweep_orphans(batch_size: int = BLOB_GC_BATCH_SIZE, min_age: float = BLOB_GRACE_SECONDS) -> int:
+    """Remove old blob files that have no Blobs row, and abandoned .part files"""
+    paths = await run_in_threadpool(_old_blob_files, min_age)
+    removed = 0
+    for start in range(0, len(paths), batch_size):
+        batch = paths[start:start + batch_size]
+        by_hash = {os.path.basename(path): path for path in batch}
+        async with unit_of_work() as db:
+            known = set((await db.scalars(
+                select(models.Blob.Sha256).where(models.Blob.Sha256.in_(by_hash.keys()))
+            )).all())
+        orphans = [path for name, path in by_hash.items() if name not in known]
+        await run_in_threadpool(lambda: [os.remove(path) for path in orphans if os.path.exists(path)])
+        removed += len(orphans)
+    if removed:
+        logger.info("blob gc: %s orphaned files removed", removed)
+    return removed
+
+
+def _hash_file(path: str) -> tuple:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            digest.update(chunk)
+    return size, digest.hexdigest()
+
+
+def _link_into_store(path: str, sha256: str) -> None:
+    target = blob_path(sha256)
+    if touch_blob(sha256):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Жёсткая ссылка (или копия): старый путь остаётся рабочим, пока транзакция не зафиксирована
+    try:
+        os.link(path, target)
+    except OSError:
+        shutil.copyfile(path, target)
+    # Жёсткая ссылка сохраняет старый mtime, а sweep_orphans не должен принять файл за брошенный
+    os.utime(target)
+
+
+async def import_legacy_files(batch_size: int = BLOB_GC_BATCH_SIZE) -> int:
+    """Move files stored flat in Uploads/ into the blob store; returns how many were moved"""
+    moved = 0
+    last_id = 0
+    while True:
+        flat_paths = []
+        async with unit_of_work() as db:
+            rows = (await db.scalars(
+                select(models.StoreFile)
+                .where(models.StoreFile.Id > last_id)
+                .order_by(models.StoreFile.Id)
+                .limit(batch_size)
+            )).all()
+            if not rows:
+                break
+            last_id = rows[-1].Id
+            for row in rows:
+                path = os.path.join(UPLOAD_DIR, row.TagName)
+                if not os.path.isfile(path):
+                    continue
+                size, sha256 = await run_in_threadpool(_hash_file, path)
+                await acquire_blob(db, sha256, size)
+                await run_in_threadpool(_link_into_store, path, sha256)
+                row.Size, row.Sha256 = size, sha256
+                flat_paths.append(path)
+        # Плоские копии удаляются только после commit
+        await run_in_threadpool(lambda: [os.remove(path) for path in flat_paths])
+        moved += len(flat_paths)
+        logger.info("blob import: %s files moved", moved)
+    return moved
+
+
+async def main(args) -> None:
+    if args.command == "gc":
+        print(f"{await collect_garbage(args.batch_size)} files removed")
+    else:
+        print(f"{await import_legacy_files(args.batch_size)} files moved into the blob store")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["gc", "import-legacy"])
+    parser.add_argument("--batch-size", type=int, default=BLOB_GC_BATCH_SIZE)
+    asyncio.run(main(parser.parse_args()))
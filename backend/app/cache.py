@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_matching(self, predicate: Callable[[Hashable], bool]) -> None:
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Права доступа к проекту: (project_id, user_id) -> ProjectAccess | None.
+# Кэш общий для всех запросов воркера; TTL ограничивает устаревание данных
+# при нескольких воркерах, записи в crud сбрасывают его сразу.
+project_access_cache = TTLCache(
+    maxsize=int(os.getenv("PROJECT_ACCESS_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PROJECT_ACCESS_CACHE_TTL", "30")),
+)
+
+# Группа задач никогда не переезжает в другой проект: group_id -> project_id
+group_project_cache = TTLCache(
+    maxsize=int(os.getenv("GROUP_PROJECT_CACHE_SIZE", "50000")),
+    ttl=float(os.getenv("GROUP_PROJECT_CACHE_TTL", "3600")),
+)
+
+# Аутентифицированный пользователь по subject токена (Username).
+# TTL должен быть заметно меньше времени жизни токена (30 минут).
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+)
+
+# Уже проверенные токены: token -> payload, чтобы не считать HMAC на каждый запрос
+token_cache = TTLCache(
+    maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL", "300")),
+)
+
+# Справочник состояний задач целиком: TASK_STATES_KEY -> tuple[schemas.TaskState].
+# Загружается при старте; TTL подхватывает состояния, добавленные другими воркерами.
+task_state_cache = TTLCache(
+    maxsize=1,
+    ttl=float(os.getenv("TASK_STATE_CACHE_TTL", "300")),
+)
+
+# Роли проекта: project_id -> {role_id: schemas.ProjectRole}
+project_roles_cache = TTLCache(
+    maxsize=int(os.getenv("PROJECT_ROLES_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PROJECT_ROLES_CACHE_TTL", "300")),
+)
+
+TASK_STATES_KEY = "task_states"
+REQUEST_ACCESS_KEY = "project_access"
+PENDING_INVALIDATIONS_KEY = "pending_cache_invalidations"
+
+
+def cache_stats() -> dict:
+    return {
+        "project_access": project_access_cache.stats(),
+        "group_project": group_project_cache.stats(),
+        "user": user_cache.stats(),
+        "token": token_cache.stats(),
+        "task_state": task_state_cache.stats(),
+        "project_roles": project_roles_cache.stats(),
+    }
+
+
+def request_cache(db: AsyncSession, name: str) -> dict:
+    """Per-request memo stored on the request's session"""
+    return db.info.setdefault(name, {})
+
+
+def _invalidate(db: AsyncSession, drop: Callable[[], None]) -> None:
+    """Drop now and once more when the transaction ends.
+
+    Until the request's commit other requests still read the old rows and may
+    put them back into the shared caches; this request may cache its own
+    uncommitted view, which a rollback would make wrong.
+    """
+    drop()
+    db.info.setdefault(PENDING_INVALIDATIONS_KEY, []).append(drop)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _run_pending_invalidations(session: Session) -> None:
+    for drop in session.info.pop(PENDING_INVALIDATIONS_KEY, ()):
+        drop()
+
+
+def invalidate_project_access(db: AsyncSession, project_id: int, user_id: Optional[int] = None) -> None:
+    """Drop cached permissions for one member or, without user_id, for the whole project"""
+    memo = request_cache(db, REQUEST_ACCESS_KEY)
+    if user_id is not None:
+        memo.pop((project_id, user_id), None)
+        _invalidate(db, lambda: project_access_cache.pop((project_id, user_id)))
+        return
+
+    for key in [k for k in memo if k[0] == project_id]:
+        del memo[key]
+    _invalidate(db, lambda: project_access_cache.pop_matching(lambda key: key[0] == project_id))
+
+
+def invalidate_group_project(db: AsyncSession, group_id: int) -> None:
+    _invalidate(db, lambda: group_project_cache.pop(group_id))
+
+
+def invalidate_user(db: AsyncSession, *usernames: Optional[str]) -> None:
+    def drop():
+        for username in usernames:
+            if username is not None:
+                user_cache.pop(username)
+    _invalidate(db, drop)
+
+
+def invalidate_task_states(db: AsyncSession) -> None:
+    _invalidate(db, lambda: task_state_cache.pop(TASK_STATES_KEY))
+
+
+def invalidate_project_roles(db: AsyncSession, project_id: int) -> None:
+    _invalidate(db, lambda: project_roles_cache.pop(project_id))
@@ -1,37 +1,56 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from app import models, schemas
+from app.realtime import emit_project_event
+from app.updates import update_returning
+from app.versioning import (
+    ENTITY_COMMENT,
+    add_tombstones,
+    bump_comment_project_version,
+    bump_task_project_version,
+    row_version,
+)
 
-def get_comment(db: Session, comment_id: int) -> Optional[models.Comment]:
-    return db.query(models.Comment).filter(models.Comment.Id == comment_id).first()
+async def get_comment(db: AsyncSession, comment_id: int) -> Optional[models.Comment]:
+    return await db.scalar(select(models.Comment).where(models.Comment.Id == comment_id))
 
-def get_task_comments(db: Session, task_id: int) -> List[models.Comment]:
-    return db.query(models.Comment).filter(
-        models.Comment.TaskId == task_id
-    ).order_by(models.Comment.CreateDate).all()
+async def get_task_comments(db: AsyncSession, task_id: int) -> List[models.Comment]:
+    result = await db.scalars(
+        select(models.Comment).where(
+            models.Comment.TaskId == task_id
+        ).order_by(models.Comment.CreateDate)
+    )
+    return list(result.all())
 
-def create_comment(db: Session, comment: schemas.CommentCreate, author_id: int) -> models.Comment:
-    db_comment = models.Comment(**comment.model_dump(), AuthorId=author_id)
+async def create_comment(db: AsyncSession, comment: schemas.CommentCreate, author_id: int) -> models.Comment:
+    bumped = await bump_task_project_version(db, comment.TaskId)
+    db_comment = models.Comment(**comment.model_dump(), AuthorId=author_id, RowVersion=row_version(bumped))
     db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
+    await db.flush()
+    emit_project_event(db, bumped, ENTITY_COMMENT, "created", [db_comment.Id])
     return db_comment
 
-def update_comment(db: Session, comment_id: int, text: str) -> Optional[models.Comment]:
-    db_comment = get_comment(db, comment_id)
+async def update_comment(db: AsyncSession, comment_id: int, text: str) -> Optional[models.Comment]:
+    bumped = await bump_comment_project_version(db, comment_id)
+    db_comment = await update_returning(
+        db, models.Comment, {"Text": text, "RowVersion": row_version(bumped)},
+        models.Comment.Id == comment_id,
+    )
     if not db_comment:
         return None
     
-    db_comment.Text = text
-    db.commit()
-    db.refresh(db_comment)
+    emit_project_event(db, bumped, ENTITY_COMMENT, "updated", [comment_id])
     return db_comment
 
-def delete_comment(db: Session, comment_id: int) -> bool:
-    db_comment = get_comment(db, comment_id)
+async def delete_comment(db: AsyncSession, comment_id: int) -> bool:
+    db_comment = await get_comment(db, comment_id)
     if not db_comment:
         return False
     
-    db.delete(db_comment)
-    db.commit()
+    bumped = await bump_task_project_version(db, db_comment.TaskId)
+    await add_tombstones(db, bumped, ENTITY_COMMENT, select(models.Comment.Id).where(models.Comment.Id == comment_id))
+    emit_project_event(db, bumped, ENTITY_COMMENT, "deleted", [comment_id])
+    await db.delete(db_comment)
+    await db.flush()
     return True
\ No newline at end of file
@@ -1,24 +1,29 @@
-from typing import List, Optional
+from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
+from app.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.updates import update_returning
 
 
-def get_mark(db: Session, mark_id: int) -> Optional[models.Mark]:
-    return db.query(models.Mark).filter(models.Mark.Id == mark_id).first()
+async def get_mark(db: AsyncSession, mark_id: int) -> Optional[models.Mark]:
+    return await db.scalar(select(models.Mark).where(models.Mark.Id == mark_id))
 
 
-def get_task_marks(db: Session, task_id: int) -> List[models.Mark]:
-    return (
-        db.query(models.Mark)
-        .filter(models.Mark.TargetTask == task_id)
-        .order_by(models.Mark.CreateDate)
-        .all()
-    )
+async def get_task_marks(
+    db: AsyncSession,
+    task_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    skip: int = 0,
+) -> Page:
+    stmt = select(models.Mark).where(models.Mark.TargetTask == task_id)
+    return await paginate(db, stmt, models.Mark, cursor=cursor, limit=limit, skip=skip)
 
 
-def create_mark(db: Session, data: schemas.MarkCreate, user_id: int) -> models.Mark:
+async def create_mark(db: AsyncSession, data: schemas.MarkCreate, user_id: int) -> models.Mark:
     db_mark = models.Mark(
         TargetTask=data.TargetTask,
         MarkedById=user_id,
@@ -26,36 +31,27 @@ def create_mark(db: Session, data: schemas.MarkCreate, user_id: int) -> models.M
         Rate=data.Rate,
     )
     db.add(db_mark)
-    db.commit()
-    db.refresh(db_mark)
+    await db.flush()
     return db_mark
 
 
-def update_mark(
-    db: Session,
+async def update_mark(
+    db: AsyncSession,
     mark_id: int,
     data: schemas.MarkUpdate,
 ) -> Optional[models.Mark]:
-    db_mark = get_mark(db, mark_id)
-    if not db_mark:
-        return None
-
-    update_data = data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_mark, field, value)
-
-    db.commit()
-    db.refresh(db_mark)
-    return db_mark
+    return await update_returning(
+        db, models.Mark, data.model_dump(exclude_unset=True), models.Mark.Id == mark_id
+    )
 
 
-def delete_mark(db: Session, mark_id: int) -> bool:
-    db_mark = get_mark(db, mark_id)
+async def delete_mark(db: AsyncSession, mark_id: int) -> bool:
+    db_mark = await get_mark(db, mark_id)
     if not db_mark:
         return False
 
-    db.delete(db_mark)
-    db.commit()
+    await db.delete(db_mark)
+    await db.flush()
     return True
 
 
@@ -1,10 +1,11 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from app import models, schemas
+from app.cache import invalidate_user
 import random
 import string
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import func
 
 
 def generate_otp_code() -> str:
@@ -12,24 +13,24 @@ def generate_otp_code() -> str:
     return ''.join(random.choices(string.digits, k=6))
 
 
-def get_otp_by_id(db: Session, otp_id: int) -> Optional[models.Otp]:
-    return db.query(models.Otp).filter(models.Otp.Id == otp_id).first()
+async def get_otp_by_id(db: AsyncSession, otp_id: int) -> Optional[models.Otp]:
+    return await db.scalar(select(models.Otp).where(models.Otp.Id == otp_id))
 
 
-def get_otp_by_user_email(db: Session, email: str) -> Optional[models.Otp]:
-    user = db.query(models.User).filter(models.User.Email == email).first()
+async def get_otp_by_user_email(db: AsyncSession, email: str) -> Optional[models.Otp]:
+    user = await db.scalar(select(models.User).where(models.User.Email == email))
     if user and user.OtpId:
-        return get_otp_by_id(db, user.OtpId)
+        return await get_otp_by_id(db, user.OtpId)
     return None
 
 
-def create_otp(db: Session, user: models.User) -> models.Otp:
+async def create_otp(db: AsyncSession, user: models.User) -> models.Otp:
     """Create a new OTP for the user"""
     # Delete existing OTP if any
     if user.OtpId:
-        existing_otp = get_otp_by_id(db, user.OtpId)
+        existing_otp = await get_otp_by_id(db, user.OtpId)
         if existing_otp:
-            db.delete(existing_otp)
+            await db.delete(existing_otp)
 
     otp_code = generate_otp_code()
     db_otp = models.Otp(
@@ -37,22 +38,22 @@ def create_otp(db: Session, user: models.User) -> models.Otp:
         Attempts=5
     )
     db.add(db_otp)
-    db.commit()
-    db.refresh(db_otp)
+    await db.flush()
 
     # Link OTP to user
     user.OtpId = db_otp.Id
-    db.commit()
+    await db.flush()
+    invalidate_user(db, user.Username)
 
     return db_otp
 
 
-def verify_otp(db: Session, email: str, code: str) -> tuple[bool, str]:
+async def verify_otp(db: AsyncSession, email: str, code: str) -> tuple[bool, str]:
     """
     Verify OTP code.
     Returns (success, message)
     """
-    otp = get_otp_by_user_email(db, email)
+    otp = await get_otp_by_user_email(db, email)
     if not otp:
         return False, "OTP not found"
 
@@ -77,25 +78,28 @@ def verify_otp(db: Session, email: str, code: str) -> tuple[bool, str]:
 
     if otp.Code != code:
         otp.Attempts -= 1
-        db.commit()
+        # Ответ будет 400 и транзакция запроса откатится; неудачная попытка должна сохраниться
+        await db.commit()
         return False, f"Invalid OTP code. {otp.Attempts} attempts left"
 
     # Success - delete OTP and clear user's OtpId
-    user = db.query(models.User).filter(models.User.Email == email).first()
+    user = await db.scalar(select(models.User).where(models.User.Email == email))
     if user:
         user.OtpId = None
-    db.delete(otp)
-    db.commit()
+    await db.delete(otp)
+    await db.flush()
+    if user:
+        invalidate_user(db, user.Username)
 
     return True, "OTP verified successfully"
 
 
-def can_resend_otp(db: Session, email: str) -> tuple[bool, str]:
+async def can_resend_otp(db: AsyncSession, email: str) -> tuple[bool, str]:
     """
     Check if OTP can be resent (30 seconds cooldown).
     Returns (can_resend, message)
     """
-    otp = get_otp_by_user_email(db, email)
+    otp = await get_otp_by_user_email(db, email)
     if not otp:
         return True, "No existing OTP"
 
@@ -1,30 +1,34 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from app import models, schemas
+from app.versioning import bump_task_project_version
 
-def get_pin(db: Session, user_id: int, task_id: int) -> Optional[models.Pin]:
-    return db.query(models.Pin).filter(
+async def get_pin(db: AsyncSession, user_id: int, task_id: int) -> Optional[models.Pin]:
+    return await db.scalar(select(models.Pin).where(
         models.Pin.UserId == user_id,
         models.Pin.TaskId == task_id
-    ).first()
+    ))
 
-def get_user_pins(db: Session, user_id: int) -> List[models.Pin]:
-    return db.query(models.Pin).filter(
+async def get_user_pins(db: AsyncSession, user_id: int) -> List[models.Pin]:
+    result = await db.scalars(select(models.Pin).where(
         models.Pin.UserId == user_id
-    ).all()
+    ))
+    return list(result.all())
 
-def create_pin(db: Session, user_id: int, task_id: int) -> models.Pin:
+async def create_pin(db: AsyncSession, user_id: int, task_id: int) -> models.Pin:
     db_pin = models.Pin(UserId=user_id, TaskId=task_id)
     db.add(db_pin)
-    db.commit()
-    db.refresh(db_pin)
+    await bump_task_project_version(db, task_id)
+    await db.flush()
     return db_pin
 
-def delete_pin(db: Session, user_id: int, task_id: int) -> bool:
-    db_pin = get_pin(db, user_id, task_id)
+async def delete_pin(db: AsyncSession, user_id: int, task_id: int) -> bool:
+    db_pin = await get_pin(db, user_id, task_id)
     if not db_pin:
         return False
     
-    db.delete(db_pin)
-    db.commit()
+    await bump_task_project_version(db, task_id)
+    await db.delete(db_pin)
+    await db.flush()
     return True
\ No newline at end of file
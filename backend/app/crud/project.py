@@ -1,23 +1,50 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from typing import Optional, List
+from sqlalchemy import select, or_, and_, case, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from typing import Dict, Optional, List
 from app import models, schemas
+from app.cache import invalidate_project_access
+from app.database import unit_of_work
+from app.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.updates import update_returning
+from app.versioning import bump_project_version, get_project_version
 from .project_member import add_project_member
 
-def get_project(db: Session, project_id: int) -> Optional[models.Project]:
-    return db.query(models.Project).filter(
+async def get_project(db: AsyncSession, project_id: int) -> Optional[models.Project]:
+    return await db.scalar(select(models.Project).where(
         models.Project.Id == project_id,
         models.Project.IsDeleted == False
-    ).first()
+    ))
 
-def get_projects(db: Session, skip: int = 0, limit: int = 100) -> List[models.Project]:
-    return db.query(models.Project).filter(
+async def get_project_with_details(db: AsyncSession, project_id: int) -> Optional[models.Project]:
+    """Project with everything schemas.ProjectWithDetails serializes"""
+    return await db.scalar(
+        select(models.Project).where(
+            models.Project.Id == project_id,
+            models.Project.IsDeleted == False
+        ).options(
+            joinedload(models.Project.owner),
+            joinedload(models.Project.logo),
+            selectinload(models.Project.members),
+            selectinload(models.Project.task_groups),
+        )
+    )
+
+async def get_projects(db: AsyncSession, skip: int = 0, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page:
+    stmt = select(models.Project).where(
         models.Project.IsDeleted == False
-    ).offset(skip).limit(limit).all()
+    )
+    return await paginate(db, stmt, models.Project, cursor=cursor, limit=limit, skip=skip)
 
-def get_user_projects(db: Session, user_id: int) -> List[models.Project]:
+async def get_user_projects(
+    db: AsyncSession,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    skip: int = 0,
+) -> Page:
     # Проекты, где пользователь владелец или участник
-    return db.query(models.Project).join(models.ProjectMember).filter(
+    stmt = select(models.Project).join(models.ProjectMember).where(
         and_(
             models.Project.IsDeleted == False,
             or_(
@@ -25,37 +52,244 @@ def get_user_projects(db: Session, user_id: int) -> List[models.Project]:
                 models.ProjectMember.MemnerId == user_id
             )
         )
-    ).distinct().all()
+    ).distinct()
+    return await paginate(db, stmt, models.Project, cursor=cursor, limit=limit, skip=skip)
 
-def create_project(db: Session, project: schemas.ProjectCreate, owner_id: int) -> models.Project:
+async def create_project(db: AsyncSession, project: schemas.ProjectCreate, owner_id: int) -> models.Project:
     db_project = models.Project(**project.model_dump(), OwnerId=owner_id)
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
+    await db.flush()
     
     # Автоматически добавляем владельца как админа проекта
-    add_project_member(db, db_project.Id, owner_id, "Admin")
+    await add_project_member(db, db_project.Id, owner_id, "Admin")
     
     return db_project
 
-def update_project(db: Session, project_id: int, project_update: schemas.ProjectUpdate) -> Optional[models.Project]:
-    db_project = get_project(db, project_id)
+async def update_project(db: AsyncSession, project_id: int, project_update: schemas.ProjectUpdate) -> Optional[models.Project]:
+    # Версия проекта увеличивается тем же UPDATE
+    update_data = project_update.model_dump(exclude_unset=True)
+    update_data['Version'] = models.Project.Version + 1
+    db_project = await update_returning(
+        db, models.Project, update_data,
+        models.Project.Id == project_id,
+        models.Project.IsDeleted == False,
+    )
     if not db_project:
         return None
     
-    update_data = project_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_project, field, value)
-    
-    db.commit()
-    db.refresh(db_project)
+    invalidate_project_access(db, project_id)
     return db_project
 
-def delete_project(db: Session, project_id: int) -> bool:
-    db_project = get_project(db, project_id)
+async def delete_project(db: AsyncSession, project_id: int) -> bool:
+    db_project = await get_project(db, project_id)
     if not db_project:
         return False
     
     db_project.IsDeleted = True
-    db.commit()
-    return True
\ No newline at end of file
+    await bump_project_version(db, project_id)
+    await db.flush()
+    invalidate_project_access(db, project_id)
+    return True
+
+# GROUPING(GroupId, StateId, TargetId): бит равен 1, если колонка свёрнута в этом наборе
+_SUMMARY_TOTAL, _SUMMARY_BY_GROUP, _SUMMARY_BY_STATE, _SUMMARY_BY_TARGET = 0b111, 0b011, 0b101, 0b110
+
+async def get_project_summaries(db: AsyncSession, project_ids: List[int], user_id: int) -> List[schemas.ProjectSummary]:
+    """Task and member aggregates for the projects the user can access.
+
+    All task counters come from one GROUP BY GROUPING SETS scan of the
+    projects' tasks; membership and the caller's access come from a second
+    GROUP BY over ProjectMembers. Projects the user cannot see are skipped.
+    """
+    if not project_ids:
+        return []
+
+    members = await db.execute(
+        select(
+            models.Project.Id,
+            models.Project.OwnerId,
+            func.count(models.ProjectMember.Id).label("MemberCount"),
+            func.max(case(
+                (models.ProjectMember.MemnerId == user_id, models.ProjectMember.AccessLevel),
+            )).label("AccessLevel"),
+        )
+        .outerjoin(models.ProjectMember, models.ProjectMember.ProjectId == models.Project.Id)
+        .where(models.Project.Id.in_(project_ids), models.Project.IsDeleted == False)
+        .group_by(models.Project.Id, models.Project.OwnerId)
+    )
+    summaries: Dict[int, schemas.ProjectSummary] = {}
+    for row in members:
+        is_owner = row.OwnerId == user_id
+        if not is_owner and row.AccessLevel is None:
+            continue
+        summaries[row.Id] = schemas.ProjectSummary(
+            ProjectId=row.Id,
+            IsOwner=is_owner,
+            AccessLevel=row.AccessLevel,
+            MemberCount=row.MemberCount,
+            Tasks=schemas.SummaryCounts(),
+        )
+    if not summaries:
+        return []
+
+    task = models.Task
+    project_id = models.TaskGroup.ProjectId
+    open_filter = task.IsClosed == False
+    stmt = (
+        select(
+            project_id,
+            task.GroupId,
+            task.StateId,
+            task.TargetId,
+            func.grouping(task.GroupId, task.StateId, task.TargetId).label("Set"),
+            func.count().label("Total"),
+            func.count().filter(open_filter).label("Open"),
+            func.count().filter(and_(open_filter, task.DeadLine < func.current_date())).label("Overdue"),
+        )
+        .join(models.TaskGroup, models.TaskGroup.Id == task.GroupId)
+        .where(project_id.in_(summaries.keys()))
+        .group_by(func.grouping_sets(
+            tuple_(project_id),
+            tuple_(project_id, task.GroupId),
+            tuple_(project_id, task.StateId),
+            tuple_(project_id, task.TargetId),
+        ))
+    )
+    buckets = {
+        _SUMMARY_BY_GROUP: ("ByGroup", "GroupId"),
+        _SUMMARY_BY_STATE: ("ByState", "StateId"),
+        _SUMMARY_BY_TARGET: ("ByTarget", "TargetId"),
+    }
+    for row in await db.execute(stmt):
+        summary = summaries[row.ProjectId]
+        counts = dict(Total=row.Total, Open=row.Open, Closed=row.Total - row.Open, Overdue=row.Overdue)
+        if row.Set == _SUMMARY_TOTAL:
+            summary.Tasks = schemas.SummaryCounts(**counts)
+        else:
+            field, column = buckets[row.Set]
+            getattr(summary, field).append(schemas.SummaryBucket(Id=getattr(row, column), **counts))
+
+    return [summaries[pid] for pid in dict.fromkeys(project_ids) if pid in summaries]
+
+# Все выборки доски идут в одной транзакции с одним снимком данных
+BOARD_ISOLATION_LEVEL = "REPEATABLE READ"
+
+async def get_project_board(project_id: int, include_roles: bool) -> Optional[schemas.ProjectBoard]:
+    """Everything the project screen renders, read from one consistent snapshot.
+
+    Five statements regardless of project size: project with owner, members
+    with users, roles, groups and task cards. They run in a session of their
+    own: the isolation level can only be set when a transaction starts, and
+    the request session's transaction belongs to the request.
+    """
+    async with unit_of_work() as db:
+        await db.connection(execution_options={"isolation_level": BOARD_ISOLATION_LEVEL})
+        project = await db.scalar(
+            select(models.Project)
+            .where(models.Project.Id == project_id, models.Project.IsDeleted == False)
+            .options(joinedload(models.Project.owner))
+        )
+        if project is None:
+            return None
+
+        members = (await db.scalars(
+            select(models.ProjectMember)
+            .where(models.ProjectMember.ProjectId == project_id)
+            .options(joinedload(models.ProjectMember.member))
+            .order_by(models.ProjectMember.CreateDate, models.ProjectMember.Id)
+        )).all()
+        roles = []
+        if include_roles:
+            roles = (await db.scalars(
+                select(models.ProjectRoleEntity)
+                .where(models.ProjectRoleEntity.ProjectId == project_id)
+                .order_by(models.ProjectRoleEntity.CreateDate, models.ProjectRoleEntity.Id)
+            )).all()
+        groups = (await db.scalars(
+            select(models.TaskGroup)
+            .where(models.TaskGroup.ProjectId == project_id)
+            .order_by(models.TaskGroup.CreateDate, models.TaskGroup.Id)
+        )).all()
+        task = models.Task
+        tasks = await db.execute(
+            select(
+                task.Id, task.Title,
+                func.substr(task.Text, 1, schemas.TASK_CARD_TEXT_LENGTH).label("Text"),
+                task.AuthorId, task.TargetId, task.StateId, task.GroupId,
+                task.CreateDate, task.IsClosed, task.DeadLine, task.Tags,
+            )
+            .join(models.TaskGroup, models.TaskGroup.Id == task.GroupId)
+            .where(models.TaskGroup.ProjectId == project_id)
+            .order_by(task.CreateDate, task.Id)
+        )
+
+        return schemas.ProjectBoard(
+            project=schemas.Project.model_validate(project),
+            owner=project.owner,
+            members=members,
+            roles=roles,
+            groups=groups,
+            tasks=[schemas.BoardTaskCard.model_validate(row) for row in tasks],
+        )
+
+async def get_project_changes(db: AsyncSession, project_id: int, since: Optional[int] = None) -> Optional[schemas.ProjectChanges]:
+    """Groups, members, tasks and comments changed after version `since`, plus tombstones.
+
+    The version is read first and every query is capped by it, so rows that
+    commit while the response is being built are left for the next poll
+    instead of being skipped.  Without `since` the whole project is returned.
+    """
+    version = await get_project_version(db, project_id)
+    if version is None:
+        return None
+    if since is not None and since >= version:
+        # Обычный опрос без изменений: одна выборка по первичному ключу
+        return schemas.ProjectChanges(ProjectId=project_id, Cursor=version, Full=False)
+
+    def changed(model):
+        if since is None:
+            return model.RowVersion <= version
+        return and_(model.RowVersion > since, model.RowVersion <= version)
+
+    groups = (await db.scalars(
+        select(models.TaskGroup)
+        .where(models.TaskGroup.ProjectId == project_id, changed(models.TaskGroup))
+        .order_by(models.TaskGroup.Id)
+    )).all()
+    members = (await db.scalars(
+        select(models.ProjectMember)
+        .where(models.ProjectMember.ProjectId == project_id, changed(models.ProjectMember))
+        .options(joinedload(models.ProjectMember.member))
+        .order_by(models.ProjectMember.Id)
+    )).all()
+    tasks = (await db.scalars(
+        select(models.Task)
+        .join(models.TaskGroup, models.TaskGroup.Id == models.Task.GroupId)
+        .where(models.TaskGroup.ProjectId == project_id, changed(models.Task))
+        .order_by(models.Task.Id)
+    )).all()
+    comments = (await db.scalars(
+        select(models.Comment)
+        .join(models.Task, models.Task.Id == models.Comment.TaskId)
+        .join(models.TaskGroup, models.TaskGroup.Id == models.Task.GroupId)
+        .where(models.TaskGroup.ProjectId == project_id, changed(models.Comment))
+        .order_by(models.Comment.Id)
+    )).all()
+    deleted = []
+    if since is not None:
+        deleted = (await db.execute(
+            select(models.Tombstone.Kind, models.Tombstone.EntityId.label("Id"))
+            .where(models.Tombstone.ProjectId == project_id, changed(models.Tombstone))
+            .order_by(models.Tombstone.RowVersion, models.Tombstone.Id)
+        )).all()
+
+    return schemas.ProjectChanges(
+        ProjectId=project_id,
+        Cursor=version,
+        Full=since is None,
+        groups=groups,
+        members=members,
+        tasks=tasks,
+        comments=comments,
+        deleted=[schemas.DeletedEntity(Kind=row.Kind, Id=row.Id) for row in deleted],
+    )
@@ -1,65 +1,90 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import Optional, List
 from app import models, schemas
+from app.cache import invalidate_project_access
+from app.realtime import emit_project_event
+from app.updates import update_returning
+from app.versioning import ENTITY_MEMBER, add_tombstones, bump_project_version, row_version
+from app.pagination import DEFAULT_PAGE_SIZE, Page, paginate
 
 
-def get_project_member(db: Session, project_id: int, member_id: int) -> Optional[models.ProjectMember]:
-    return db.query(models.ProjectMember).filter(
+async def get_project_member(db: AsyncSession, project_id: int, member_id: int) -> Optional[models.ProjectMember]:
+    return await db.scalar(select(models.ProjectMember).where(
         models.ProjectMember.ProjectId == project_id,
         models.ProjectMember.MemnerId == member_id
-    ).first()
+    ))
 
 
-def get_project_members(db: Session, project_id: int) -> List[models.ProjectMember]:
-    return db.query(models.ProjectMember).filter(
+async def get_project_members(
+    db: AsyncSession,
+    project_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    skip: int = 0,
+) -> Page:
+    stmt = select(models.ProjectMember).where(
         models.ProjectMember.ProjectId == project_id
-    ).all()
+    ).options(joinedload(models.ProjectMember.member))
+    return await paginate(db, stmt, models.ProjectMember, cursor=cursor, limit=limit, skip=skip)
 
 
-def add_project_member(
-    db: Session,
+async def add_project_member(
+    db: AsyncSession,
     project_id: int,
     member_id: int,
     access_level: schemas.AccessLevel = "Common",
     role_id: Optional[int] = None,
 ) -> models.ProjectMember:
+    bumped = await bump_project_version(db, project_id)
     db_member = models.ProjectMember(
         ProjectId=project_id,
         MemnerId=member_id,
         AccessLevel=access_level,
         RoleId=role_id,
+        RowVersion=row_version(bumped),
     )
     db.add(db_member)
-    db.commit()
-    db.refresh(db_member)
+    await db.flush()
+    emit_project_event(db, bumped, ENTITY_MEMBER, "created", [db_member.Id])
+    invalidate_project_access(db, project_id, member_id)
     return db_member
 
 
-def update_project_member_access(
-    db: Session,
+async def update_project_member_access(
+    db: AsyncSession,
     project_id: int,
     member_id: int,
     access_level: Optional[schemas.AccessLevel] = None,
     role_id: Optional[int] = None,
 ) -> Optional[models.ProjectMember]:
-    db_member = get_project_member(db, project_id, member_id)
+    bumped = await bump_project_version(db, project_id)
+    values = {"RoleId": role_id, "RowVersion": row_version(bumped)}
+    if access_level is not None:
+        values["AccessLevel"] = access_level
+    db_member = await update_returning(
+        db, models.ProjectMember, values,
+        models.ProjectMember.ProjectId == project_id,
+        models.ProjectMember.MemnerId == member_id,
+    )
     if not db_member:
         return None
 
-    if access_level is not None:
-        db_member.AccessLevel = access_level
-    db_member.RoleId = role_id
-
-    db.commit()
-    db.refresh(db_member)
+    emit_project_event(db, bumped, ENTITY_MEMBER, "updated", [db_member.Id])
+    invalidate_project_access(db, project_id, member_id)
     return db_member
 
 
-def remove_project_member(db: Session, project_id: int, member_id: int) -> bool:
-    db_member = get_project_member(db, project_id, member_id)
+async def remove_project_member(db: AsyncSession, project_id: int, member_id: int) -> bool:
+    db_member = await get_project_member(db, project_id, member_id)
     if not db_member:
         return False
 
-    db.delete(db_member)
-    db.commit()
+    bumped = await bump_project_version(db, project_id)
+    await add_tombstones(db, bumped, ENTITY_MEMBER, select(models.ProjectMember.Id).where(models.ProjectMember.Id == db_member.Id))
+    emit_project_event(db, bumped, ENTITY_MEMBER, "deleted", [db_member.Id])
+    await db.delete(db_member)
+    await db.flush()
+    invalidate_project_access(db, project_id, member_id)
     return True
\ No newline at end of file
@@ -1,24 +1,56 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
+from app.cache import invalidate_project_roles, project_roles_cache
+from app.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.realtime import emit_project_event
+from app.versioning import ENTITY_MEMBER, bump_project_version, row_version
 
 
-def get_project_roles(db: Session, project_id: int) -> List[models.ProjectRoleEntity]:
-    return db.query(models.ProjectRoleEntity).filter(
+async def get_project_roles(
+    db: AsyncSession,
+    project_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    skip: int = 0,
+) -> Page:
+    stmt = select(models.ProjectRoleEntity).where(
         models.ProjectRoleEntity.ProjectId == project_id
-    ).all()
+    )
+    return await paginate(db, stmt, models.ProjectRoleEntity, cursor=cursor, limit=limit, skip=skip)
 
 
-def get_project_role(db: Session, role_id: int) -> Optional[models.ProjectRoleEntity]:
-    return db.query(models.ProjectRoleEntity).filter(
+async def get_project_role(db: AsyncSession, role_id: int) -> Optional[models.ProjectRoleEntity]:
+    return await db.scalar(select(models.ProjectRoleEntity).where(
         models.ProjectRoleEntity.Id == role_id
-    ).first()
+    ))
+
+
+async def get_cached_project_roles(db: AsyncSession, project_id: int) -> Dict[int, schemas.ProjectRole]:
+    """Roles of the project by Id, from cache.project_roles_cache"""
+    roles = project_roles_cache.get(project_id)
+    if roles is None:
+        rows = await db.scalars(
+            select(models.ProjectRoleEntity).where(models.ProjectRoleEntity.ProjectId == project_id)
+        )
+        roles = {row.Id: schemas.ProjectRole.model_validate(row) for row in rows}
+        project_roles_cache.set(project_id, roles)
+    return roles
+
+
+async def project_has_role(db: AsyncSession, project_id: int, role_id: int) -> bool:
+    if role_id in await get_cached_project_roles(db, project_id):
+        return True
+    # Роль могла появиться в другом воркере: промах перечитывает роли из базы
+    project_roles_cache.pop(project_id)
+    return role_id in await get_cached_project_roles(db, project_id)
 
 
-def create_project_role(
-    db: Session,
+async def create_project_role(
+    db: AsyncSession,
     project_id: int,
     role_data: schemas.ProjectRoleCreate,
 ) -> models.ProjectRoleEntity:
@@ -28,36 +60,50 @@ def create_project_role(
         Rate=role_data.Rate,
     )
     db.add(db_role)
-    db.commit()
-    db.refresh(db_role)
+    await bump_project_version(db, project_id)
+    await db.flush()
+    invalidate_project_roles(db, project_id)
     return db_role
 
 
-def update_project_role(
-    db: Session,
+async def update_project_role(
+    db: AsyncSession,
     role_id: int,
     role_data: schemas.ProjectRoleUpdate,
 ) -> Optional[models.ProjectRoleEntity]:
-    db_role = get_project_role(db, role_id)
+    db_role = await get_project_role(db, role_id)
     if not db_role:
         return None
 
     data = role_data.model_dump(exclude_unset=True)
     for field, value in data.items():
         setattr(db_role, field, value)
+    await bump_project_version(db, db_role.ProjectId)
 
-    db.commit()
-    db.refresh(db_role)
+    await db.flush()
+    invalidate_project_roles(db, db_role.ProjectId)
     return db_role
 
 
-def delete_project_role(db: Session, role_id: int) -> bool:
-    db_role = get_project_role(db, role_id)
+async def delete_project_role(db: AsyncSession, role_id: int) -> bool:
+    db_role = await get_project_role(db, role_id)
     if not db_role:
         return False
 
-    db.delete(db_role)
-    db.commit()
+    bumped = await bump_project_version(db, db_role.ProjectId)
+    # Участники теряют роль: отмечаем их изменёнными для /changes
+    member_ids = (await db.scalars(
+        update(models.ProjectMember)
+        .where(models.ProjectMember.RoleId == role_id)
+        .values(RoleId=None, RowVersion=row_version(bumped))
+        .returning(models.ProjectMember.Id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    if member_ids:
+        emit_project_event(db, bumped, ENTITY_MEMBER, "updated", member_ids)
+    await db.delete(db_role)
+    await db.flush()
+    invalidate_project_roles(db, db_role.ProjectId)
     return True
 
 
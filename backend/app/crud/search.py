@@ -0,0 +1,90 @@
+from sqlalchemy import func, literal, literal_column, null, select, true, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app import models, schemas
+from app.pagination import DEFAULT_PAGE_SIZE
+
+RUSSIAN = literal_column("'russian'::regconfig")
+ENGLISH = literal_column("'english'::regconfig")
+
+# Подсветка - HTML: текст экранируется до ts_headline, поэтому <b> в ответе ставит только он
+SNIPPET_OPTIONS = "StartSel=<b>, StopSel=</b>, MaxWords=30, MinWords=10, MaxFragments=2"
+TITLE_OPTIONS = "StartSel=<b>, StopSel=</b>, HighlightAll=true"
+
+
+def _html_escape(text):
+    # & первым, чтобы не экранировать уже подставленные сущности
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")):
+        text = func.replace(text, char, entity)
+    return text
+
+
+def _tsquery(q: str):
+    # Вектор содержит лексемы обеих конфигураций, поэтому запрос тоже строим по обеим
+    return func.websearch_to_tsquery(RUSSIAN, q).op("||")(func.websearch_to_tsquery(ENGLISH, q))
+
+
+async def search_project(
+    db: AsyncSession,
+    project_id: int,
+    q: str,
+    skip: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> List[schemas.SearchHit]:
+    """Ranked full-text hits over task titles/texts and comments of a project.
+
+    Matching and ranking use the GIN-indexed SearchVector columns; the costly
+    ts_headline is computed only for the rows of the requested page.
+    """
+    query = select(_tsquery(q).label("q")).cte("query")
+
+    task_hits = (
+        select(
+            literal("task").label("Kind"),
+            models.Task.Id.label("TaskId"),
+            null().label("CommentId"),
+            func.ts_rank(models.Task.SearchVector, query.c.q).label("Rank"),
+        )
+        .join(models.TaskGroup, models.TaskGroup.Id == models.Task.GroupId)
+        .where(
+            models.TaskGroup.ProjectId == project_id,
+            models.Task.SearchVector.op("@@")(query.c.q),
+        )
+    )
+    comment_hits = (
+        select(
+            literal("comment").label("Kind"),
+            models.Comment.TaskId.label("TaskId"),
+            models.Comment.Id.label("CommentId"),
+            func.ts_rank(models.Comment.SearchVector, query.c.q).label("Rank"),
+        )
+        .join(models.Task, models.Task.Id == models.Comment.TaskId)
+        .join(models.TaskGroup, models.TaskGroup.Id == models.Task.GroupId)
+        .where(
+            models.TaskGroup.ProjectId == project_id,
+            models.Comment.SearchVector.op("@@")(query.c.q),
+        )
+    )
+    hits = union_all(task_hits, comment_hits).subquery("hits")
+    order = (hits.c.Rank.desc(), hits.c.Kind.desc(), hits.c.TaskId, hits.c.CommentId)
+    page = select(hits).order_by(*order).offset(skip).limit(limit).subquery("page")
+
+    stmt = (
+        select(
+            page.c.Kind,
+            page.c.TaskId,
+            page.c.CommentId,
+            page.c.Rank,
+            models.Task.Title,
+            func.ts_headline(RUSSIAN, _html_escape(models.Task.Title), query.c.q, TITLE_OPTIONS).label("TitleHighlight"),
+            func.ts_headline(
+                RUSSIAN, _html_escape(func.coalesce(models.Comment.Text, models.Task.Text)), query.c.q, SNIPPET_OPTIONS
+            ).label("Snippet"),
+        )
+        .select_from(page)
+        .join(models.Task, models.Task.Id == page.c.TaskId)
+        .outerjoin(models.Comment, models.Comment.Id == page.c.CommentId)
+        .join(query, true())
+        .order_by(page.c.Rank.desc(), page.c.Kind.desc(), page.c.TaskId, page.c.CommentId)
+    )
+    return [schemas.SearchHit.model_validate(row, from_attributes=True) for row in await db.execute(stmt)]
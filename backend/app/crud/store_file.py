@@ -1,19 +1,47 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, exists, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from app import models, schemas
+from app.blobs import release_blob
+from app.pagination import DEFAULT_PAGE_SIZE, Page, paginate
 
-def get_store_file(db: Session, file_id: int) -> Optional[models.StoreFile]:
-    return db.query(models.StoreFile).filter(models.StoreFile.Id == file_id).first()
+async def get_store_file(db: AsyncSession, file_id: int) -> Optional[models.StoreFile]:
+    return await db.scalar(select(models.StoreFile).where(models.StoreFile.Id == file_id))
 
-def get_store_file_by_filename(db: Session, filename: str) -> Optional[models.StoreFile]:
-    return db.query(models.StoreFile).filter(models.StoreFile.TagName == filename).first()
+async def get_store_file_by_filename(db: AsyncSession, filename: str) -> Optional[models.StoreFile]:
+    return await db.scalar(select(models.StoreFile).where(models.StoreFile.TagName == filename))
 
-def get_store_files(db: Session, skip: int = 0, limit: int = 100) -> List[models.StoreFile]:
-    return db.query(models.StoreFile).offset(skip).limit(limit).all()
+async def get_store_files(db: AsyncSession, skip: int = 0, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page:
+    return await paginate(db, select(models.StoreFile), models.StoreFile, cursor=cursor, limit=limit, skip=skip)
 
-def create_store_file(db: Session, file: schemas.StoreFileCreate, author_id: int) -> models.StoreFile:
+async def create_store_file(db: AsyncSession, file: schemas.StoreFileCreate, author_id: int) -> models.StoreFile:
     db_file = models.StoreFile(**file.model_dump(), AuthorId=author_id)
     db.add(db_file)
-    db.commit()
-    db.refresh(db_file)
-    return db_file
\ No newline at end of file
+    await db.flush()
+    return db_file
+
+async def lock_store_file(db: AsyncSession, file_id: int) -> Optional[models.StoreFile]:
+    """The row locked until commit: attaching the file to a task or a project waits for it"""
+    return await db.scalar(select(models.StoreFile).where(models.StoreFile.Id == file_id).with_for_update())
+
+async def store_file_in_use(db: AsyncSession, file_id: int) -> bool:
+    """True while a task attachment or a project logo refers to the file"""
+    return await db.scalar(select(or_(
+        exists().where(models.TaskFile.FileId == file_id),
+        exists().where(models.Project.ProjectLogoId == file_id),
+    )))
+
+async def delete_store_file(db: AsyncSession, file_id: int) -> bool:
+    db_file = await get_store_file(db, file_id)
+    if not db_file:
+        return False
+
+    # Сам файл удалит сборщик мусора app.blobs, когда ссылок не останется
+    await release_blob(db, db_file.Sha256)
+    # Одним DELETE, без загрузки task_files/project_logos: ORM обнулила бы их FileId и ProjectLogoId
+    await db.execute(
+        delete(models.StoreFile)
+        .where(models.StoreFile.Id == file_id)
+        .execution_options(synchronize_session=False)
+    )
+    return True
@@ -1,16 +1,110 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import Optional, List
+from sqlalchemy import delete, func, insert, select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, joinedload, load_only, selectinload
+from typing import Dict, Iterable, Optional, List
 from app import models, schemas
+from app.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.crud.task_state import get_cached_task_states, get_default_task_state_id
+from app.realtime import emit_project_event
+from app.versioning import (
+    ENTITY_COMMENT,
+    ENTITY_TASK,
+    add_tombstones,
+    bump_group_project_version,
+    bump_project_version,
+    bump_task_project_version,
+    row_version,
+)
+from app.updates import update_returning
 
-def get_task(db: Session, task_id: int) -> Optional[models.Task]:
-    return db.query(models.Task).filter(models.Task.Id == task_id).first()
+def split_tags(raw: Optional[str]) -> List[str]:
+    """Split a comma-separated Tags string into unique, trimmed tags"""
+    tags = []
+    for tag in (raw or "").split(","):
+        tag = tag.strip()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100) -> List[models.Task]:
-    return db.query(models.Task).offset(skip).limit(limit).all()
+def _split_tag_params(values: Optional[Iterable[str]]) -> List[str]:
+    # ?tags_any=a&tags_any=b и ?tags_any=a,b работают одинаково
+    return split_tags(",".join(values or []))
 
-def get_user_tasks(db: Session, user_id: int, closed: Optional[bool] = None) -> List[models.Task]:
-    query = db.query(models.Task).filter(
+async def _sync_task_tags(db: AsyncSession, tags_by_task: Dict[int, Optional[str]], new: bool = False) -> None:
+    """Rewrite TaskTags rows of the given tasks from their Tags strings.
+
+    new=True for tasks inserted in this transaction: they have no rows to delete.
+    """
+    if not tags_by_task:
+        return
+    if not new:
+        await db.execute(delete(models.TaskTag).where(models.TaskTag.TaskId.in_(tags_by_task.keys())))
+    rows = [
+        {"TaskId": task_id, "Tag": tag}
+        for task_id, raw in tags_by_task.items()
+        for tag in split_tags(raw)
+    ]
+    if rows:
+        await db.execute(insert(models.TaskTag), rows)
+
+async def get_task(db: AsyncSession, task_id: int) -> Optional[models.Task]:
+    return await db.scalar(select(models.Task).where(models.Task.Id == task_id))
+
+def _with_details(stmt, group_joined: bool = False):
+    """Eager-load everything schemas.TaskWithDetails serializes.
+
+    Many-to-one relations are joined into the main SELECT, collections are
+    fetched with one extra IN-query each, so the number of statements does
+    not depend on the number of tasks.
+    """
+    group_option = contains_eager(models.Task.group) if group_joined else joinedload(models.Task.group)
+    return stmt.options(
+        joinedload(models.Task.author),
+        joinedload(models.Task.target),
+        joinedload(models.Task.state),
+        group_option,
+        selectinload(models.Task.comments),
+        selectinload(models.Task.task_files).joinedload(models.TaskFile.file),
+        selectinload(models.Task.pins),
+    )
+
+# Колонки schemas.TaskCard; Text и связи в режиме карточек не читаются
+_CARD_COLUMNS = (
+    models.Task.Id, models.Task.Title, models.Task.AuthorId, models.Task.TargetId,
+    models.Task.StateId, models.Task.GroupId, models.Task.CreateDate, models.Task.IsClosed,
+    models.Task.DeadLine, models.Task.Tags,
+)
+
+def _as_cards(stmt):
+    return stmt.options(load_only(*_CARD_COLUMNS))
+
+async def get_task_with_details(db: AsyncSession, task_id: int) -> Optional[models.Task]:
+    return await db.scalar(_with_details(select(models.Task)).where(models.Task.Id == task_id))
+
+async def get_tasks(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    view: schemas.TaskView = "full",
+) -> Page:
+    stmt = select(models.Task)
+    if view == "card":
+        stmt = _as_cards(stmt)
+    return await paginate(db, stmt, models.Task, cursor=cursor, limit=limit, skip=skip)
+
+async def get_user_tasks(
+    db: AsyncSession,
+    user_id: int,
+    closed: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    skip: int = 0,
+    view: schemas.TaskView = "full",
+) -> Page:
+    stmt = select(models.Task)
+    stmt = _as_cards(stmt) if view == "card" else _with_details(stmt)
+    stmt = stmt.where(
         or_(
             models.Task.AuthorId == user_id,
             models.Task.TargetId == user_id
@@ -18,26 +112,65 @@ def get_user_tasks(db: Session, user_id: int, closed: Optional[bool] = None) ->
     )
     
     if closed is not None:
-        query = query.filter(models.Task.IsClosed == closed)
+        stmt = stmt.where(models.Task.IsClosed == closed)
     
-    return query.all()
+    return await paginate(db, stmt, models.Task, cursor=cursor, limit=limit, skip=skip)
 
-def get_project_tasks(db: Session, project_id: int, closed: Optional[bool] = None) -> List[models.Task]:
+async def get_project_tasks(
+    db: AsyncSession,
+    project_id: int,
+    closed: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    skip: int = 0,
+    tags_any: Optional[List[str]] = None,
+    tags_all: Optional[List[str]] = None,
+    view: schemas.TaskView = "full",
+) -> Page:
     # Получаем все задачи через группы проекта
-    query = db.query(models.Task).join(models.TaskGroup).filter(
+    stmt = select(models.Task).join(models.TaskGroup)
+    stmt = _as_cards(stmt) if view == "card" else _with_details(stmt, group_joined=True)
+    stmt = stmt.where(
         models.TaskGroup.ProjectId == project_id
     )
     
     if closed is not None:
-        query = query.filter(models.Task.IsClosed == closed)
+        stmt = stmt.where(models.Task.IsClosed == closed)
+
+    any_tags = _split_tag_params(tags_any)
+    if any_tags:
+        stmt = stmt.where(models.Task.Id.in_(
+            select(models.TaskTag.TaskId).where(models.TaskTag.Tag.in_(any_tags))
+        ))
+    all_tags = _split_tag_params(tags_all)
+    if all_tags:
+        stmt = stmt.where(models.Task.Id.in_(
+            select(models.TaskTag.TaskId)
+            .where(models.TaskTag.Tag.in_(all_tags))
+            .group_by(models.TaskTag.TaskId)
+            .having(func.count() == len(all_tags))
+        ))
     
-    return query.all()
+    return await paginate(db, stmt, models.Task, cursor=cursor, limit=limit, skip=skip)
+
+async def get_project_tag_counts(db: AsyncSession, project_id: int, closed: Optional[bool] = None) -> List[schemas.TagCount]:
+    stmt = (
+        select(models.TaskTag.Tag, func.count().label("Count"))
+        .join(models.Task, models.Task.Id == models.TaskTag.TaskId)
+        .join(models.TaskGroup, models.TaskGroup.Id == models.Task.GroupId)
+        .where(models.TaskGroup.ProjectId == project_id)
+        .group_by(models.TaskTag.Tag)
+        .order_by(func.count().desc(), models.TaskTag.Tag)
+    )
+    if closed is not None:
+        stmt = stmt.where(models.Task.IsClosed == closed)
+    return [schemas.TagCount(Tag=row.Tag, Count=row.Count) for row in await db.execute(stmt)]
 
 import logging
 
 logger = logging.getLogger(__name__)
 
-def create_task(db: Session, task: schemas.TaskCreate, author_id: int) -> models.Task:
+async def create_task(db: AsyncSession, task: schemas.TaskCreate, author_id: int) -> models.Task:
     task_data = task.model_dump(exclude_unset=True)
     logger.debug("create_task incoming data: %s", task_data)
 
@@ -45,43 +178,225 @@ def create_task(db: Session, task: schemas.TaskCreate, author_id: int) -> models
     if task_data.get('StateId') == 0:
         task_data.pop('StateId')
 
-    # If no state specified, try to set a default (first existing TaskState) to avoid NULL/FK issues
+    # If no state specified, use the default one (first TaskState, from the in-memory reference cache)
     if task_data.get('StateId') is None:
-        first_state = db.query(models.TaskState).order_by(models.TaskState.Id).first()
-        if not first_state:
-            # No states exist yet - create a sensible default so we don't violate FK
-            logger.info("No TaskState found; creating default 'To Do' state")
-            first_state = models.TaskState(Name='To Do')
-            db.add(first_state)
-            db.commit()
-            db.refresh(first_state)
-        task_data['StateId'] = first_state.Id
+        task_data['StateId'] = await get_default_task_state_id(db)
 
     logger.debug("create_task final data: %s", task_data)
-    db_task = models.Task(**task_data, AuthorId=author_id)
+    bumped = await bump_group_project_version(db, task_data.get('GroupId'))
+    db_task = models.Task(**task_data, AuthorId=author_id, RowVersion=row_version(bumped))
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.flush()
+    await _sync_task_tags(db, {db_task.Id: task_data.get('Tags')}, new=True)
+    emit_project_event(db, bumped, ENTITY_TASK, "created", [db_task.Id])
     return db_task
 
-def update_task(db: Session, task_id: int, task_update: schemas.TaskUpdate) -> Optional[models.Task]:
-    db_task = get_task(db, task_id)
+async def update_task(db: AsyncSession, task_id: int, task_update: schemas.TaskUpdate) -> Optional[models.Task]:
+    update_data = task_update.model_dump(exclude_unset=True)
+    if update_data.get('Tags', "") is None:
+        update_data['Tags'] = ""
+    # Версию получает проект группы, в которой задача окажется после изменения
+    if update_data.get('GroupId') is not None:
+        bumped = await bump_group_project_version(db, update_data['GroupId'])
+    else:
+        bumped = await bump_task_project_version(db, task_id)
+
+    update_data['RowVersion'] = row_version(bumped)
+    db_task = await update_returning(db, models.Task, update_data, models.Task.Id == task_id)
     if not db_task:
         return None
+    if 'Tags' in update_data:
+        await _sync_task_tags(db, {task_id: update_data['Tags']})
+    emit_project_event(db, bumped, ENTITY_TASK, "updated", [task_id])
     
-    update_data = task_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_task, field, value)
-    
-    db.commit()
-    db.refresh(db_task)
     return db_task
 
-def delete_task(db: Session, task_id: int) -> bool:
-    db_task = get_task(db, task_id)
+async def delete_task(db: AsyncSession, task_id: int) -> bool:
+    db_task = await get_task(db, task_id)
     if not db_task:
         return False
     
-    db.delete(db_task)
-    db.commit()
-    return True
\ No newline at end of file
+    bumped = await bump_group_project_version(db, db_task.GroupId)
+    await add_tombstones(db, bumped, ENTITY_COMMENT, select(models.Comment.Id).where(models.Comment.TaskId == task_id))
+    await add_tombstones(db, bumped, ENTITY_TASK, select(models.Task.Id).where(models.Task.Id == task_id))
+    emit_project_event(db, bumped, ENTITY_TASK, "deleted", [task_id])
+    await db.delete(db_task)
+    await db.flush()
+    return True
+
+# Колонки Tasks без NULL и с ограничением длины, которые можно задать в update
+_NOT_NULL_COLUMNS = ('Title', 'Text', 'IsClosed')
+_MAX_LENGTHS = {column: models.Task.__table__.c[column].type.length for column in ('Title', 'Tags')}
+
+def _normalize_refs(values: dict) -> dict:
+    """0 in TargetId/StateId means "not set", as in create_task; otherwise it would violate the foreign key"""
+    for column in ('TargetId', 'StateId'):
+        if values.get(column) == 0:
+            values[column] = None
+    return values
+
+async def apply_task_batch(
+    db: AsyncSession,
+    project_id: int,
+    author_id: int,
+    operations: List[schemas.TaskBatchOperation],
+) -> List[schemas.TaskBatchResult]:
+    """Apply a batch of task operations inside one project in one transaction.
+
+    References (tasks, groups, targets, states) are checked with one query per
+    kind for the whole batch. Invalid operations are reported in their result
+    and skipped, the rest are written with one multi-row INSERT and one UPDATE
+    per distinct set of changes.
+    """
+    task_ids, group_ids, target_ids, state_ids = set(), set(), set(), set()
+    for op in operations:
+        if op.TaskId is not None:
+            task_ids.add(op.TaskId)
+        data = op.Create or op.Update
+        if data is not None:
+            for ids, value in ((group_ids, data.GroupId), (target_ids, data.TargetId), (state_ids, data.StateId)):
+                if value:
+                    ids.add(value)
+        if op.GroupId is not None:
+            group_ids.add(op.GroupId)
+
+    project_tasks = set()
+    if task_ids:
+        project_tasks = set((await db.scalars(
+            select(models.Task.Id).join(models.TaskGroup).where(
+                models.Task.Id.in_(task_ids),
+                models.TaskGroup.ProjectId == project_id,
+            )
+        )).all())
+    project_groups = set()
+    if group_ids:
+        project_groups = set((await db.scalars(
+            select(models.TaskGroup.Id).where(
+                models.TaskGroup.Id.in_(group_ids),
+                models.TaskGroup.ProjectId == project_id,
+            )
+        )).all())
+    existing_users = set()
+    if target_ids:
+        existing_users = set((await db.scalars(
+            select(models.User.Id).where(models.User.Id.in_(target_ids), models.User.IsDeleted == False)
+        )).all())
+    existing_states = state_ids & {state.Id for state in await get_cached_task_states(db)}
+    if state_ids - existing_states:
+        # Состояние могло появиться в другом воркере после загрузки справочника
+        existing_states |= set((await db.scalars(
+            select(models.TaskState.Id).where(models.TaskState.Id.in_(state_ids - existing_states))
+        )).all())
+
+    def check_refs(values: dict, create: bool = False) -> Optional[str]:
+        # Всё, что отвергла бы сама база, отсекается здесь: иначе ошибка одной
+        # операции сорвала бы общий INSERT/UPDATE всей пачки
+        if create and values.get('GroupId') is None:
+            return "GroupId is required"
+        if 'GroupId' in values and values['GroupId'] is None:
+            return "GroupId cannot be null, use move to change the group"
+        if values.get('GroupId') is not None and values['GroupId'] not in project_groups:
+            return "Task group not found in this project"
+        for column in _NOT_NULL_COLUMNS:
+            if column in values and values[column] is None:
+                return f"{column} cannot be null"
+        for column, length in _MAX_LENGTHS.items():
+            if values.get(column) is not None and len(values[column]) > length:
+                return f"{column} is longer than {length} characters"
+        if values.get('TargetId') and values['TargetId'] not in existing_users:
+            return "Target user not found"
+        if values.get('StateId') and values['StateId'] not in existing_states:
+            return "Task state not found"
+        return None
+
+    results: List[schemas.TaskBatchResult] = []
+    creates = []  # (result, row)
+    changes = {}  # task_id -> {column: value}, later operations win
+
+    for index, op in enumerate(operations):
+        result = schemas.TaskBatchResult(Index=index, Op=op.Op, TaskId=op.TaskId, Ok=False)
+        results.append(result)
+
+        if op.Op == "create":
+            if op.Create is None:
+                result.Error = "Create payload is required"
+                continue
+            # Полный набор колонок, чтобы все строки ушли одним multi-row INSERT
+            row = _normalize_refs(op.Create.model_dump())
+            if row.get('Tags') is None:
+                row['Tags'] = ""
+            result.Error = check_refs(row, create=True)
+            if result.Error is None:
+                creates.append((result, row))
+            continue
+
+        if op.TaskId is None:
+            result.Error = "TaskId is required"
+            continue
+        if op.TaskId not in project_tasks:
+            result.Error = "Task not found in this project"
+            continue
+
+        if op.Op == "update":
+            if op.Update is None:
+                result.Error = "Update payload is required"
+                continue
+            values = _normalize_refs(op.Update.model_dump(exclude_unset=True))
+        elif op.Op == "move":
+            if op.GroupId is None:
+                result.Error = "GroupId is required"
+                continue
+            values = {'GroupId': op.GroupId}
+        else:
+            values = {'IsClosed': op.Op == "close"}
+        if values.get('Tags', "") is None:
+            values['Tags'] = ""
+
+        result.Error = check_refs(values)
+        if result.Error is None:
+            changes.setdefault(op.TaskId, {}).update(values)
+            result.Ok = True
+
+    if any(row['StateId'] is None for _, row in creates):
+        default_state = await get_default_task_state_id(db)
+        for _, row in creates:
+            if row['StateId'] is None:
+                row['StateId'] = default_state
+
+    bumped = await bump_project_version(db, project_id) if creates or changes else None
+    version = row_version(bumped)
+
+    if creates:
+        rows = [{**row, 'AuthorId': author_id, 'RowVersion': version} for _, row in creates]
+        new_ids = (await db.scalars(
+            insert(models.Task).returning(models.Task.Id, sort_by_parameter_order=True),
+            rows,
+        )).all()
+        for (result, _), task_id in zip(creates, new_ids):
+            result.TaskId = task_id
+            result.Ok = True
+        await _sync_task_tags(db, {result.TaskId: row['Tags'] for result, row in creates}, new=True)
+
+    # Задачи с одинаковым набором изменений обновляются одним UPDATE ... WHERE Id IN (...)
+    by_values = {}
+    for task_id, values in changes.items():
+        if values:
+            by_values.setdefault(tuple(sorted(values.items())), []).append(task_id)
+    for values, ids in by_values.items():
+        await db.execute(
+            update(models.Task)
+            .where(models.Task.Id.in_(ids))
+            .values(**dict(values), RowVersion=version)
+            .execution_options(synchronize_session=False)
+        )
+    await _sync_task_tags(db, {
+        task_id: values['Tags'] for task_id, values in changes.items() if 'Tags' in values
+    })
+    if creates:
+        emit_project_event(db, bumped, ENTITY_TASK, "created", [result.TaskId for result, _ in creates])
+    if changes:
+        emit_project_event(db, bumped, ENTITY_TASK, "updated", changes.keys())
+
+    await db.flush()
+    return results
+
@@ -1,30 +1,34 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from app import models, schemas
+from app.versioning import bump_task_project_version
 
-def get_task_file(db: Session, task_id: int, file_id: int) -> Optional[models.TaskFile]:
-    return db.query(models.TaskFile).filter(
+async def get_task_file(db: AsyncSession, task_id: int, file_id: int) -> Optional[models.TaskFile]:
+    return await db.scalar(select(models.TaskFile).where(
         models.TaskFile.TaskId == task_id,
         models.TaskFile.FileId == file_id
-    ).first()
+    ))
 
-def get_task_files(db: Session, task_id: int) -> List[models.TaskFile]:
-    return db.query(models.TaskFile).filter(
+async def get_task_files(db: AsyncSession, task_id: int) -> List[models.TaskFile]:
+    result = await db.scalars(select(models.TaskFile).where(
         models.TaskFile.TaskId == task_id
-    ).all()
+    ))
+    return list(result.all())
 
-def add_task_file(db: Session, task_id: int, file_id: int) -> models.TaskFile:
+async def add_task_file(db: AsyncSession, task_id: int, file_id: int) -> models.TaskFile:
     db_task_file = models.TaskFile(TaskId=task_id, FileId=file_id)
     db.add(db_task_file)
-    db.commit()
-    db.refresh(db_task_file)
+    await bump_task_project_version(db, task_id)
+    await db.flush()
     return db_task_file
 
-def remove_task_file(db: Session, task_id: int, file_id: int) -> bool:
-    db_task_file = get_task_file(db, task_id, file_id)
+async def remove_task_file(db: AsyncSession, task_id: int, file_id: int) -> bool:
+    db_task_file = await get_task_file(db, task_id, file_id)
     if not db_task_file:
         return False
     
-    db.delete(db_task_file)
-    db.commit()
+    await bump_task_project_version(db, task_id)
+    await db.delete(db_task_file)
+    await db.flush()
     return True
\ No newline at end of file
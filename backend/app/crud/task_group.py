@@ -1,37 +1,68 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from app import models, schemas
+from app.cache import invalidate_group_project
+from app.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.realtime import emit_project_event
+from app.versioning import (
+    ENTITY_COMMENT,
+    ENTITY_GROUP,
+    ENTITY_TASK,
+    add_tombstones,
+    bump_group_project_version,
+    bump_project_version,
+    row_version,
+)
+from app.updates import update_returning
 
-def get_task_group(db: Session, group_id: int) -> Optional[models.TaskGroup]:
-    return db.query(models.TaskGroup).filter(models.TaskGroup.Id == group_id).first()
+async def get_task_group(db: AsyncSession, group_id: int) -> Optional[models.TaskGroup]:
+    return await db.scalar(select(models.TaskGroup).where(models.TaskGroup.Id == group_id))
 
-def get_project_task_groups(db: Session, project_id: int) -> List[models.TaskGroup]:
-    return db.query(models.TaskGroup).filter(
+async def get_project_task_groups(
+    db: AsyncSession,
+    project_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    skip: int = 0,
+) -> Page:
+    stmt = select(models.TaskGroup).where(
         models.TaskGroup.ProjectId == project_id
-    ).all()
+    )
+    return await paginate(db, stmt, models.TaskGroup, cursor=cursor, limit=limit, skip=skip)
 
-def create_task_group(db: Session, group: schemas.TaskGroupCreate) -> models.TaskGroup:
-    db_group = models.TaskGroup(**group.model_dump())
+async def create_task_group(db: AsyncSession, group: schemas.TaskGroupCreate) -> models.TaskGroup:
+    bumped = await bump_project_version(db, group.ProjectId)
+    db_group = models.TaskGroup(**group.model_dump(), RowVersion=row_version(bumped))
     db.add(db_group)
-    db.commit()
-    db.refresh(db_group)
+    await db.flush()
+    emit_project_event(db, bumped, ENTITY_GROUP, "created", [db_group.Id])
     return db_group
 
-def update_task_group(db: Session, group_id: int, name: str) -> Optional[models.TaskGroup]:
-    db_group = get_task_group(db, group_id)
+async def update_task_group(db: AsyncSession, group_id: int, name: str) -> Optional[models.TaskGroup]:
+    bumped = await bump_group_project_version(db, group_id)
+    db_group = await update_returning(
+        db, models.TaskGroup, {"Name": name, "RowVersion": row_version(bumped)},
+        models.TaskGroup.Id == group_id,
+    )
     if not db_group:
         return None
     
-    db_group.Name = name
-    db.commit()
-    db.refresh(db_group)
+    emit_project_event(db, bumped, ENTITY_GROUP, "updated", [group_id])
     return db_group
 
-def delete_task_group(db: Session, group_id: int) -> bool:
-    db_group = get_task_group(db, group_id)
+async def delete_task_group(db: AsyncSession, group_id: int) -> bool:
+    db_group = await get_task_group(db, group_id)
     if not db_group:
         return False
     
-    db.delete(db_group)
-    db.commit()
+    bumped = await bump_project_version(db, db_group.ProjectId)
+    # Задачи и комментарии удаляются каскадом вместе с группой
+    await add_tombstones(db, bumped, ENTITY_COMMENT, select(models.Comment.Id).join(models.Task).where(models.Task.GroupId == group_id))
+    await add_tombstones(db, bumped, ENTITY_TASK, select(models.Task.Id).where(models.Task.GroupId == group_id))
+    await add_tombstones(db, bumped, ENTITY_GROUP, select(models.TaskGroup.Id).where(models.TaskGroup.Id == group_id))
+    emit_project_event(db, bumped, ENTITY_GROUP, "deleted", [group_id])
+    await db.delete(db_group)
+    await db.flush()
+    invalidate_group_project(db, group_id)
     return True
\ No newline at end of file
@@ -1,16 +1,54 @@
-from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy import exists, insert, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Tuple
 from app import models, schemas
+from app.cache import TASK_STATES_KEY, invalidate_task_states, task_state_cache
 
-def get_task_state(db: Session, state_id: int) -> Optional[models.TaskState]:
-    return db.query(models.TaskState).filter(models.TaskState.Id == state_id).first()
+# Те же состояния создаёт миграция seed_task_states
+DEFAULT_TASK_STATES = ("To Do", "In Progress", "Done")
 
-def get_task_states(db: Session) -> List[models.TaskState]:
-    return db.query(models.TaskState).all()
+async def get_task_state(db: AsyncSession, state_id: int) -> Optional[models.TaskState]:
+    return await db.scalar(select(models.TaskState).where(models.TaskState.Id == state_id))
 
-def create_task_state(db: Session, state: schemas.TaskStateCreate) -> models.TaskState:
+async def get_task_states(db: AsyncSession) -> List[models.TaskState]:
+    result = await db.scalars(select(models.TaskState))
+    return list(result.all())
+
+async def create_task_state(db: AsyncSession, state: schemas.TaskStateCreate) -> models.TaskState:
     db_state = models.TaskState(**state.model_dump())
     db.add(db_state)
-    db.commit()
-    db.refresh(db_state)
-    return db_state
\ No newline at end of file
+    await db.flush()
+    invalidate_task_states(db)
+    return db_state
+
+async def get_cached_task_states(db: AsyncSession) -> Tuple[schemas.TaskState, ...]:
+    """All task states ordered by Id, from cache.task_state_cache"""
+    states = task_state_cache.get(TASK_STATES_KEY)
+    if states is None:
+        rows = await db.scalars(select(models.TaskState).order_by(models.TaskState.Id))
+        states = tuple(schemas.TaskState.model_validate(row) for row in rows)
+        task_state_cache.set(TASK_STATES_KEY, states)
+    return states
+
+async def get_default_task_state_id(db: AsyncSession) -> Optional[int]:
+    """State of new tasks that come without StateId: the first one by Id"""
+    states = await get_cached_task_states(db)
+    return states[0].Id if states else None
+
+async def load_task_states(db: AsyncSession) -> Tuple[schemas.TaskState, ...]:
+    """Fill the cache at startup, seeding DEFAULT_TASK_STATES into an empty table.
+
+    Tables may come from Base.metadata.create_all instead of the migrations,
+    so the seed is repeated here; it does nothing once any state exists.
+    """
+    # Одним INSERT ... SELECT WHERE NOT EXISTS: воркеры стартуют одновременно
+    defaults = union_all(*(select(literal(name).label("Name")) for name in DEFAULT_TASK_STATES)).subquery()
+    await db.execute(
+        insert(models.TaskState).from_select(
+            ["Name"],
+            select(defaults.c.Name).where(~exists(select(models.TaskState.Id))),
+        )
+    )
+    # Кэш не сбрасывается после commit, как при обычной записи: иначе он остался бы пустым
+    task_state_cache.pop(TASK_STATES_KEY)
+    return await get_cached_task_states(db)
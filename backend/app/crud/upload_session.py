@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app import models, schemas
+from app.updates import update_returning
+from app.upload_sessions import UPLOAD_SESSION_CHUNK_SIZE, new_session_id, session_expiry
+
+def _active(session_id: str, author_id: int) -> tuple:
+    return (
+        models.UploadSession.Id == session_id,
+        models.UploadSession.AuthorId == author_id,
+        models.UploadSession.ExpiresAt > datetime.now(timezone.utc),
+    )
+
+async def create_upload_session(db: AsyncSession, upload: schemas.UploadSessionCreate, author_id: int) -> models.UploadSession:
+    db_session = models.UploadSession(
+        **upload.model_dump(),
+        Id=new_session_id(),
+        AuthorId=author_id,
+        ChunkSize=UPLOAD_SESSION_CHUNK_SIZE,
+        ExpiresAt=session_expiry(),
+    )
+    db.add(db_session)
+    await db.flush()
+    return db_session
+
+async def get_upload_session(db: AsyncSession, session_id: str, author_id: int) -> Optional[models.UploadSession]:
+    """The author's session, unless it has expired"""
+    return await db.scalar(select(models.UploadSession).where(*_active(session_id, author_id)))
+
+async def extend_upload_session(db: AsyncSession, session_id: str, author_id: int) -> Optional[models.UploadSession]:
+    return await update_returning(db, models.UploadSession, {"ExpiresAt": session_expiry()}, *_active(session_id, author_id))
+
+async def take_upload_session(db: AsyncSession, session_id: str, author_id: int) -> Optional[models.UploadSession]:
+    """Delete the session and return it; a concurrent take waits for this transaction and gets None"""
+    return await db.scalar(
+        delete(models.UploadSession)
+        .where(*_active(session_id, author_id))
+        .returning(models.UploadSession)
+        .execution_options(synchronize_session=False)
+    )
@@ -1,32 +1,38 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 import hashlib
 from app import models, schemas
+from app.cache import invalidate_user
+from app.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.realtime import emit_project_event
+from app.versioning import ENTITY_MEMBER, bump_user_project_versions
 
-def get_user(db: Session, user_id: int) -> Optional[models.User]:
-    return db.query(models.User).filter(
+async def get_user(db: AsyncSession, user_id: int) -> Optional[models.User]:
+    return await db.scalar(select(models.User).where(
         models.User.Id == user_id,
         models.User.IsDeleted == False
-    ).first()
+    ))
 
-def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
-    return db.query(models.User).filter(
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
+    return await db.scalar(select(models.User).where(
         models.User.Email == email,
         models.User.IsDeleted == False
-    ).first()
+    ))
 
-def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
-    return db.query(models.User).filter(
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[models.User]:
+    return await db.scalar(select(models.User).where(
         models.User.Username == username,
         models.User.IsDeleted == False
-    ).first()
+    ))
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[models.User]:
-    return db.query(models.User).filter(
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page:
+    stmt = select(models.User).where(
         models.User.IsDeleted == False
-    ).offset(skip).limit(limit).all()
+    )
+    return await paginate(db, stmt, models.User, cursor=cursor, limit=limit, skip=skip)
 
-def create_user(db: Session, user: schemas.UserCreate) -> models.User:
+async def create_user(db: AsyncSession, user: schemas.UserCreate) -> models.User:
     hashed_password = hashlib.sha256(user.Password.encode('utf-8')).hexdigest()
     db_user = models.User(
         Username=user.Username,
@@ -34,15 +40,15 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
         PasswordHash=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.flush()
     return db_user
 
-def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> Optional[models.User]:
-    db_user = get_user(db, user_id)
+async def update_user(db: AsyncSession, user_id: int, user_update: schemas.UserUpdate) -> Optional[models.User]:
+    db_user = await get_user(db, user_id)
     if not db_user:
         return None
     
+    old_username = db_user.Username
     update_data = user_update.model_dump(exclude_unset=True)
     
     if 'Password' in update_data:
@@ -51,30 +57,41 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> O
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
-    db.commit()
-    db.refresh(db_user)
+    await db.flush()
+    invalidate_user(db, old_username, db_user.Username)
+    if 'Username' in update_data or 'Email' in update_data:
+        # Имя и почта встроены в ответы проектов: без новой версии клиенты получали бы 304
+        member_ids = dict((await db.execute(
+            select(models.ProjectMember.ProjectId, models.ProjectMember.Id).where(models.ProjectMember.MemnerId == user_id)
+        )).all())
+        for bumped in await bump_user_project_versions(db, user_id):
+            if bumped.project_id in member_ids:
+                emit_project_event(db, bumped, ENTITY_MEMBER, "updated", [member_ids[bumped.project_id]])
     return db_user
 
-def delete_user(db: Session, user_id: int) -> bool:
-    db_user = get_user(db, user_id)
+async def delete_user(db: AsyncSession, user_id: int) -> bool:
+    db_user = await get_user(db, user_id)
     if not db_user:
         return False
     
     db_user.IsDeleted = True
-    db.commit()
+    await db.flush()
+    invalidate_user(db, db_user.Username)
     return True
 
-def delete_user_permanent(db: Session, user_id: int) -> bool:
-    db_user = get_user(db, user_id)
+async def delete_user_permanent(db: AsyncSession, user_id: int) -> bool:
+    db_user = await get_user(db, user_id)
     if not db_user:
         return False
 
-    db.delete(db_user)
-    db.commit()
+    username = db_user.Username
+    await db.delete(db_user)
+    await db.flush()
+    invalidate_user(db, username)
     return True
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[models.User]:
-    user = get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[models.User]:
+    user = await get_user_by_email(db, email)
     if not user:
         return None
     hashed_password = hashlib.sha256(password.encode('utf-8')).hexdigest()
@@ -1,22 +1,55 @@
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.requests import Request
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = f"postgresql+psycopg://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-engine = create_engine(DATABASE_URL)
+# psycopg 3 работает в асинхронном режиме, запросы больше не блокируют event loop
+engine = create_async_engine(
+    DATABASE_URL,
+    pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    pool_pre_ping=True,
+)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: объекты остаются читаемыми после commit без повторных запросов
+SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-# Dependency для получения сессии БД
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+# Ключ в request.state, по которому UnitOfWorkMiddleware находит сессию запроса
+REQUEST_SESSION_KEY = "db_session"
+
+# Dependency для получения сессии БД.
+# Функции crud только делают flush; commit выполняет UnitOfWorkMiddleware (app.unit_of_work)
+# перед отправкой ответа, одна транзакция на запрос.
+async def get_db(request: Request):
+    async with SessionLocal() as db:
+        setattr(request.state, REQUEST_SESSION_KEY, db)
+        try:
+            yield db
+        except BaseException:
+            # Явный rollback, чтобы сработали after_rollback (события, сброс кэшей)
+            await db.rollback()
+            raise
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[AsyncSession]:
+    """Own session and transaction for work outside a request (jobs, scripts, WebSocket).
+
+    Commits when the block exits normally and rolls back on an exception.
+    """
+    async with SessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
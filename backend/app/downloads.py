@@ -0,0 +1,212 @@
+"""File downloads with conditional requests and byte ranges.
+
+starlette 0.27's FileResponse always sends the whole file. file_response adds
+what download managers and resuming clients rely on:
+- ETag and Last-Modified: the SHA-256 of the content when it is known and
+  StoreFile.CreateDate, since a stored file never changes. If-None-Match and
+  If-Modified-Since get 304.
+- Accept-Ranges: bytes. A single Range gets 206 with Content-Range; several
+  ranges get 206 multipart/byteranges; ranges outside the file get 416.
+  If-Range sends the ranges only while the client's copy is still current,
+  and the whole file otherwise.
+- Content-Type guessed from the original file name; HEAD returns only the
+  headers, so the size can be learned before fetching ranges in parallel.
+
+The file is streamed in DOWNLOAD_CHUNK_SIZE pieces read in the thread pool.
+"""
+import email.utils
+import mimetypes
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import HTTPException, Request, status
+from starlette.responses import Response, StreamingResponse
+
+from app import models
+from app.etag import etag_matches
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+# Больше диапазонов в одном запросе не обслуживаем: отдаём файл целиком (RFC 9110 это разрешает)
+MAX_RANGES = 16
+
+Range = Tuple[int, int]  # включительно, как в Content-Range
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[List[Range]]:
+    """Byte ranges of a Range header, sorted and merged.
+
+    None means the header is absent or unusable and the whole file is sent;
+    an empty list means no range overlaps the file (416).
+    """
+    if not header:
+        return None
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        first, dash, last = spec.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if last and start > end:
+                    return None
+            else:
+                # "-N": последние N байт
+                suffix = int(last)
+                if suffix == 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    # Пересекающиеся и смежные диапазоны сливаются, чтобы один байт не отдавался дважды
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return email.utils.format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _if_range_allows(request: Request, etag: str, last_modified: str) -> bool:
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # If-Range требует сильного сравнения: слабый тег никогда не совпадает
+        return if_range == etag
+    return if_range == last_modified
+
+
+def _not_modified(request: Request, etag: str, modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    since = _parse_http_date(request.headers.get("if-modified-since"))
+    # Last-Modified передаётся с точностью до секунды
+    return since is not None and modified.replace(microsecond=0) <= since
+
+
+async def _read_ranges(path: str, ranges: List[Range], parts: Optional[List[bytes]] = None) -> AsyncIterator[bytes]:
+    """File bytes of the ranges; with parts, each range is preceded by its multipart header"""
+    async with await anyio.open_file(path, "rb") as f:
+        for index, (start, end) in enumerate(ranges):
+            if parts is not None:
+                yield parts[index]
+            await f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        if parts is not None:
+            yield parts[-1]
+
+
+async def file_response(request: Request, path: str, store_file: models.StoreFile) -> Response:
+    """Response for GET/HEAD of a stored file, honouring conditional and Range headers"""
+    try:
+        stat = await anyio.to_thread.run_sync(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found on server")
+    size = stat.st_size
+
+    modified = store_file.CreateDate
+    if modified.tzinfo is None:
+        modified = modified.replace(tzinfo=timezone.utc)
+    # Содержимое файла не меняется: хеш — естественный сильный ETag; у старых файлов его нет
+    etag = f'"{store_file.Sha256}"' if store_file.Sha256 else f'"{size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = _http_date(modified)
+    media_type = mimetypes.guess_type(store_file.SourceName)[0] or "application/octet-stream"
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": _content_disposition(store_file.SourceName),
+        # Тип угадан по имени файла: браузер не должен переопределять его по содержимому
+        "X-Content-Type-Options": "nosniff",
+    }
+
+    if _not_modified(request, etag, modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    ranges = None
+    if _if_range_allows(request, etag, last_modified):
+        ranges = parse_range(request.headers.get("range"), size)
+    if ranges == []:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{size}"},
+        )
+
+    parts = None
+    if ranges is None:
+        ranges = [(0, size - 1)] if size else []
+        status_code = status.HTTP_200_OK
+        length = size
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        length = end - start + 1
+    else:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        boundary = uuid.uuid4().hex
+        parts = [
+            f"\r\n--{boundary}\r\nContent-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n".encode("latin-1")
+            for start, end in ranges
+        ]
+        parts.append(f"\r\n--{boundary}--\r\n".encode("latin-1"))
+        length = sum(map(len, parts)) + sum(end - start + 1 for start, end in ranges)
+        media_type = f"multipart/byteranges; boundary={boundary}"
+
+    headers["Content-Length"] = str(length)
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        _read_ranges(path, ranges, parts),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+    )
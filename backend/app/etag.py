@@ -0,0 +1,49 @@
+import hashlib
+from datetime import date
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.versioning import get_project_version
+
+
+def project_etag(project_id: int, version: int, request: Request, user_id: int) -> str:
+    # Ответ зависит от URL с параметрами, от пользователя (права, роли) и,
+    # для просроченных задач, от текущей даты
+    variant = f"{request.url.path}?{request.url.query}|{user_id}|{date.today().isoformat()}"
+    digest = hashlib.blake2s(variant.encode("utf-8"), digest_size=8).hexdigest()
+    return f'W/"{project_id}.{version}.{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Слабое сравнение: префикс W/ не учитывается
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+async def check_project_etag(
+    db: AsyncSession,
+    request: Request,
+    response: Response,
+    project_id: int,
+    user_id: int,
+) -> None:
+    """Set the ETag of a project-scoped GET or answer 304 if the client copy is current.
+
+    Costs one primary-key lookup of Projects.Version; must be called after the
+    access check so that 304 does not leak anything.
+    """
+    version = await get_project_version(db, project_id)
+    if version is None:
+        return
+
+    etag = project_etag(project_id, version, request, user_id)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
@@ -1,6 +1,14 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer
-from app.database import engine, Base
+from app.database import engine, Base, unit_of_work
+from app.cache import cache_stats
+from app.compression import CompressionMiddleware
+from app.crud.task_state import load_task_states
+from app.realtime import get_event_hub
+from app.unit_of_work import UnitOfWorkMiddleware
 from app.api.endpoints import (
     auth,
     users,
@@ -10,19 +18,39 @@ from app.api.endpoints import (
     store_files,
     project_roles,
     marks,
+    events,
 )
 
-# Создаем таблицы в БД
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Создаем таблицы в БД
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # Справочник состояний задач держим в памяти воркера
+    async with unit_of_work() as db:
+        await load_task_states(db)
+    hub = get_event_hub()
+    await hub.start()
+    yield
+    await hub.stop()
+    await engine.dispose()
 
 app = FastAPI(
     title="Workbench Flow API",
     description="API для управления проектами и задачами",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson кодирует ответы заметно быстрее стандартного json
+    default_response_class=ORJSONResponse,
 )
 
 security = HTTPBearer()
 
+# Один commit на запрос, перед отправкой ответа
+app.add_middleware(UnitOfWorkMiddleware)
+# gzip/brotli для JSON и текста; файлы из /api/files/download отдаются как есть
+app.add_middleware(CompressionMiddleware)
+
 # Подключаем роутеры
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
@@ -32,6 +60,8 @@ app.include_router(task_groups.router, prefix="/api/task_groups", tags=["task_gr
 app.include_router(store_files.router, prefix="/api/files", tags=["store_files"])
 app.include_router(project_roles.router, prefix="/api", tags=["project_roles"])
 app.include_router(marks.router, prefix="/api", tags=["marks"])
+# /ws/projects/{id} и /api/projects/{id}/events — пути заданы в самом роутере
+app.include_router(events.router, tags=["events"])
 
 @app.get("/")
 def read_root():
@@ -39,4 +69,9 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/cache")
+def cache_health():
+    # Счётчики попаданий/промахов in-process кэшей этого воркера
+    return cache_stats()
@@ -1,11 +1,25 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date, ForeignKey, CheckConstraint, UniqueConstraint
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import ENUM as PGEnum
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime, Date, ForeignKey, CheckConstraint, UniqueConstraint, Computed, Index
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.sql import func, text
+from sqlalchemy.dialects.postgresql import ENUM as PGEnum, TSVECTOR
 from app.database import Base
 import enum
 
 
+# Полнотекстовый поиск: русская и английская конфигурации, заголовок весомее текста.
+# Выражения должны совпадать с миграцией add_search_vectors.
+TASK_SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(\"Title\", '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(\"Title\", '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(\"Text\", '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(\"Text\", '')), 'B')"
+)
+COMMENT_SEARCH_VECTOR = (
+    "to_tsvector('russian', coalesce(\"Text\", '')) || "
+    "to_tsvector('english', coalesce(\"Text\", ''))"
+)
+
+
 class AccessLevel(str, enum.Enum):
     COMMON = "Common"
     ADMIN = "Admin"
@@ -15,7 +29,7 @@ class User(Base):
 
     Id = Column('Id', Integer, primary_key=True, index=True)
     Username = Column('Username', String(50), nullable=False, index=True)
-    Email = Column('Email', String(75), nullable=False, index=True)
+    Email = Column('Email', String(75), nullable=False)
     PasswordHash = Column('PasswordHash', String(125), nullable=False)
     CreateDate = Column('CreateDate', DateTime(timezone=True), server_default=func.now(), nullable=False)
     IsDeleted = Column('IsDeleted', Boolean, default=False, nullable=False)
@@ -32,6 +46,10 @@ class User(Base):
     otp = relationship("Otp", back_populates="user")
     marks = relationship("Mark", back_populates="author")
 
+    __table_args__ = (
+        Index('ix_Users_Email_IsDeleted', 'Email', 'IsDeleted'),
+    )
+
 class Otp(Base):
     __tablename__ = 'Otps'
 
@@ -49,6 +67,9 @@ class StoreFile(Base):
     Id = Column('Id', Integer, primary_key=True, index=True)
     SourceName = Column('SourceName', String(150), nullable=False)
     TagName = Column('TagName', String(150), nullable=False)
+    # Считаются при загрузке; у старых файлов NULL
+    Size = Column('Size', BigInteger, nullable=True)
+    Sha256 = Column('Sha256', String(64), nullable=True)
     AuthorId = Column('AuthorId', Integer, ForeignKey('Users.Id', ondelete='SET NULL'))
     CreateDate = Column('CreateDate', DateTime(timezone=True), server_default=func.now(), nullable=False)
     
@@ -57,6 +78,38 @@ class StoreFile(Base):
     project_logos = relationship("Project", back_populates="logo")
     task_files = relationship("TaskFile", back_populates="file")
 
+    __table_args__ = (
+        Index('ix_StoreFiles_TagName', 'TagName'),
+    )
+
+# Содержимое файлов по SHA-256 (app.blobs); StoreFiles с тем же Sha256 делят один файл на диске
+class Blob(Base):
+    __tablename__ = 'Blobs'
+
+    Sha256 = Column('Sha256', String(64), primary_key=True)
+    Size = Column('Size', BigInteger, nullable=False)
+    # Число StoreFiles, ссылающихся на содержимое; при 0 файл забирает сборщик мусора
+    RefCount = Column('RefCount', Integer, nullable=False, server_default='0')
+    CreateDate = Column('CreateDate', DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_Blobs_unreferenced', 'Sha256', postgresql_where=text('"RefCount" <= 0')),
+    )
+
+# Возобновляемая загрузка по частям (app.upload_sessions); части лежат в Uploads/staging/<Id>/
+class UploadSession(Base):
+    __tablename__ = 'UploadSessions'
+
+    Id = Column('Id', String(32), primary_key=True)
+    AuthorId = Column('AuthorId', Integer, ForeignKey('Users.Id', ondelete='CASCADE'), nullable=False, index=True)
+    SourceName = Column('SourceName', String(150), nullable=False)
+    Size = Column('Size', BigInteger, nullable=False)
+    ChunkSize = Column('ChunkSize', Integer, nullable=False)
+    Sha256 = Column('Sha256', String(64), nullable=True)
+    CreateDate = Column('CreateDate', DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Продлевается каждой принятой частью; просроченные удаляет python -m app.upload_sessions
+    ExpiresAt = Column('ExpiresAt', DateTime(timezone=True), nullable=False, index=True)
+
 class Project(Base):
     __tablename__ = 'Projects'
     
@@ -67,12 +120,19 @@ class Project(Base):
     IsDeleted = Column('IsDeleted', Boolean, default=False, nullable=False)
     OwnerId = Column('OwnerId', Integer, ForeignKey('Users.Id', ondelete='SET NULL'))
     ProjectLogoId = Column('ProjectLogoId', Integer, ForeignKey('StoreFiles.Id', ondelete='SET NULL'))
+    # Увеличивается каждой записью в данные проекта (см. app.versioning)
+    Version = Column('Version', BigInteger, nullable=False, server_default="0")
     
     # Relationships
     owner = relationship("User", back_populates="projects_owned", foreign_keys=[OwnerId])
     logo = relationship("StoreFile", back_populates="project_logos")
-    task_groups = relationship("TaskGroup", back_populates="project", cascade="all, delete-orphan")
-    members = relationship("ProjectMember", back_populates="project", cascade="all, delete-orphan")
+    task_groups = relationship("TaskGroup", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    members = relationship("ProjectMember", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        # Списки проектов фильтруют IsDeleted = false и листают по (CreateDate, Id)
+        Index('ix_Projects_CreateDate_active', 'CreateDate', 'Id', postgresql_where=text('"IsDeleted" = false')),
+    )
 
 
 class ProjectRoleEntity(Base):
@@ -97,6 +157,8 @@ class ProjectMember(Base):
     AccessLevel = Column('AccessLevel', String(10), default=AccessLevel.COMMON.value, nullable=False)
     RoleId = Column('RoleId', Integer, ForeignKey('ProjectRoles.Id', ondelete='SET NULL'), nullable=True)
     CreateDate = Column('CreateDate', DateTime(timezone=True), server_default=func.now(), nullable=False)
+    UpdatedAt = Column('UpdatedAt', DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    RowVersion = Column('RowVersion', BigInteger, nullable=False, server_default="0")
     
     # Relationships
     project = relationship("Project", back_populates="members")
@@ -107,6 +169,7 @@ class ProjectMember(Base):
     __table_args__ = (
         UniqueConstraint('ProjectId', 'MemnerId', name='UniqueProjectMembers'),
         CheckConstraint('"AccessLevel" IN (\'Common\', \'Admin\')', name='ValidAccessLevels'),
+        Index('ix_ProjectMembers_ProjectId_RowVersion', 'ProjectId', 'RowVersion'),
     )
 
 class TaskGroup(Base):
@@ -116,10 +179,16 @@ class TaskGroup(Base):
     Name = Column('Name', String(50), nullable=False)
     CreateDate = Column('CreateDate', DateTime(timezone=True), server_default=func.now(), nullable=False)
     ProjectId = Column('ProjectId', Integer, ForeignKey('Projects.Id', ondelete='CASCADE'), index=True)
+    UpdatedAt = Column('UpdatedAt', DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    RowVersion = Column('RowVersion', BigInteger, nullable=False, server_default="0")
+
+    __table_args__ = (
+        Index('ix_TaskGroups_ProjectId_RowVersion', 'ProjectId', 'RowVersion'),
+    )
     
     # Relationships
     project = relationship("Project", back_populates="task_groups")
-    tasks = relationship("Task", back_populates="group", cascade="all, delete-orphan")
+    tasks = relationship("Task", back_populates="group", cascade="all, delete-orphan", passive_deletes=True)
 
 class TaskState(Base):
     __tablename__ = 'TaskStates'
@@ -136,31 +205,57 @@ class Task(Base):
     Id = Column('Id', Integer, primary_key=True, index=True)
     Title = Column('Title', String(75), nullable=False)
     Text = Column('Text', Text, nullable=False)
-    AuthorId = Column('AuthorId', Integer, ForeignKey('Users.Id', ondelete='SET NULL'), index=True)
-    TargetId = Column('TargetId', Integer, ForeignKey('Users.Id', ondelete='SET NULL'), index=True)
+    AuthorId = Column('AuthorId', Integer, ForeignKey('Users.Id', ondelete='SET NULL'))
+    TargetId = Column('TargetId', Integer, ForeignKey('Users.Id', ondelete='SET NULL'))
     StateId = Column('StateId', Integer, ForeignKey('TaskStates.Id', ondelete='SET NULL'), nullable=True, default=None)
-    GroupId = Column('GroupId', Integer, ForeignKey('TaskGroups.Id', ondelete='CASCADE'), index=True)
+    GroupId = Column('GroupId', Integer, ForeignKey('TaskGroups.Id', ondelete='CASCADE'))
     CreateDate = Column('CreateDate', DateTime(timezone=True), server_default=func.now(), nullable=False)
-    IsClosed = Column('IsClosed', Boolean, default=False, nullable=False, index=True)
+    IsClosed = Column('IsClosed', Boolean, default=False, nullable=False)
     DeadLine = Column('DeadLine', Date)
     Tags = Column('Tags', String(512), nullable=False, server_default="")
+    UpdatedAt = Column('UpdatedAt', DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Версия проекта (Projects.Version), в которой строка менялась последний раз
+    RowVersion = Column('RowVersion', BigInteger, nullable=False, server_default="0")
+    # Генерируется базой; deferred, чтобы не тянуть вектор в обычные выборки
+    SearchVector = deferred(Column('SearchVector', TSVECTOR, Computed(TASK_SEARCH_VECTOR, persisted=True)))
+
+    __table_args__ = (
+        Index('ix_Tasks_SearchVector', 'SearchVector', postgresql_using='gin'),
+        Index('ix_Tasks_GroupId_RowVersion', 'GroupId', 'RowVersion'),
+        # Хвост (CreateDate, Id) - порядок keyset-пагинации
+        Index('ix_Tasks_GroupId_IsClosed_CreateDate', 'GroupId', 'IsClosed', 'CreateDate', 'Id'),
+        Index('ix_Tasks_AuthorId_CreateDate', 'AuthorId', 'CreateDate', 'Id'),
+        Index('ix_Tasks_TargetId_CreateDate', 'TargetId', 'CreateDate', 'Id'),
+    )
     
     # Relationships
     author = relationship("User", back_populates="tasks_authored", foreign_keys=[AuthorId])
     target = relationship("User", back_populates="tasks_targeted", foreign_keys=[TargetId])
     state = relationship("TaskState", back_populates="tasks")
     group = relationship("TaskGroup", back_populates="tasks")
-    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan")
-    task_files = relationship("TaskFile", back_populates="task", cascade="all, delete-orphan")
-    pins = relationship("Pin", back_populates="task", cascade="all, delete-orphan")
-    marks = relationship("Mark", back_populates="task", cascade="all, delete-orphan")
+    # passive_deletes: при удалении задачи связанные строки не загружаются, их удаляет ON DELETE CASCADE
+    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    task_files = relationship("TaskFile", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    pins = relationship("Pin", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    marks = relationship("Mark", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    # Нормализованная копия Tags для фильтрации; строки удаляет ON DELETE CASCADE
+    tag_rows = relationship("TaskTag", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+
+class TaskTag(Base):
+    __tablename__ = 'TaskTags'
+
+    TaskId = Column('TaskId', Integer, ForeignKey('Tasks.Id', ondelete='CASCADE'), primary_key=True)
+    Tag = Column('Tag', String(512), primary_key=True, index=True)
+
+    # Relationships
+    task = relationship("Task", back_populates="tag_rows")
 
 
 class Mark(Base):
     __tablename__ = 'Marks'
 
     Id = Column('Id', Integer, primary_key=True, index=True)
-    TargetTask = Column('TargetTask', Integer, ForeignKey('Tasks.Id', ondelete='CASCADE'), index=True)
+    TargetTask = Column('TargetTask', Integer, ForeignKey('Tasks.Id', ondelete='CASCADE'))
     MarkedById = Column('MarkedById', Integer, ForeignKey('Users.Id', ondelete='CASCADE'), index=True)
     Description = Column('Description', Text, nullable=False)
     Rate = Column('Rate', Integer, nullable=True)
@@ -168,6 +263,7 @@ class Mark(Base):
 
     __table_args__ = (
         CheckConstraint('"Rate" >= 0 AND "Rate" <= 10', name='ValidRates'),
+        Index('ix_Marks_TargetTask_CreateDate', 'TargetTask', 'CreateDate', 'Id'),
     )
 
     # Relationships
@@ -196,8 +292,17 @@ class Comment(Base):
     Id = Column('Id', Integer, primary_key=True, index=True)
     Text = Column('Text', Text, nullable=False)
     AuthorId = Column('AuthorId', Integer, ForeignKey('Users.Id', ondelete='CASCADE'), index=True)
-    TaskId = Column('TaskId', Integer, ForeignKey('Tasks.Id', ondelete='CASCADE'), index=True)
+    TaskId = Column('TaskId', Integer, ForeignKey('Tasks.Id', ondelete='CASCADE'))
     CreateDate = Column('CreateDate', DateTime(timezone=True), server_default=func.now(), nullable=False)
+    UpdatedAt = Column('UpdatedAt', DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    RowVersion = Column('RowVersion', BigInteger, nullable=False, server_default="0")
+    SearchVector = deferred(Column('SearchVector', TSVECTOR, Computed(COMMENT_SEARCH_VECTOR, persisted=True)))
+
+    __table_args__ = (
+        Index('ix_Comments_SearchVector', 'SearchVector', postgresql_using='gin'),
+        Index('ix_Comments_TaskId_RowVersion', 'TaskId', 'RowVersion'),
+        Index('ix_Comments_TaskId_CreateDate', 'TaskId', 'CreateDate'),
+    )
     
     # Relationships
     author = relationship("User", back_populates="comments")
@@ -217,4 +322,19 @@ class Pin(Base):
     # Constraints
     __table_args__ = (
         UniqueConstraint('UserId', 'TaskId', name='UniquePins'),
-    )
\ No newline at end of file
+    )
+
+# Следы удалённых задач, групп, участников и комментариев для /api/projects/{id}/changes
+class Tombstone(Base):
+    __tablename__ = 'Tombstones'
+
+    Id = Column('Id', BigInteger, primary_key=True)
+    ProjectId = Column('ProjectId', Integer, ForeignKey('Projects.Id', ondelete='CASCADE'), nullable=False)
+    Kind = Column('Kind', String(16), nullable=False)
+    EntityId = Column('EntityId', Integer, nullable=False)
+    RowVersion = Column('RowVersion', BigInteger, nullable=False)
+    DeleteDate = Column('DeleteDate', DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_Tombstones_ProjectId_RowVersion', 'ProjectId', 'RowVersion'),
+    )
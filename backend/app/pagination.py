@@ -0,0 +1,95 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Листинги по-прежнему отдают JSON-массив, курсор следующей страницы
+# передаётся в заголовке, чтобы старые клиенты продолжали работать.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(create_date: datetime, row_id: int) -> str:
+    raw = json.dumps([create_date.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        create_date, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(create_date), int(row_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor(str(cursor)) from e
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    model,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    skip: int = 0,
+) -> Page:
+    """Keyset pagination ordered by (CreateDate, Id).
+
+    `skip` is kept for the transition period and is ignored once a cursor is given.
+    """
+    stmt = stmt.order_by(model.CreateDate, model.Id)
+    if cursor:
+        create_date, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.CreateDate, model.Id) > tuple_(create_date, row_id))
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    rows = list((await db.scalars(stmt.limit(limit + 1))).all())
+    if len(rows) <= limit:
+        return Page(rows)
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor(last.CreateDate, last.Id))
+
+
+class PageParams:
+    """Query parameters shared by every list endpoint"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except InvalidCursor:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid pagination cursor"
+                )
+        self.cursor = cursor
+        self.skip = skip
+        self.limit = limit
+
+
+def page_response(response: Response, page: Page) -> List[Any]:
+    """Attach the next cursor header and return the page items"""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
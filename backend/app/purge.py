@@ -0,0 +1,163 @@
+"""Deleting large task groups and soft-deleted projects in batches.
+
+Comments, file links, pins, marks and tags of a task are removed by their
+ON DELETE CASCADE foreign keys, so one DELETE of a group is enough. For a group
+with tens of thousands of tasks that DELETE still holds row locks on all of
+them until commit. The purge functions here delete the tasks in chunks of
+PURGE_BATCH_SIZE, one transaction per chunk, and then delete the now empty group
+or project. Every chunk is a normal project change, with tombstones and an
+event, so clients watching the project see the tasks go.
+
+DELETE /api/task_groups/groups/{id} hands groups larger than PURGE_INLINE_LIMIT
+to run_purge_job and answers 202 with a PurgeJob. Its progress is available
+at GET /api/task_groups/purge/{job_id} from the worker that started it.
+Soft-deleted projects are purged from the command line:
+
+    python -m app.purge --deleted-projects
+    python -m app.purge --project 42
+"""
+import argparse
+import asyncio
+import logging
+import os
+import uuid
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.cache import TTLCache, invalidate_group_project, invalidate_project_access, invalidate_project_roles
+from app.crud.task_group import delete_task_group
+from app.database import engine, unit_of_work
+from app.realtime import emit_project_event
+from app.versioning import ENTITY_COMMENT, ENTITY_TASK, add_tombstones, bump_group_project_version
+
+logger = logging.getLogger(__name__)
+
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))
+# Группы до этого размера удаляются прямо в запросе одним DELETE
+PURGE_INLINE_LIMIT = int(os.getenv("PURGE_INLINE_LIMIT", "2000"))
+
+# job_id -> (project_id, PurgeJob); завершённые задания хранятся час для опроса прогресса
+purge_jobs = TTLCache(maxsize=1000, ttl=3600)
+
+
+async def count_group_tasks(db: AsyncSession, group_id: int) -> int:
+    return await db.scalar(select(func.count()).select_from(models.Task).where(models.Task.GroupId == group_id))
+
+
+def create_purge_job(kind: str, project_id: int, target_id: int, total: int) -> schemas.PurgeJob:
+    job = schemas.PurgeJob(Id=uuid.uuid4().hex, Kind=kind, TargetId=target_id, Total=total)
+    purge_jobs.set(job.Id, (project_id, job))
+    return job
+
+
+def get_purge_job(job_id: str) -> Optional[Tuple[int, schemas.PurgeJob]]:
+    return purge_jobs.get(job_id)
+
+
+async def _purge_group_chunk(group_id: int, batch_size: int) -> int:
+    async with unit_of_work() as db:
+        ids = (await db.scalars(
+            select(models.Task.Id).where(models.Task.GroupId == group_id).order_by(models.Task.Id).limit(batch_size)
+        )).all()
+        if not ids:
+            return 0
+        bumped = await bump_group_project_version(db, group_id)
+        await add_tombstones(db, bumped, ENTITY_COMMENT, select(models.Comment.Id).where(models.Comment.TaskId.in_(ids)))
+        await add_tombstones(db, bumped, ENTITY_TASK, select(models.Task.Id).where(models.Task.Id.in_(ids)))
+        emit_project_event(db, bumped, ENTITY_TASK, "deleted", ids)
+        await db.execute(delete(models.Task).where(models.Task.Id.in_(ids)))
+        return len(ids)
+
+
+async def purge_task_group(group_id: int, job: Optional[schemas.PurgeJob] = None, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete the group's tasks chunk by chunk, then the group; returns the number of tasks deleted"""
+    deleted = 0
+    while deleted_now := await _purge_group_chunk(group_id, batch_size):
+        deleted += deleted_now
+        if job is not None:
+            job.Deleted = deleted
+        logger.info("purge group %s: %s tasks deleted", group_id, deleted)
+    async with unit_of_work() as db:
+        await delete_task_group(db, group_id)
+    return deleted
+
+
+async def purge_project(project_id: int, job: Optional[schemas.PurgeJob] = None, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Remove a soft-deleted project for good; returns the number of tasks deleted.
+
+    The project is no longer readable, so no tombstones or events are written.
+    """
+    deleted = 0
+    while True:
+        async with unit_of_work() as db:
+            ids = (await db.scalars(
+                select(models.Task.Id)
+                .join(models.TaskGroup, models.TaskGroup.Id == models.Task.GroupId)
+                .join(models.Project, models.Project.Id == models.TaskGroup.ProjectId)
+                .where(models.Project.Id == project_id, models.Project.IsDeleted == True)
+                .order_by(models.Task.Id)
+                .limit(batch_size)
+            )).all()
+            if not ids:
+                break
+            await db.execute(delete(models.Task).where(models.Task.Id.in_(ids)))
+        deleted += len(ids)
+        if job is not None:
+            job.Deleted = deleted
+        logger.info("purge project %s: %s tasks deleted", project_id, deleted)
+
+    async with unit_of_work() as db:
+        group_ids = (await db.scalars(
+            select(models.TaskGroup.Id).where(models.TaskGroup.ProjectId == project_id)
+        )).all()
+        # Группы, участники, роли и надгробия уходят каскадом
+        await db.execute(delete(models.Project).where(models.Project.Id == project_id, models.Project.IsDeleted == True))
+        for group_id in group_ids:
+            invalidate_group_project(db, group_id)
+        invalidate_project_access(db, project_id)
+        invalidate_project_roles(db, project_id)
+    return deleted
+
+
+async def run_purge_job(job: schemas.PurgeJob) -> None:
+    """Run a job created by create_purge_job, recording its outcome on it"""
+    job.Status = "running"
+    try:
+        if job.Kind == "group":
+            await purge_task_group(job.TargetId, job)
+        else:
+            await purge_project(job.TargetId, job)
+    except Exception as exc:
+        logger.exception("purge %s %s failed", job.Kind, job.TargetId)
+        job.Status = "failed"
+        job.Error = str(exc)
+    else:
+        job.Status = "done"
+
+
+async def _deleted_project_ids() -> List[int]:
+    async with unit_of_work() as db:
+        return list((await db.scalars(
+            select(models.Project.Id).where(models.Project.IsDeleted == True).order_by(models.Project.Id)
+        )).all())
+
+
+async def main(args) -> None:
+    project_ids = await _deleted_project_ids() if args.deleted_projects else [args.project]
+    for project_id in project_ids:
+        deleted = await purge_project(project_id, batch_size=args.batch_size)
+        print(f"project {project_id}: {deleted} tasks deleted")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--deleted-projects", action="store_true", help="all soft-deleted projects")
+    target.add_argument("--project", type=int, help="one soft-deleted project")
+    parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,249 @@
+"""Push of project change events to WebSocket and SSE subscribers.
+
+crud write functions call emit_project_event() before commit. Events are kept
+on the session and published only after the transaction commits, so nobody is
+told about a change that was rolled back. Each event carries the project
+version (see app.versioning); clients apply it by calling
+GET /api/projects/{id}/changes?since=<their cursor>.
+
+The hub fans events out to the subscribers of this worker. PostgresNotifyHub
+relays them through LISTEN/NOTIFY so that every worker sees every event. It is
+selected with REALTIME_BACKEND=postgres. Other brokers can be plugged in with
+set_event_hub().
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.versioning import ProjectVersion
+
+logger = logging.getLogger(__name__)
+
+PENDING_EVENTS_KEY = "pending_project_events"
+
+# Медленный подписчик не должен копить события бесконечно: при переполнении
+# очередь очищается и клиент получает "resync" (перечитать /changes)
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "256"))
+
+# Длинные списки Id в событии не передаются, клиент всё равно забирает изменения через /changes
+MAX_EVENT_IDS = 100
+
+RESYNC_EVENT = {"Type": "resync"}
+
+# Пауза перед повторным подключением LISTEN растёт от MIN до MAX
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+
+
+class EventHub:
+    """In-process fan-out: project_id -> subscriber queues"""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def subscribe(self, project_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[project_id].add(queue)
+        return queue
+
+    def unsubscribe(self, project_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(project_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[project_id]
+
+    def subscriber_count(self, project_id: Optional[int] = None) -> int:
+        if project_id is not None:
+            return len(self._subscribers.get(project_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, project_id: int, payload: dict) -> None:
+        """Called after commit from the event loop thread; must not block"""
+        self._deliver(project_id, payload)
+
+    def _deliver(self, project_id: int, payload: dict) -> None:
+        for queue in self._subscribers.get(project_id, ()):
+            self._put(queue, payload)
+
+    def _resync_all(self) -> None:
+        """Tell every local subscriber that events may have been lost"""
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._put(queue, RESYNC_EVENT)
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, payload: dict) -> None:
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC_EVENT)
+
+
+class PostgresNotifyHub(EventHub):
+    """Relays events between workers through NOTIFY on CHANNEL.
+
+    Local subscribers are served only from LISTEN, including events published
+    by this worker, so all workers observe the same order. If the LISTEN
+    connection drops, it is reopened with backoff and local subscribers get
+    "resync", since NOTIFYs sent in between are lost.
+    """
+
+    CHANNEL = "project_events"
+
+    def __init__(self, dsn: str, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        super().__init__(queue_size)
+        self.dsn = dsn
+        self._listen_conn = None
+        self._notify_conn = None
+        self._listener: Optional[asyncio.Task] = None
+        self._notify_lock = asyncio.Lock()
+        # Цикл событий хранит на задачи только слабые ссылки: без этого набора NOTIFY может пропасть
+        self._notify_tasks: Set[asyncio.Task] = set()
+
+    async def _connect(self):
+        import psycopg
+
+        return await psycopg.AsyncConnection.connect(self.dsn, autocommit=True)
+
+    async def _connect_listener(self) -> None:
+        self._listen_conn = await self._connect()
+        await self._listen_conn.execute(f"LISTEN {self.CHANNEL}")
+
+    async def start(self) -> None:
+        await self._connect_listener()
+        self._notify_conn = await self._connect()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        tasks = list(self._notify_tasks)
+        if self._listener is not None:
+            tasks.append(self._listener)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for conn in (self._listen_conn, self._notify_conn):
+            if conn is not None:
+                await conn.close()
+
+    async def _listen(self) -> None:
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                if self._listen_conn is None:
+                    await self._connect_listener()
+                    logger.info("Reconnected to %s", self.CHANNEL)
+                    # Уведомления, отправленные без подключения, потеряны
+                    self._resync_all()
+                delay = RECONNECT_MIN_DELAY
+                async for notify in self._listen_conn.notifies():
+                    self._receive(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LISTEN %s failed, reconnecting in %.0f s", self.CHANNEL, delay)
+            await self._close_listener()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _close_listener(self) -> None:
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+
+    def _receive(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            self._deliver(message["ProjectId"], message)
+        except (ValueError, KeyError):
+            logger.warning("Malformed project event: %r", payload)
+
+    def publish(self, project_id: int, payload: dict) -> None:
+        task = asyncio.get_running_loop().create_task(self._notify(payload))
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
+
+    async def _notify(self, payload: dict) -> None:
+        try:
+            async with self._notify_lock:
+                if self._notify_conn is None or self._notify_conn.closed:
+                    self._notify_conn = await self._connect()
+                await self._notify_conn.execute(
+                    "SELECT pg_notify(%s, %s)", (self.CHANNEL, json.dumps(payload))
+                )
+        except Exception:
+            logger.exception("Failed to publish project event")
+
+
+def _create_hub() -> EventHub:
+    if os.getenv("REALTIME_BACKEND", "local") == "postgres":
+        from app.database import engine
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresNotifyHub(dsn)
+    return EventHub()
+
+
+_hub: EventHub = _create_hub()
+
+
+def get_event_hub() -> EventHub:
+    return _hub
+
+
+def set_event_hub(hub: EventHub) -> None:
+    global _hub
+    _hub = hub
+
+
+def emit_project_event(
+    db: AsyncSession,
+    bumped: Optional[ProjectVersion],
+    kind: str,
+    action: str,
+    ids: Iterable[int],
+) -> None:
+    """Queue `<kind>.<action>` for publishing once the session commits"""
+    if bumped is None:
+        return
+    ids = list(ids)
+    db.info.setdefault(PENDING_EVENTS_KEY, []).append({
+        "Type": f"{kind}.{action}",
+        "ProjectId": bumped.project_id,
+        "Version": bumped.version,
+        "Ids": ids if len(ids) <= MAX_EVENT_IDS else None,
+    })
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session: Session) -> None:
+    for payload in session.info.pop(PENDING_EVENTS_KEY, ()):
+        try:
+            _hub.publish(payload["ProjectId"], payload)
+        except Exception:
+            logger.exception("Failed to publish project event")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session: Session) -> None:
+    session.info.pop(PENDING_EVENTS_KEY, None)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, ConfigDict, Field
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 # AccessLevel is represented as a plain string in API ("Common" or "Admin").
 AccessLevel = str
@@ -19,6 +19,9 @@ class UserUpdate(BaseModel):
     Password: Optional[str] = None
 
 class User(UserBase):
+    # Только для ответов: адрес проверен при записи, а EmailStr на каждом
+    # вложенном author/target занимал большую часть сериализации списков задач
+    Email: str
     Id: int
     FirstName: Optional[str] = None
     LastName: Optional[str] = None
@@ -66,6 +69,8 @@ class OtpResend(BaseModel):
 class StoreFileBase(BaseModel):
     SourceName: str
     TagName: str
+    Size: Optional[int] = None  # байт; None у файлов, загруженных до подсчёта
+    Sha256: Optional[str] = None
 
 class StoreFileCreate(StoreFileBase):
     pass
@@ -77,6 +82,23 @@ class StoreFile(StoreFileBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class UploadSessionCreate(BaseModel):
+    SourceName: str = Field(min_length=1, max_length=150)
+    Size: int = Field(gt=0)
+    # Если задан, собранный файл обязан иметь этот SHA-256
+    Sha256: Optional[str] = Field(default=None, pattern="^[0-9a-f]{64}$")
+
+class UploadSession(BaseModel):
+    Id: str
+    SourceName: str
+    Size: int
+    Sha256: Optional[str] = None
+    ChunkSize: int
+    ExpiresAt: datetime
+    Received: List[int] = []  # смещения уже принятых частей
+
+    model_config = ConfigDict(from_attributes=True)
+
 class ProjectBase(BaseModel):
     Name: str
     Description: Optional[str] = None
@@ -107,6 +129,25 @@ class ProjectWithDetails(Project):
     roles: List['ProjectRole'] = []
     task_groups: List['TaskGroup'] = []
 
+class SummaryCounts(BaseModel):
+    Total: int = 0
+    Open: int = 0
+    Closed: int = 0
+    Overdue: int = 0  # открытые задачи с прошедшим DeadLine
+
+class SummaryBucket(SummaryCounts):
+    Id: Optional[int] = None  # GroupId / StateId / TargetId, None = не задан
+
+class ProjectSummary(BaseModel):
+    ProjectId: int
+    IsOwner: bool
+    AccessLevel: Optional[str] = None  # уровень доступа текущего пользователя
+    MemberCount: int
+    Tasks: SummaryCounts
+    ByGroup: List[SummaryBucket] = []
+    ByState: List[SummaryBucket] = []
+    ByTarget: List[SummaryBucket] = []
+
 class ProjectMemberBase(BaseModel):
     # None => будет интерпретировано на уровне бизнес-логики как "Common"
     AccessLevel: Optional[AccessLevel] = None
@@ -200,6 +241,7 @@ class TaskUpdate(BaseModel):
     GroupId: Optional[int] = None
     IsClosed: Optional[bool] = None
     DeadLine: Optional[date] = None
+    Tags: Optional[str] = None
 
 class Task(TaskBase):
     Id: int
@@ -218,6 +260,100 @@ class TaskWithDetails(Task):
     task_files: List['TaskFileWithFile'] = []
     pins: List['Pin'] = []
 
+TASK_CARD_TEXT_LENGTH = 200
+
+# ?view= у списков задач: full - TaskWithDetails (Task для /api/tasks/), card - TaskCard
+TaskView = Literal["full", "card"]
+
+class TaskCard(BaseModel):
+    """Task fields a kanban card shows: no relations and no Text"""
+    Id: int
+    Title: str
+    AuthorId: Optional[int] = None
+    TargetId: Optional[int] = None
+    StateId: Optional[int] = None
+    GroupId: Optional[int] = None
+    CreateDate: datetime
+    IsClosed: bool
+    DeadLine: Optional[date] = None
+    Tags: Optional[str] = ""
+
+    model_config = ConfigDict(from_attributes=True)
+
+class BoardTaskCard(TaskCard):
+    """TaskCard with Text cut to TASK_CARD_TEXT_LENGTH characters"""
+    Text: str
+
+class ProjectBoard(BaseModel):
+    project: Project
+    owner: Optional[User] = None
+    members: List[ProjectMemberWithUser] = []
+    roles: List[ProjectRole] = []  # только для администраторов проекта
+    groups: List[TaskGroup] = []
+    tasks: List[BoardTaskCard] = []
+
+class DeletedEntity(BaseModel):
+    Kind: Literal["task", "group", "member", "comment"]
+    Id: int
+
+class ProjectChanges(BaseModel):
+    ProjectId: int
+    Cursor: int  # передаётся в since при следующем запросе
+    Full: bool  # True, если since не задан: вернулось всё содержимое проекта
+    groups: List[TaskGroup] = []
+    members: List[ProjectMemberWithUser] = []
+    tasks: List[Task] = []
+    comments: List['Comment'] = []
+    deleted: List[DeletedEntity] = []
+
+class SearchHit(BaseModel):
+    Kind: Literal["task", "comment"]
+    TaskId: int
+    CommentId: Optional[int] = None
+    Rank: float
+    Title: str  # заголовок задачи как есть
+    # Подсветка - фрагмент HTML: исходный текст экранирован (&amp; &lt; &gt;),
+    # совпадения обёрнуты в <b>...</b>; других тегов в нём не бывает
+    TitleHighlight: str
+    Snippet: str  # фрагмент текста задачи или комментария, в том же формате
+
+class TagCount(BaseModel):
+    Tag: str
+    Count: int
+
+MAX_TASK_BATCH_SIZE = 500
+
+class TaskBatchOperation(BaseModel):
+    Op: Literal["create", "update", "move", "close", "reopen"]
+    TaskId: Optional[int] = None  # для всех операций, кроме create
+    Create: Optional[TaskCreate] = None  # для create
+    Update: Optional[TaskUpdate] = None  # для update
+    GroupId: Optional[int] = None  # для move
+
+class TaskBatch(BaseModel):
+    Operations: List[TaskBatchOperation] = Field(min_length=1, max_length=MAX_TASK_BATCH_SIZE)
+
+class TaskBatchResult(BaseModel):
+    Index: int
+    Op: str
+    Ok: bool
+    TaskId: Optional[int] = None
+    Error: Optional[str] = None
+
+class TaskBatchResponse(BaseModel):
+    Applied: int
+    Failed: int
+    Results: List[TaskBatchResult]
+
+class PurgeJob(BaseModel):
+    Id: str
+    Kind: Literal["group", "project"]
+    TargetId: int
+    Total: int  # задач к удалению на момент запуска
+    Deleted: int = 0
+    Status: Literal["pending", "running", "done", "failed"] = "pending"
+    Error: Optional[str] = None
+
 class TaskFileBase(BaseModel):
     FileId: int
     TaskId: int
@@ -300,4 +436,5 @@ TaskGroupWithTasks.model_rebuild()
 TaskWithDetails.model_rebuild()
 TaskFileWithFile.model_rebuild()
 CommentWithAuthor.model_rebuild()
-PinWithTask.model_rebuild()
\ No newline at end of file
+PinWithTask.model_rebuild()
+ProjectChanges.model_rebuild()
\ No newline at end of file
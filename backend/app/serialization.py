@@ -0,0 +1,42 @@
+"""Fast JSON responses for large listings.
+
+With response_model FastAPI validates the returned ORM rows, dumps them to
+Python dicts and only then encodes JSON. Here each listing has a prebuilt
+TypeAdapter. ORM rows are validated once (from_attributes) and pydantic-core
+writes JSON bytes directly. Headers set on the injected Response (cursor, ETag)
+are carried over. Keep response_model on the route: it still drives OpenAPI.
+
+See benchmarks/serialization_benchmark.py for numbers.
+"""
+from typing import Any, List, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app import schemas
+
+TASK_LIST = TypeAdapter(List[schemas.Task])
+TASK_DETAILS_LIST = TypeAdapter(List[schemas.TaskWithDetails])
+TASK_CARD_LIST = TypeAdapter(List[schemas.TaskCard])
+TASK_GROUP_LIST = TypeAdapter(List[schemas.TaskGroup])
+PROJECT_MEMBER_LIST = TypeAdapter(List[schemas.ProjectMemberWithUser])
+PROJECT_BOARD = TypeAdapter(schemas.ProjectBoard)
+PROJECT_CHANGES = TypeAdapter(schemas.ProjectChanges)
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _json_response(body: bytes, response: Optional[Response]) -> Response:
+    headers = dict(response.headers) if response is not None else None
+    status_code = response.status_code if response is not None and response.status_code else 200
+    return Response(content=body, status_code=status_code, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def orm_response(adapter: TypeAdapter, rows: Any, response: Optional[Response] = None) -> Response:
+    """Validate ORM objects once and write them as JSON"""
+    return _json_response(adapter.dump_json(adapter.validate_python(rows, from_attributes=True)), response)
+
+
+def model_response(adapter: TypeAdapter, value: Any, response: Optional[Response] = None) -> Response:
+    """Write already built schema objects as JSON without validating them again"""
+    return _json_response(adapter.dump_json(value), response)
@@ -0,0 +1,42 @@
+"""One transaction per request.
+
+Crud functions only flush. The session opened by app.database.get_db is
+committed here right before the response starts, so all writes of a request
+become visible together and cost a single COMMIT. Responses with status >= 400
+roll the whole request back instead of leaving part of it applied. If the
+commit itself fails, the client gets a 500, not a success for data that was
+never stored.
+
+Escape hatches:
+- `await db.commit()` inside a request commits what has been flushed so far
+  and starts a new transaction. Use it where data must survive an error
+  response (failed OTP attempts) or where a long job commits in chunks.
+- app.database.unit_of_work() opens its own session and transaction for code
+  that runs outside a request: background jobs, scripts, WebSocket handlers.
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database import REQUEST_SESSION_KEY
+
+
+class UnitOfWorkMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_after_commit(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # request.state хранится в scope["state"]; сессии нет, если эндпоинт не обращался к БД
+                db = scope.get("state", {}).pop(REQUEST_SESSION_KEY, None)
+                if db is not None:
+                    if message["status"] < 400:
+                        await db.commit()
+                    else:
+                        await db.rollback()
+            await send(message)
+
+        await self.app(scope, receive, send_after_commit)
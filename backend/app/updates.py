@@ -0,0 +1,38 @@
+"""Single-statement updates.
+
+The classic ORM write is SELECT the row, set attributes, flush an UPDATE,
+COMMIT, then refresh with another SELECT. update_returning sends one
+UPDATE ... RETURNING instead: the row is locked only for the rest of the
+transaction and the returned object already holds the new values, including
+server-side ones (UpdatedAt). Sessions use expire_on_commit=False, so the
+object stays readable after commit without a refresh.
+"""
+from typing import Any, Dict, Optional, Type, TypeVar
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+ModelT = TypeVar("ModelT")
+
+
+async def update_returning(
+    db: AsyncSession,
+    model: Type[ModelT],
+    values: Dict[str, Any],
+    *criteria,
+) -> Optional[ModelT]:
+    """UPDATE model SET values WHERE criteria RETURNING the row as an ORM object.
+
+    Returns None when no row matched. An object of the same row already in the
+    session (e.g. loaded by the endpoint for an access check) gets the returned
+    values; "fetch" takes them from RETURNING without an extra SELECT.
+    """
+    if not values:
+        return await db.scalar(select(model).where(*criteria))
+    return await db.scalar(
+        update(model)
+        .where(*criteria)
+        .values(**values)
+        .returning(model)
+        .execution_options(synchronize_session="fetch")
+    )
@@ -0,0 +1,274 @@
+"""Resumable uploads of large files in chunks.
+
+A client creates a session with POST /api/files/uploads and gets its Id and
+ChunkSize. It then sends the file as chunks, PUT /api/files/uploads/{id}?offset=N,
+in any order and in parallel. Each chunk carries the SHA-256 of its bytes in
+the X-Chunk-Sha256 header. A chunk is kept only if its length and hash match.
+Otherwise the client gets 400 and sends the chunk again. After a dropped
+connection, GET /api/files/uploads/{id} lists the offsets already received, so
+only the missing chunks are sent. POST .../complete assembles the chunks into
+the blob store (app.blobs) and creates the StoreFile. The SHA-256 that names
+the blob is computed from the very bytes written while assembling.
+
+The chunks are staged on disk in STAGING_DIR/<id>/<offset>.chunk. Like
+write_upload, each chunk is written to a ".part" file and renamed when
+complete, so a resent or parallel chunk never leaves a torn file. Every chunk
+moves the session's ExpiresAt UPLOAD_SESSION_TTL ahead. Abandoned sessions and
+their chunks are removed by:
+
+    python -m app.upload_sessions
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select
+from starlette.concurrency import run_in_threadpool
+
+from app import models
+from app.blobs import blob_path, touch_blob
+from app.database import engine, unit_of_work
+from app.uploads import UPLOAD_CHUNK_SIZE, UPLOAD_DIR, UploadDigest
+
+logger = logging.getLogger(__name__)
+
+STAGING_DIR = os.path.join(UPLOAD_DIR, "staging")
+UPLOAD_SESSION_CHUNK_SIZE = int(os.getenv("UPLOAD_SESSION_CHUNK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_SESSION_TTL = timedelta(seconds=int(os.getenv("UPLOAD_SESSION_TTL", str(24 * 3600))))
+UPLOAD_SESSION_BATCH_SIZE = int(os.getenv("UPLOAD_SESSION_BATCH_SIZE", "500"))
+# Каталог без строки UploadSessions моложе этого может принадлежать незафиксированной транзакции
+STAGING_GRACE_SECONDS = int(os.getenv("STAGING_GRACE_SECONDS", "3600"))
+
+_CHUNK_SUFFIX = ".chunk"
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+def session_expiry() -> datetime:
+    return datetime.now(timezone.utc) + UPLOAD_SESSION_TTL
+
+
+def staging_path(session_id: str) -> str:
+    return os.path.join(STAGING_DIR, session_id)
+
+
+def chunk_path(session_id: str, offset: int) -> str:
+    # Имена одной ширины сортируются в порядке смещений
+    return os.path.join(staging_path(session_id), f"{offset:016d}{_CHUNK_SUFFIX}")
+
+
+def chunk_offsets(size: int, chunk_size: int) -> range:
+    return range(0, size, chunk_size)
+
+
+def expected_chunk_size(session: models.UploadSession, offset: int) -> int:
+    """Length of the chunk at offset; 400 if offset does not start a chunk"""
+    if offset < 0 or offset >= session.Size or offset % session.ChunkSize:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Offset must be a multiple of {session.ChunkSize} below {session.Size}",
+        )
+    return min(session.ChunkSize, session.Size - offset)
+
+
+def received_offsets(session_id: str) -> List[int]:
+    try:
+        names = os.listdir(staging_path(session_id))
+    except FileNotFoundError:
+        return []
+    return sorted(int(name[:-len(_CHUNK_SUFFIX)]) for name in names if name.endswith(_CHUNK_SUFFIX))
+
+
+def _bad_chunk(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _append(out, digest, data: bytes) -> None:
+    out.write(data)
+    digest.update(data)
+
+
+def _finish_part(out, part_path: str, path: str) -> None:
+    out.flush()
+    os.fsync(out.fileno())
+    out.close()
+    os.replace(part_path, path)
+
+
+def _discard_part(out, part_path: str) -> None:
+    out.close()
+    if os.path.exists(part_path):
+        os.remove(part_path)
+
+
+async def write_chunk(body: AsyncIterator[bytes], path: str, size: int, sha256: str) -> None:
+    """Stream a chunk to `path`; 400 and nothing kept unless it is `size` bytes hashing to `sha256`"""
+    part_path = f"{path}.{uuid.uuid4().hex}.part"
+    try:
+        out = await run_in_threadpool(open, part_path, "wb")
+    except FileNotFoundError:
+        # Каталог удалён: сессия завершена или просрочена
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    digest = hashlib.sha256()
+    received = 0
+    buffer = bytearray()
+    try:
+        async for data in body:
+            received += len(data)
+            if received > size:
+                raise _bad_chunk(f"Chunk is longer than {size} bytes")
+            buffer += data
+            # Пишем блоками, а не каждым сообщением ASGI, чтобы реже переключаться на поток
+            if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                await run_in_threadpool(_append, out, digest, bytes(buffer))
+                buffer.clear()
+        await run_in_threadpool(_append, out, digest, bytes(buffer))
+        if received != size:
+            raise _bad_chunk(f"Chunk must be {size} bytes, got {received}")
+        if digest.hexdigest() != sha256.lower():
+            raise _bad_chunk("Chunk checksum mismatch")
+        await run_in_threadpool(_finish_part, out, part_path, path)
+    except BaseException:
+        await run_in_threadpool(_discard_part, out, part_path)
+        raise
+
+
+def _write_assembled(paths: List[str], part_path: str) -> UploadDigest:
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(part_path, "wb") as out:
+            for path in paths:
+                with open(path, "rb") as f:
+                    while data := f.read(UPLOAD_CHUNK_SIZE):
+                        out.write(data)
+                        digest.update(data)
+                        size += len(data)
+            out.flush()
+            os.fsync(out.fileno())
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return UploadDigest(size=size, sha256=digest.hexdigest())
+
+
+def _discard(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+async def assemble_session(session: models.UploadSession) -> Tuple[str, UploadDigest]:
+    """Concatenate the staged chunks into a .part file, hashing the bytes as they are written.
+
+    409 while chunks are missing, 400 if the result does not match the session.
+    Returns the .part path and its digest. The hash is computed on the written
+    bytes, not on a separate read, because a chunk resent in between would
+    otherwise end up in the blob under another file's hash.
+    """
+    received = set(await run_in_threadpool(received_offsets, session.Id))
+    offsets = chunk_offsets(session.Size, session.ChunkSize)
+    missing = [offset for offset in offsets if offset not in received]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{len(missing)} chunks are missing, first at offset {missing[0]}",
+        )
+
+    part_path = os.path.join(staging_path(session.Id), f"assembled.{uuid.uuid4().hex}.part")
+    digest = await run_in_threadpool(_write_assembled, [chunk_path(session.Id, offset) for offset in offsets], part_path)
+    if digest.size != session.Size:
+        await run_in_threadpool(_discard, part_path)
+        raise _bad_chunk(f"Assembled file is {digest.size} bytes instead of {session.Size}")
+    if session.Sha256 and digest.sha256 != session.Sha256:
+        await run_in_threadpool(_discard, part_path)
+        raise _bad_chunk("File checksum mismatch")
+    return part_path, digest
+
+
+def store_assembled(part_path: str, sha256: str) -> None:
+    """Move the assembled file into the blob store, or drop it if the content is already there.
+
+    Call after acquire_blob, while the Blobs row is locked.
+    """
+    if touch_blob(sha256):
+        os.remove(part_path)
+        return
+    target = blob_path(sha256)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # staging и blobs лежат в Uploads/, на одной файловой системе
+    os.replace(part_path, target)
+
+
+def remove_staging(session_id: str) -> None:
+    shutil.rmtree(staging_path(session_id), ignore_errors=True)
+
+
+async def expire_sessions(batch_size: int = UPLOAD_SESSION_BATCH_SIZE) -> int:
+    """Delete expired sessions and their chunks batch by batch; returns how many were removed"""
+    removed = 0
+    while True:
+        async with unit_of_work() as db:
+            ids = (await db.scalars(
+                select(models.UploadSession.Id)
+                .where(models.UploadSession.ExpiresAt < datetime.now(timezone.utc))
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not ids:
+                break
+            await db.execute(delete(models.UploadSession).where(models.UploadSession.Id.in_(ids)))
+        # Каталоги удаляются после commit: запись части в удалённую сессию получит 404
+        await run_in_threadpool(lambda: [remove_staging(session_id) for session_id in ids])
+        removed += len(ids)
+        logger.info("upload sessions: %s expired sessions removed", removed)
+    return removed + await sweep_staging(batch_size)
+
+
+def _old_staging_dirs(min_age: float) -> List[str]:
+    cutoff = time.time() - min_age
+    try:
+        entries = list(os.scandir(STAGING_DIR))
+    except FileNotFoundError:
+        return []
+    return [entry.name for entry in entries if entry.is_dir() and entry.stat().st_mtime < cutoff]
+
+
+async def sweep_staging(batch_size: int = UPLOAD_SESSION_BATCH_SIZE, min_age: float = STAGING_GRACE_SECONDS) -> int:
+    """Remove old staging directories that have no session row"""
+    names = await run_in_threadpool(_old_staging_dirs, min_age)
+    removed = 0
+    for start in range(0, len(names), batch_size):
+        batch = names[start:start + batch_size]
+        async with unit_of_work() as db:
+            known = set((await db.scalars(
+                select(models.UploadSession.Id).where(models.UploadSession.Id.in_(batch))
+            )).all())
+        orphans = [name for name in batch if name not in known]
+        await run_in_threadpool(lambda: [remove_staging(name) for name in orphans])
+        removed += len(orphans)
+    if removed:
+        logger.info("upload sessions: %s orphaned staging directories removed", removed)
+    return removed
+
+
+async def main(args) -> None:
+    print(f"{await expire_sessions(args.batch_size)} upload sessions removed")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=UPLOAD_SESSION_BATCH_SIZE)
+    asyncio.run(main(parser.parse_args()))
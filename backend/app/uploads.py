@@ -0,0 +1,115 @@
+"""Reading uploaded files without holding them in memory.
+
+Starlette spools a multipart file to a temporary file (in memory only up to
+1 MiB), so the upload is never read whole into the worker. digest_upload reads
+it in UPLOAD_CHUNK_SIZE pieces to compute size and SHA-256. write_upload copies
+it to its final place. Both do their file work in the thread pool, so the event
+loop is not blocked. The copy goes to a ".part" file that is renamed into
+place only when complete, so a half-written file is never visible under its
+final name. Where the file ends up is decided by app.blobs.
+
+LimitedUploadRoute rejects bodies larger than MAX_UPLOAD_SIZE (plus multipart
+framing) with 413 while they are being received, before FastAPI parses the
+form.
+"""
+import hashlib
+import os
+import uuid
+from typing import NamedTuple
+
+from fastapi import HTTPException, Request, Response, UploadFile, status
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Message
+
+UPLOAD_DIR = "Uploads"
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(1024 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Заголовки частей и boundary сверх самого файла
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File is larger than {MAX_UPLOAD_SIZE} bytes",
+    )
+
+
+class LimitedUploadRoute(APIRoute):
+    """Route that stops reading a request body over MAX_UPLOAD_SIZE"""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        limit = MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD
+
+        async def limited_handler(request: Request) -> Response:
+            content_length = request.headers.get("content-length")
+            if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+                raise _too_large()
+
+            # Content-Length может отсутствовать (chunked), поэтому считаем и сами байты
+            received = 0
+            receive = request.receive
+
+            async def limited_receive() -> Message:
+                nonlocal received
+                message = await receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > limit:
+                        raise _too_large()
+                return message
+
+            return await handler(Request(request.scope, limited_receive))
+
+        return limited_handler
+
+
+class UploadDigest(NamedTuple):
+    size: int
+    sha256: str
+
+
+async def digest_upload(file: UploadFile, max_size: int = MAX_UPLOAD_SIZE) -> UploadDigest:
+    """Size and SHA-256 of the upload, read chunk by chunk; 413 once it exceeds max_size.
+
+    Rewinds the file, so it can be written with write_upload afterwards.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_size:
+            raise _too_large()
+        # hashlib отпускает GIL на больших блоках
+        await run_in_threadpool(digest.update, chunk)
+    await file.seek(0)
+    return UploadDigest(size=size, sha256=digest.hexdigest())
+
+
+async def write_upload(file: UploadFile, path: str) -> None:
+    """Copy the upload to `path` through a .part file renamed into place when complete"""
+    part_path = f"{path}.{uuid.uuid4().hex}.part"
+    await run_in_threadpool(os.makedirs, os.path.dirname(path), exist_ok=True)
+    out = await run_in_threadpool(open, part_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await run_in_threadpool(out.write, chunk)
+        await run_in_threadpool(_finish, out)
+        await run_in_threadpool(os.replace, part_path, path)
+    except BaseException:
+        await run_in_threadpool(_discard, out, part_path)
+        raise
+
+
+def _finish(out) -> None:
+    out.flush()
+    os.fsync(out.fileno())
+    out.close()
+
+
+def _discard(out, part_path: str) -> None:
+    out.close()
+    if os.path.exists(part_path):
+        os.remove(part_path)
@@ -0,0 +1,140 @@
+"""Per-project version counters.
+
+Every write that changes data visible through a project's read endpoints
+bumps Projects.Version in the same transaction. Readers compare versions
+instead of rendering and hashing whole responses (see app.etag).
+
+The new version is also stamped into RowVersion of the changed tasks, groups,
+members and comments, and deletes leave a Tombstone with that version, so
+GET /api/projects/{id}/changes can return everything newer than a cursor.
+The UPDATE holds the project row lock until commit, so versions of one
+project become visible strictly in order.
+"""
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import BigInteger, Integer, Select, insert, literal, or_, select, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+
+ENTITY_TASK = "task"
+ENTITY_GROUP = "group"
+ENTITY_MEMBER = "member"
+ENTITY_COMMENT = "comment"
+
+
+class ProjectVersion(NamedTuple):
+    project_id: int
+    version: int
+
+
+async def _bump(db: AsyncSession, project_id) -> Optional[ProjectVersion]:
+    row = (await db.execute(
+        update(models.Project)
+        .where(models.Project.Id == project_id)
+        .values(Version=models.Project.Version + 1)
+        .returning(models.Project.Id, models.Project.Version)
+        .execution_options(synchronize_session=False)
+    )).first()
+    return ProjectVersion(*row) if row else None
+
+
+async def bump_project_version(db: AsyncSession, project_id: int) -> Optional[ProjectVersion]:
+    """Increment the project's version, return the new value (None if no such project)"""
+    return await _bump(db, project_id)
+
+
+async def bump_group_project_version(db: AsyncSession, group_id: Optional[int]) -> Optional[ProjectVersion]:
+    if group_id is None:
+        return None
+    return await _bump(
+        db,
+        select(models.TaskGroup.ProjectId).where(models.TaskGroup.Id == group_id).scalar_subquery(),
+    )
+
+
+async def bump_task_project_version(db: AsyncSession, task_id: int) -> Optional[ProjectVersion]:
+    return await _bump(
+        db,
+        select(models.TaskGroup.ProjectId)
+        .join(models.Task, models.Task.GroupId == models.TaskGroup.Id)
+        .where(models.Task.Id == task_id)
+        .scalar_subquery(),
+    )
+
+
+async def bump_comment_project_version(db: AsyncSession, comment_id: int) -> Optional[ProjectVersion]:
+    return await _bump(
+        db,
+        select(models.TaskGroup.ProjectId)
+        .join(models.Task, models.Task.GroupId == models.TaskGroup.Id)
+        .join(models.Comment, models.Comment.TaskId == models.Task.Id)
+        .where(models.Comment.Id == comment_id)
+        .scalar_subquery(),
+    )
+
+
+async def bump_user_project_versions(db: AsyncSession, user_id: int) -> List[ProjectVersion]:
+    """Bump every project whose responses embed the user as owner, member, task author/target or commenter.
+
+    Member rows of the user get the new versions too, so /changes returns them.
+    """
+    in_project_tasks = select(models.TaskGroup.ProjectId).join(models.Task, models.Task.GroupId == models.TaskGroup.Id)
+    project_ids = union(
+        select(models.Project.Id).where(models.Project.OwnerId == user_id),
+        select(models.ProjectMember.ProjectId).where(models.ProjectMember.MemnerId == user_id),
+        in_project_tasks.where(or_(models.Task.AuthorId == user_id, models.Task.TargetId == user_id)),
+        in_project_tasks.join(models.Comment, models.Comment.TaskId == models.Task.Id).where(models.Comment.AuthorId == user_id),
+    )
+    rows = (await db.execute(
+        update(models.Project)
+        .where(models.Project.Id.in_(project_ids))
+        .values(Version=models.Project.Version + 1)
+        .returning(models.Project.Id, models.Project.Version)
+        .execution_options(synchronize_session=False)
+    )).all()
+    if rows:
+        await db.execute(
+            update(models.ProjectMember)
+            .where(models.ProjectMember.MemnerId == user_id)
+            .values(RowVersion=select(models.Project.Version)
+                    .where(models.Project.Id == models.ProjectMember.ProjectId)
+                    .scalar_subquery())
+            .execution_options(synchronize_session=False)
+        )
+    return [ProjectVersion(*row) for row in rows]
+
+
+async def get_project_version(db: AsyncSession, project_id: int) -> Optional[int]:
+    return await db.scalar(
+        select(models.Project.Version).where(
+            models.Project.Id == project_id,
+            models.Project.IsDeleted == False,
+        )
+    )
+
+
+def row_version(bumped: Optional[ProjectVersion]) -> int:
+    """RowVersion for rows written together with the bump"""
+    return bumped.version if bumped else 0
+
+
+async def add_tombstones(db: AsyncSession, bumped: Optional[ProjectVersion], kind: str, ids: Select) -> None:
+    """Record deletion of the entities selected by `ids` (a one-column select of Id).
+
+    Must run before the rows are actually deleted.
+    """
+    if bumped is None:
+        return
+    ids = ids.subquery()
+    await db.execute(
+        insert(models.Tombstone).from_select(
+            ["ProjectId", "Kind", "EntityId", "RowVersion"],
+            select(
+                literal(bumped.project_id, Integer),
+                literal(kind),
+                *ids.c,
+                literal(bumped.version, BigInteger),
+            ),
+        )
+    )
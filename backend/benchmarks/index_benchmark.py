@@ -0,0 +1,229 @@
+"""Query plans of the hot crud queries before and after add_query_indexes.
+
+Seeds users, projects (10% deleted), groups, tasks, comments, marks and store
+files inside Postgres, then runs each crud function once to capture the SQL it
+sends and prints EXPLAIN (ANALYZE, BUFFERS) for it twice: with the old
+single-column indexes and with the composite/partial indexes of the
+add_query_indexes migration. The index lists are read from the migration file,
+so the benchmark always matches it. Run from backend/ against a scratch
+database that has all migrations applied:
+
+    python -m benchmarks.index_benchmark --tasks 500000
+
+The schema is left as the migration defines it. Pass --keep to leave the
+generated data in place, --plans to print full plans instead of the summary.
+"""
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import re
+import time
+from pathlib import Path
+
+from sqlalchemy import Index, event, text
+
+from app import models
+from app.crud.comment import get_task_comments
+from app.crud.mark import get_task_marks
+from app.crud.project import get_projects
+from app.crud.store_file import get_store_file_by_filename
+from app.crud.task import get_project_tasks, get_user_tasks
+from app.crud.user import get_user_by_email
+from app.database import SessionLocal, engine
+
+PREFIX = "index-bench"
+PLAN_INDEX = re.compile(r'(?:Index(?: Only)? Scan(?: Backward)? using|Bitmap Index Scan on) "?(\w+)"?')
+MIGRATION = Path(__file__).resolve().parent.parent / "alembic" / "versions" / "add_query_indexes.py"
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("add_query_indexes", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_index(name, table, columns, where=None) -> Index:
+    table = models.Base.metadata.tables[table]
+    return Index(name, *(table.c[c] for c in columns), postgresql_where=text(where) if where else None)
+
+
+async def use_indexes(migration, new: bool) -> None:
+    """new=True: индексы миграции, new=False: прежние одноколоночные"""
+    created = [build_index(*spec) for spec in migration.NEW_INDEXES]
+    replaced = [build_index(*spec) for spec in migration.REPLACED_INDEXES]
+    keep, drop = (created, replaced) if new else (replaced, created)
+    async with engine.begin() as conn:
+        for index in drop:
+            await conn.run_sync(lambda sync_conn, index=index: index.drop(sync_conn, checkfirst=True))
+        for index in keep:
+            await conn.run_sync(lambda sync_conn, index=index: index.create(sync_conn, checkfirst=True))
+        for table in ("Tasks", "Projects", "Users", "StoreFiles", "Comments", "Marks"):
+            await conn.execute(text(f'ANALYZE "{table}"'))
+
+
+async def generate(n_tasks: int) -> dict:
+    n_users = max(n_tasks // 250, 20)
+    n_projects = max(n_tasks // 500, 10)
+    started = time.perf_counter()
+    async with SessionLocal() as db:
+        params = {"prefix": PREFIX, "users": n_users, "projects": n_projects, "tasks": n_tasks}
+        await db.execute(text("""
+            INSERT INTO "Users" ("Username", "Email", "PasswordHash", "IsDeleted")
+            SELECT :prefix || '-' || g, :prefix || '-' || g || '@example.com', '-', g % 20 = 0
+            FROM generate_series(1, :users) AS g
+        """), params)
+        users = (await db.execute(text(
+            'SELECT min("Id"), max("Id") FROM "Users" WHERE "Username" LIKE :prefix || \'-%\''
+        ), params)).one()
+        params.update(user_lo=users[0], user_span=users[1] - users[0] + 1)
+
+        await db.execute(text("""
+            INSERT INTO "Projects" ("Name", "OwnerId", "IsDeleted", "CreateDate")
+            SELECT :prefix || '-' || g, :user_lo + g % :user_span, g % 10 = 0,
+                   now() - (g || ' minutes')::interval
+            FROM generate_series(1, :projects) AS g
+        """), params)
+        await db.execute(text("""
+            INSERT INTO "TaskGroups" ("Name", "ProjectId")
+            SELECT 'group ' || n, p."Id"
+            FROM "Projects" p CROSS JOIN generate_series(1, 5) AS n
+            WHERE p."Name" LIKE :prefix || '-%'
+        """), params)
+        groups = (await db.execute(text("""
+            SELECT min(g."Id"), max(g."Id") FROM "TaskGroups" g
+            JOIN "Projects" p ON p."Id" = g."ProjectId" WHERE p."Name" LIKE :prefix || '-%'
+        """), params)).one()
+        params.update(group_lo=groups[0], group_span=groups[1] - groups[0] + 1)
+
+        await db.execute(text("""
+            INSERT INTO "Tasks" ("Title", "Text", "AuthorId", "TargetId", "GroupId", "IsClosed", "Tags", "CreateDate")
+            SELECT 'task ' || g, 'index benchmark task', :user_lo + (g * 7) % :user_span,
+                   :user_lo + (g * 13) % :user_span, :group_lo + g % :group_span,
+                   random() < 0.7, '', now() - (g || ' seconds')::interval
+            FROM generate_series(1, :tasks) AS g
+        """), params)
+        tasks = (await db.execute(text("""
+            SELECT min(t."Id"), max(t."Id") FROM "Tasks" t
+            WHERE t."GroupId" BETWEEN :group_lo AND :group_lo + :group_span - 1
+        """), params)).one()
+        params.update(task_lo=tasks[0], task_span=tasks[1] - tasks[0] + 1)
+        params["project_id"] = await db.scalar(text(
+            'SELECT "ProjectId" FROM "TaskGroups" WHERE "Id" = :group_lo'
+        ), params)
+
+        await db.execute(text("""
+            INSERT INTO "Comments" ("Text", "AuthorId", "TaskId", "CreateDate")
+            SELECT 'comment', :user_lo + g % :user_span, :task_lo + g % :task_span,
+                   now() - (g || ' seconds')::interval
+            FROM generate_series(1, :tasks * 2) AS g
+        """), params)
+        await db.execute(text("""
+            INSERT INTO "Marks" ("TargetTask", "MarkedById", "Description", "Rate")
+            SELECT :task_lo + g % :task_span, :user_lo + g % :user_span, 'mark', g % 11
+            FROM generate_series(1, :tasks / 2) AS g
+        """), params)
+        await db.execute(text("""
+            INSERT INTO "StoreFiles" ("SourceName", "TagName", "AuthorId")
+            SELECT 'file' || g || '.bin', :prefix || '-' || md5(g::text) || '.bin', :user_lo + g % :user_span
+            FROM generate_series(1, :tasks / 5) AS g
+        """), params)
+        await db.commit()
+    print(f"generated {n_tasks} tasks, {n_users} users, {n_projects} projects in {time.perf_counter() - started:.1f}s")
+    return params
+
+
+async def cleanup() -> None:
+    async with SessionLocal() as db:
+        like = {"pattern": PREFIX + "-%"}
+        await db.execute(text('DELETE FROM "StoreFiles" WHERE "TagName" LIKE :pattern'), like)
+        # Группы, задачи, комментарии и оценки удаляются каскадом
+        await db.execute(text('DELETE FROM "Projects" WHERE "Name" LIKE :pattern'), like)
+        await db.execute(text('DELETE FROM "Users" WHERE "Username" LIKE :pattern'), like)
+        await db.commit()
+
+
+def crud_queries(params: dict):
+    """(название, вызов crud) для запросов, которые обслуживают новые индексы"""
+    project_id = params["project_id"]
+    user_id = params["user_lo"] + 1
+    task_id = params["task_lo"] + params["task_span"] // 2
+    tag_name = f"{PREFIX}-{hashlib.md5(b'12345').hexdigest()}.bin"
+    return [
+        ("get_project_tasks(closed=False)", lambda db: get_project_tasks(db, project_id, closed=False)),
+        ("get_user_tasks(closed=False)", lambda db: get_user_tasks(db, user_id, closed=False)),
+        ("get_projects", lambda db: get_projects(db)),
+        ("get_user_by_email", lambda db: get_user_by_email(db, f"{PREFIX}-7@example.com")),
+        ("get_store_file_by_filename", lambda db: get_store_file_by_filename(db, tag_name)),
+        ("get_task_comments", lambda db: get_task_comments(db, task_id)),
+        ("get_task_marks", lambda db: get_task_marks(db, task_id)),
+    ]
+
+
+async def capture_sql(call):
+    """Первый SQL-запрос, который отправляет функция crud (основной; подгрузка связей идёт следом)"""
+    captured = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        async with SessionLocal() as db:
+            await call(db)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+    return captured[0]
+
+
+async def explain(statement, parameters) -> list:
+    async with engine.connect() as conn:
+        sql = "EXPLAIN (ANALYZE, BUFFERS) " + statement
+        # Первый прогон прогревает кеш, печатается второй
+        await conn.exec_driver_sql(sql, parameters)
+        return [row[0] for row in await conn.exec_driver_sql(sql, parameters)]
+
+
+def summary(plan: list) -> tuple:
+    """Время выполнения и индексы, которые использовал план"""
+    execution = next((line for line in plan if line.startswith("Execution Time")), "")
+    indexes = sorted({match.group(1) for line in plan for match in PLAN_INDEX.finditer(line)})
+    return execution.replace("Execution Time: ", ""), ", ".join(indexes) or "seq scan"
+
+
+async def run(args) -> None:
+    migration = load_migration()
+    params = await generate(args.tasks)
+    try:
+        queries = [(name, await capture_sql(call)) for name, call in crud_queries(params)]
+        plans = {}
+        for phase, new in (("before", False), ("after", True)):
+            await use_indexes(migration, new)
+            for name, (statement, parameters) in queries:
+                plans[name, phase] = await explain(statement, parameters)
+
+        for name, _ in queries:
+            if args.plans:
+                for phase in ("before", "after"):
+                    print(f"\n=== {name}: {phase} ===")
+                    print("\n".join(plans[name, phase]))
+            else:
+                print(f"\n{name}")
+                for phase in ("before", "after"):
+                    elapsed, indexes = summary(plans[name, phase])
+                    print(f"  {phase:<7}{elapsed:>12}  {indexes}")
+    finally:
+        # Схема остаётся такой, как её описывает миграция
+        await use_indexes(migration, True)
+        if not args.keep:
+            await cleanup()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=500_000)
+    parser.add_argument("--plans", action="store_true")
+    parser.add_argument("--keep", action="store_true")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,126 @@
+"""Query count of the task listings must not grow with the number of tasks.
+
+Seeds a project with N tasks and then with 10×N tasks, each with comments,
+files, pins, marks and tags, and counts the statements that get_project_tasks
+and get_user_tasks send for one page in both views, including serialization
+to the response schemas. A listing that lazy-loads a relationship per task
+sends more statements for the bigger project, and the check fails. Run from
+backend/ against a scratch database that has all migrations applied:
+
+    python -m benchmarks.query_count_check --tasks 20
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import delete, event
+
+from app import models
+from app.crud.task import get_project_tasks, get_user_tasks
+from app.database import SessionLocal, engine
+from app.pagination import MAX_PAGE_SIZE
+from app.serialization import TASK_CARD_LIST, TASK_DETAILS_LIST
+
+PREFIX = "query-count"
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args) -> None:
+        self.count += 1
+
+
+async def seed(n_tasks: int) -> tuple:
+    async with SessionLocal() as db:
+        user = models.User(Username=PREFIX, Email=f"{PREFIX}@example.com", PasswordHash="-")
+        db.add(user)
+        await db.flush()
+        project = models.Project(Name=PREFIX, OwnerId=user.Id)
+        db.add(project)
+        await db.flush()
+        group = models.TaskGroup(Name=PREFIX, ProjectId=project.Id)
+        state = models.TaskState(Name=PREFIX)
+        store_file = models.StoreFile(SourceName=f"{PREFIX}.txt", TagName=f"{PREFIX}.txt", AuthorId=user.Id)
+        db.add_all([group, state, store_file])
+        await db.flush()
+        for i in range(n_tasks):
+            task = models.Task(
+                Title=f"{PREFIX} {i}", Text="-", AuthorId=user.Id, TargetId=user.Id,
+                GroupId=group.Id, StateId=state.Id, Tags=f"t{i % 3}",
+            )
+            db.add(task)
+            await db.flush()
+            db.add_all([
+                models.Comment(Text="-", AuthorId=user.Id, TaskId=task.Id),
+                models.Comment(Text="-", AuthorId=user.Id, TaskId=task.Id),
+                models.TaskFile(FileId=store_file.Id, TaskId=task.Id),
+                models.Pin(UserId=user.Id, TaskId=task.Id),
+                models.Mark(TargetTask=task.Id, MarkedById=user.Id, Description="-"),
+                models.TaskTag(TaskId=task.Id, Tag=f"t{i % 3}"),
+            ])
+        await db.commit()
+        return user.Id, project.Id, state.Id
+
+
+async def cleanup(user_id: int, project_id: int, state_id: int) -> None:
+    async with SessionLocal() as db:
+        # Задачи, группы и их дочерние строки уходят каскадом
+        await db.execute(delete(models.Project).where(models.Project.Id == project_id))
+        await db.execute(delete(models.StoreFile).where(models.StoreFile.AuthorId == user_id))
+        await db.execute(delete(models.TaskState).where(models.TaskState.Id == state_id))
+        await db.execute(delete(models.User).where(models.User.Id == user_id))
+        await db.commit()
+
+
+async def count_statements(listing, view: str) -> int:
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        async with SessionLocal() as db:
+            page = await listing(db, view=view, limit=MAX_PAGE_SIZE)
+            adapter = TASK_CARD_LIST if view == "card" else TASK_DETAILS_LIST
+            # Ленивая загрузка при сериализации тоже попала бы в счётчик (или упала бы в async)
+            adapter.dump_json(page.items)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+    return counter.count
+
+
+async def measure(n_tasks: int) -> dict:
+    user_id, project_id, state_id = await seed(n_tasks)
+    try:
+        counts = {}
+        for view in ("full", "card"):
+            counts[("project", view)] = await count_statements(
+                lambda db, **kwargs: get_project_tasks(db, project_id, **kwargs), view
+            )
+            counts[("user", view)] = await count_statements(
+                lambda db, **kwargs: get_user_tasks(db, user_id, **kwargs), view
+            )
+        return counts
+    finally:
+        await cleanup(user_id, project_id, state_id)
+
+
+async def run(args) -> None:
+    # Обе выборки должны уместиться в одну страницу
+    assert args.tasks * 10 <= MAX_PAGE_SIZE, f"--tasks must be at most {MAX_PAGE_SIZE // 10}"
+    try:
+        small = await measure(args.tasks)
+        large = await measure(args.tasks * 10)
+    finally:
+        await engine.dispose()
+
+    print(f"{'listing':<16}{args.tasks:>8}{args.tasks * 10:>8}")
+    for key in small:
+        print(f"{' '.join(key):<16}{small[key]:>8}{large[key]:>8}")
+    grown = [" ".join(key) for key in small if small[key] != large[key]]
+    assert not grown, f"query count grows with the number of tasks: {', '.join(grown)}"
+    print("ok: query counts do not depend on the number of tasks")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,104 @@
+"""Full-text search latency on a synthetic project.
+
+Fills one project with N tasks of random Russian/English words (1 000 000 by
+default, generated inside Postgres), then times search_project for a set of
+queries and prints p50/p95/max per query. Run from backend/ against a
+scratch database that has all migrations applied:
+
+    python -m benchmarks.search_benchmark --tasks 1000000 --repeat 20
+
+Pass --keep to leave the generated data in place for repeated runs.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app import models
+from app.crud.search import search_project
+from app.database import SessionLocal, engine
+
+WORDS = [
+    "ошибка", "интерфейс", "сервер", "отчёт", "задача", "релиз", "база", "данных",
+    "пользователь", "оплата", "форма", "кнопка", "медленно", "падает", "миграция",
+    "bug", "login", "timeout", "deploy", "cache", "search", "upload", "export",
+    "dashboard", "token", "index", "crash", "refactor", "release", "invoice",
+]
+
+QUERIES = ["ошибка", "ошибки оплаты", "падает сервер", "login timeout", "\"база данных\"", "cache -deploy", "кнопка OR export"]
+
+
+async def generate(n_tasks: int) -> int:
+    async with SessionLocal() as db:
+        user = models.User(Username="search-bench", Email="search-bench@example.com", PasswordHash="-")
+        db.add(user)
+        await db.flush()
+        project = models.Project(Name="search-bench", OwnerId=user.Id)
+        db.add(project)
+        await db.flush()
+        group = models.TaskGroup(Name="bench", ProjectId=project.Id)
+        db.add(group)
+        await db.commit()
+
+        words = "ARRAY[" + ",".join("'%s'" % w for w in WORDS) + "]"
+        started = time.perf_counter()
+        # Слова выбираются внутри Postgres, чтобы не гонять миллион строк через драйвер
+        await db.execute(text(f"""
+            INSERT INTO "Tasks" ("Title", "Text", "AuthorId", "GroupId", "IsClosed", "Tags")
+            SELECT
+                array_to_string(ARRAY(
+                    SELECT ({words})[1 + floor(random() * {len(WORDS)})::int]
+                    FROM generate_series(1, 4) WHERE g > 0
+                ), ' '),
+                array_to_string(ARRAY(
+                    SELECT ({words})[1 + floor(random() * {len(WORDS)})::int]
+                    FROM generate_series(1, 40) WHERE g > 0
+                ), ' '),
+                :user_id, :group_id, false, ''
+            FROM generate_series(1, :n) AS g
+        """), {"user_id": user.Id, "group_id": group.Id, "n": n_tasks})
+        await db.commit()
+        await db.execute(text('ANALYZE "Tasks"'))
+        print(f"generated {n_tasks} tasks in {time.perf_counter() - started:.1f}s")
+        return project.Id
+
+
+async def cleanup(project_id: int) -> None:
+    async with SessionLocal() as db:
+        await db.execute(text('DELETE FROM "Tasks" WHERE "GroupId" IN (SELECT "Id" FROM "TaskGroups" WHERE "ProjectId" = :p)'), {"p": project_id})
+        await db.execute(text('DELETE FROM "TaskGroups" WHERE "ProjectId" = :p'), {"p": project_id})
+        await db.execute(text('DELETE FROM "Projects" WHERE "Id" = :p'), {"p": project_id})
+        await db.execute(text('DELETE FROM "Users" WHERE "Username" = \'search-bench\''))
+        await db.commit()
+
+
+async def run(args) -> None:
+    project_id = await generate(args.tasks)
+    try:
+        print(f"{'query':<24}{'hits':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for q in QUERIES:
+            timings = []
+            hits = 0
+            for _ in range(args.repeat):
+                async with SessionLocal() as db:
+                    started = time.perf_counter()
+                    hits = len(await search_project(db, project_id, q, limit=args.limit))
+                    timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{q:<24}{hits:>6}{statistics.median(timings):>10.1f}{p95:>10.1f}{timings[-1]:>10.1f}")
+    finally:
+        if not args.keep:
+            await cleanup(project_id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--keep", action="store_true")
+    asyncio.run(run(parser.parse_args()))
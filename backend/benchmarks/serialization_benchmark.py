@@ -0,0 +1,100 @@
+"""Response serialization cost for a large task listing.
+
+Builds N transient Task rows (10 000 by default) with author, target, state,
+group, comments, files and pins, the shape returned by
+GET /api/tasks/projects/{id}/tasks, and times three ways of turning them into
+a response body:
+
+    fastapi+json    FastAPI response_model path with JSONResponse (old default)
+    fastapi+orjson  the same path with ORJSONResponse (new default)
+    adapter         app.serialization.orm_response: one validation, dump_json
+
+No database is needed. Run from backend/:
+
+    python -m benchmarks.serialization_benchmark --tasks 10000 --repeat 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, datetime, timezone
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import models, schemas
+from app.serialization import TASK_DETAILS_LIST, orm_response
+
+
+def build_tasks(n_tasks: int) -> List[models.Task]:
+    now = datetime.now(timezone.utc)
+    users = [
+        models.User(Id=i, Username=f"user{i}", Email=f"user{i}@example.com", PasswordHash="-", CreateDate=now, IsDeleted=False)
+        for i in range(1, 21)
+    ]
+    state = models.TaskState(Id=1, Name="В работе")
+    group = models.TaskGroup(Id=1, Name="Бэклог", ProjectId=1, CreateDate=now)
+    store_file = models.StoreFile(Id=1, SourceName="spec.pdf", TagName="0f1e2d.pdf", AuthorId=1, CreateDate=now)
+
+    tasks = []
+    for i in range(1, n_tasks + 1):
+        author, target = users[i % 20], users[(i * 7) % 20]
+        task = models.Task(
+            Id=i, Title=f"Задача {i}: проверить выгрузку", Text="Описание задачи. " * 20,
+            AuthorId=author.Id, TargetId=target.Id, StateId=state.Id, GroupId=group.Id,
+            CreateDate=now, IsClosed=i % 3 == 0, DeadLine=date(2026, 12, 31), Tags="backend,api",
+        )
+        task.author, task.target, task.state, task.group = author, target, state, group
+        task.comments = [
+            models.Comment(Id=i * 10 + c, Text="Комментарий к задаче", AuthorId=author.Id, TaskId=i, CreateDate=now)
+            for c in range(2)
+        ]
+        task.task_files = [models.TaskFile(Id=i, FileId=store_file.Id, TaskId=i, file=store_file)]
+        task.pins = [models.Pin(Id=i, UserId=target.Id, TaskId=i)]
+        tasks.append(task)
+    return tasks
+
+
+async def fastapi_path(rows, response_class) -> bytes:
+    field = create_response_field(name="Response", type_=List[schemas.TaskWithDetails])
+    content = await serialize_response(field=field, response_content=rows)
+    return response_class(content).body
+
+
+async def adapter_path(rows, _response_class=None) -> bytes:
+    return orm_response(TASK_DETAILS_LIST, rows).body
+
+
+async def run(n_tasks: int, repeat: int) -> None:
+    rows = build_tasks(n_tasks)
+    paths = [
+        ("fastapi+json", fastapi_path, JSONResponse),
+        ("fastapi+orjson", fastapi_path, ORJSONResponse),
+        ("adapter", adapter_path, None),
+    ]
+    baseline = None
+    for name, path, response_class in paths:
+        body = await path(rows, response_class)  # прогрев
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await path(rows, response_class)
+            timings.append((time.perf_counter() - started) * 1000)
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(f"{name:16} median {median:8.1f} ms  min {min(timings):8.1f} ms  "
+              f"x{baseline / median:4.1f}  body {len(body) / 1024 / 1024:.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.tasks, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from typing import Optional, Any
 from .dtos import *
 import requests
+from .compression import enable_compression
 
 class AuthAPI:
     """Auth API client with token per method"""
@@ -10,6 +11,7 @@ class AuthAPI:
         self.timeout = timeout
         self.session = requests.Session()
         self.session.trust_env = False
+        enable_compression(self.session)
     
     def _make_request(self, method: str, endpoint: str, token: Optional[str] = None, **kwargs) -> Any:
         """Make an API request with optional token and timing/logging (includes DNS resolution diagnostics)"""
@@ -0,0 +1,14 @@
+"""Compressed responses for requests sessions.
+
+The backend gzip/brotli-compresses JSON responses. urllib3 decodes them
+transparently; here the session explicitly advertises exactly the codings
+urllib3 can decode (br only when the brotli package is installed).
+"""
+import requests
+from urllib3.util import make_headers
+
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+
+def enable_compression(session: requests.Session) -> None:
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
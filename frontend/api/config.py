@@ -46,5 +46,10 @@ TASK_ENDPOINTS = {
 
 FILE_ENDPOINTS = {
     "upload_file": "/api/files/projects/{project_id}/files",
-    "get_files": "/api/files/projects/{project_id}/files"
+    "get_files": "/api/files/projects/{project_id}/files",
+    "create_upload": "/api/files/uploads",
+    "get_upload": "/api/files/uploads/{upload_id}",
+    "put_upload_chunk": "/api/files/uploads/{upload_id}",
+    "complete_upload": "/api/files/uploads/{upload_id}/complete",
+    "abort_upload": "/api/files/uploads/{upload_id}"
 }
\ No newline at end of file
@@ -71,6 +71,25 @@ class ProjectWithDetailsDTO(ProjectDTO):
     task_groups: List["TaskGroupDTO"] = []
     roles: List["ProjectRoleDTO"] = []
 
+class SummaryCountsDTO(BaseModel):
+    Total: int = 0
+    Open: int = 0
+    Closed: int = 0
+    Overdue: int = 0
+
+class SummaryBucketDTO(SummaryCountsDTO):
+    Id: Optional[int] = None
+
+class ProjectSummaryDTO(BaseModel):
+    ProjectId: int
+    IsOwner: bool
+    AccessLevel: Optional[str] = None
+    MemberCount: int
+    Tasks: SummaryCountsDTO
+    ByGroup: List[SummaryBucketDTO] = []
+    ByState: List[SummaryBucketDTO] = []
+    ByTarget: List[SummaryBucketDTO] = []
+
 class ProjectMemberCreateDTO(BaseModel):
     MemnerId: int
     AccessLevel: Optional[str] = None
@@ -139,6 +158,7 @@ class TaskUpdateDTO(BaseModel):
     GroupId: Optional[int] = None
     IsClosed: Optional[bool] = None
     DeadLine: Optional[date] = None
+    Tags: Optional[str] = None
 
 class TaskDTO(BaseModel):
     Id: int
@@ -155,6 +175,30 @@ class TaskDTO(BaseModel):
     # Task closed/completed flag from backend
     IsClosed: Optional[bool] = Field(default=None, alias="IsClosed")
 
+class ProjectBoardDTO(BaseModel):
+    # Ответ GET /api/projects/{id}/board; Text у задач обрезан, полный текст — через get_task
+    project: ProjectDTO
+    owner: Optional[UserDTO] = None
+    members: List[ProjectMemberWithUserDTO] = []
+    roles: List[ProjectRoleDTO] = []
+    groups: List[TaskGroupDTO] = []
+    tasks: List[TaskDTO] = []
+
+class DeletedEntityDTO(BaseModel):
+    Kind: str  # "task" | "group" | "member" | "comment"
+    Id: int
+
+class ProjectChangesDTO(BaseModel):
+    # Ответ GET /api/projects/{id}/changes; Cursor передаётся в since следующего запроса
+    ProjectId: int
+    Cursor: int
+    Full: bool
+    groups: List[TaskGroupDTO] = []
+    members: List[ProjectMemberWithUserDTO] = []
+    tasks: List[TaskDTO] = []
+    comments: List[Dict[str, Any]] = []
+    deleted: List[DeletedEntityDTO] = []
+
 # ========== File DTOs ==========
 class FileUploadDTO(BaseModel):
     ProjectId: int
@@ -168,6 +212,24 @@ class FileDTO(BaseModel):
     FileSize: int
     UploadedAt: datetime
 
+class StoreFileDTO(BaseModel):
+    Id: int
+    SourceName: str
+    TagName: str
+    Size: Optional[int] = None
+    Sha256: Optional[str] = None
+    AuthorId: Optional[int] = None
+    CreateDate: datetime
+
+class UploadSessionDTO(BaseModel):
+    Id: str
+    SourceName: str
+    Size: int
+    Sha256: Optional[str] = None
+    ChunkSize: int
+    ExpiresAt: datetime
+    Received: List[int] = []
+
 # ========== Response DTOs ==========
 class APIResponse(BaseModel):
     success: bool
@@ -0,0 +1,59 @@
+"""Conditional GET support for requests sessions.
+
+The backend tags project-scoped GET responses with an ETag. The adapter below
+remembers the last body per URL and token, sends If-None-Match, and turns a
+304 back into the cached 200 response, so callers need no changes.
+"""
+import copy
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MAX_ENTRIES = 256
+
+
+class ETagCachingAdapter(HTTPAdapter):
+    def __init__(self, max_entries: int = MAX_ENTRIES, **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[tuple, requests.Response]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        key = (request.url, request.headers.get("Authorization"))
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            request.headers["If-None-Match"] = cached.headers["ETag"]
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            with self._lock:
+                self._cache.move_to_end(key)
+            replay = copy.copy(cached)
+            replay.headers = copy.copy(cached.headers)
+            replay.headers.update(response.headers)
+            replay.request = response.request
+            replay.elapsed = response.elapsed
+            return replay
+
+        if response.status_code == 200 and "ETag" in response.headers and not kwargs.get("stream"):
+            response.content  # читаем тело сразу, чтобы его можно было отдать повторно
+            with self._lock:
+                self._cache[key] = response
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return response
+
+
+def install_etag_cache(session: requests.Session) -> None:
+    adapter = ETagCachingAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
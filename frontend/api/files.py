@@ -1,6 +1,8 @@
 from typing import Optional, Any, List
 from .dtos import *
 import requests
+from .compression import enable_compression
+from .resumable_upload import ProgressCallback, ResumableUploader
 
 class FilesAPI:
     """Files API client with token per method"""
@@ -10,6 +12,7 @@ class FilesAPI:
         self.timeout = timeout
         self.session = requests.Session()
         self.session.trust_env = False
+        enable_compression(self.session)
     
     def _make_request(self, method: str, endpoint: str, token: Optional[str] = None, **kwargs) -> Any:
         """Make an API request with optional token and timing/logging"""
@@ -53,6 +56,10 @@ class FilesAPI:
             response = self._make_request("POST", f"/api/files/projects/{project_id}/files", token=token, files=files)
             return FileDTO(**response)
     
+    def upload_file_resumable(self, file_path: str, token: str, on_progress: Optional[ProgressCallback] = None) -> StoreFileDTO:
+        """Upload a large file in parallel chunks; calling it again after a failure resumes the upload"""
+        return ResumableUploader(self.base_url, token).upload(file_path, on_progress)
+
     def get_project_files(self, project_id: int, token: str) -> List[FileDTO]:
         """Get files for a project"""
         response = self._make_request("GET", f"/api/files/projects/{project_id}/files", token=token)
@@ -2,6 +2,8 @@ from typing import Optional, Any, List
 
 from .dtos import *
 import requests
+from .compression import enable_compression
+from .pagination import fetch_all_pages
 
 
 class MarksAPI:
@@ -12,10 +14,12 @@ class MarksAPI:
         self.timeout = timeout
         self.session = requests.Session()
         self.session.trust_env = False
+        enable_compression(self.session)
 
     def _make_request(self, method: str, endpoint: str, token: Optional[str] = None, **kwargs) -> Any:
         """Make an API request with optional token and timing/logging."""
         url = f"{self.base_url}{endpoint}"
+        raw_response = kwargs.pop("raw_response", False)
         headers = {"Content-Type": "application/json"}
 
         if token:
@@ -42,6 +46,8 @@ class MarksAPI:
             elapsed = time.monotonic() - start
             print(f"[API] {method} {url} completed in {elapsed:.3f}s")
             response.raise_for_status()
+            if raw_response:
+                return response
             return response.json()
         except requests.exceptions.RequestException as e:
             elapsed = time.monotonic() - start
@@ -50,8 +56,9 @@ class MarksAPI:
 
     def get_task_marks(self, task_id: int, token: str) -> List[Dict[str, Any]]:
         """Get marks for a task."""
-        response = self._make_request("GET", f"/api/tasks/{task_id}/marks", token=token)
-        return response
+        return fetch_all_pages(
+            lambda params: self._make_request("GET", f"/api/tasks/{task_id}/marks", token=token, params=params, raw_response=True)
+        )
 
     def create_mark(self, task_id: int, description: str, rate: Optional[int], token: str) -> Dict[str, Any]:
         """Create a mark for a task."""
@@ -0,0 +1,25 @@
+"""Helpers for cursor-paginated list endpoints"""
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+# Backend returns the cursor of the next page in this header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PAGE_SIZE = 500
+
+
+def fetch_all_pages(
+    request_page: Callable[[Dict[str, Any]], requests.Response],
+    params: Optional[Dict[str, Any]] = None,
+) -> List[Any]:
+    """Collect every item of a listing by following the next-page cursor"""
+    params = dict(params or {})
+    params.setdefault("limit", PAGE_SIZE)
+    items: List[Any] = []
+    while True:
+        response = request_page(params)
+        items.extend(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return items
+        params["cursor"] = cursor
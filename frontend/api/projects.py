@@ -1,7 +1,12 @@
-from typing import Optional, Any, List
+import json
+from typing import Optional, Any, Dict, Iterator, List
 from .dtos import *
 import requests
 
+from .compression import enable_compression
+from .etag_cache import install_etag_cache
+from .pagination import fetch_all_pages
+
 class ProjectsAPI:
     """Projects API client with token per method"""
     
@@ -12,10 +17,14 @@ class ProjectsAPI:
         self.session = requests.Session()
         # Avoid using environment proxy settings by default (can cause delays if misconfigured)
         self.session.trust_env = False
+        enable_compression(self.session)
+        # Conditional GETs: unchanged project data comes back as 304 without a body
+        install_etag_cache(self.session)
     
     def _make_request(self, method: str, endpoint: str, token: Optional[str] = None, **kwargs) -> Any:
         """Make an API request with optional token and timing/logging (includes DNS resolution diagnostics)"""
         url = f"{self.base_url}{endpoint}"
+        raw_response = kwargs.pop("raw_response", False)
         headers = {"Content-Type": "application/json"}
         
         if token:
@@ -43,6 +52,8 @@ class ProjectsAPI:
             print(f"[API] {method} {url} completed in {elapsed:.3f}s")
             try:
                 response.raise_for_status()
+                if raw_response:
+                    return response
                 # try json, fallback to text
                 try:
                     return response.json()
@@ -63,14 +74,20 @@ class ProjectsAPI:
             print(f"API request failed after {elapsed:.3f}s: {e}")
             raise
     
+    def _get_all_pages(self, endpoint: str, token: str) -> List[Any]:
+        """Fetch every page of a cursor-paginated listing"""
+        return fetch_all_pages(
+            lambda params: self._make_request("GET", endpoint, token=token, params=params, raw_response=True)
+        )
+
     def get_my_projects(self, token: str) -> List[ProjectDTO]:
         """Get my projects"""
-        response = self._make_request("GET", "/api/projects/my", token=token)
+        response = self._get_all_pages("/api/projects/my", token)
         return [ProjectDTO(**project) for project in response]
     
     def get_all_projects(self, token: str) -> List[ProjectDTO]:
         """Get all projects"""
-        response = self._make_request("GET", "/api/projects/", token=token)
+        response = self._get_all_pages("/api/projects/", token)
         return [ProjectDTO(**project) for project in response]
     
     def get_project_details(self, project_id: int, token: str) -> ProjectWithDetailsDTO:
@@ -78,6 +95,37 @@ class ProjectsAPI:
         response = self._make_request("GET", f"/api/projects/{project_id}", token=token)
         return ProjectWithDetailsDTO(**response)
     
+    def get_project_board(self, project_id: int, token: str) -> ProjectBoardDTO:
+        """Get project, members, roles, groups and task cards in one request"""
+        response = self._make_request("GET", f"/api/projects/{project_id}/board", token=token)
+        return ProjectBoardDTO(**response)
+
+    def get_project_changes(self, project_id: int, token: str, since: Optional[int] = None) -> ProjectChangesDTO:
+        """Get entities changed after cursor `since`; without it the whole project is returned"""
+        params = {"since": since} if since is not None else None
+        response = self._make_request("GET", f"/api/projects/{project_id}/changes", token=token, params=params)
+        return ProjectChangesDTO(**response)
+
+    def iter_project_events(self, project_id: int, token: str) -> Iterator[Dict[str, Any]]:
+        """Yield change events of a project as they happen (blocking, run it in a worker thread).
+
+        Each event has Type ("task.updated", ...), ProjectId, Version and Ids;
+        apply it with get_project_changes(since=<last Cursor>). Type "resync"
+        means events were dropped and a full get_project_changes is needed.
+        """
+        url = f"{self.base_url}/api/projects/{project_id}/events"
+        headers = {"Authorization": f"Bearer {token}", "Accept": "text/event-stream"}
+        # Без таймаута чтения: сервер сам шлёт ping каждые 15 секунд
+        with self.session.get(url, headers=headers, stream=True, timeout=(self.timeout, None)) as response:
+            response.raise_for_status()
+            data = []
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("data:"):
+                    data.append(line[5:].strip())
+                elif not line and data:
+                    yield json.loads("\n".join(data))
+                    data = []
+
     def create_project(self, project_data: ProjectCreateDTO, token: str) -> ProjectDTO:
         """Create a new project"""
         response = self._make_request("POST", "/api/projects/", token=token, json=project_data.dict())
@@ -88,9 +136,26 @@ class ProjectsAPI:
         response = self._make_request("PUT", f"/api/projects/{project_id}", token=token, json=project_data.dict(exclude_unset=True))
         return ProjectDTO(**response)
     
+    # Backend limit for ids per /api/projects/summary request
+    SUMMARY_BATCH_SIZE = 200
+
+    def get_project_summary(self, project_id: int, token: str) -> ProjectSummaryDTO:
+        """Get task/member counters of a project"""
+        response = self._make_request("GET", f"/api/projects/{project_id}/summary", token=token)
+        return ProjectSummaryDTO(**response)
+
+    def get_project_summaries(self, project_ids: List[int], token: str) -> List[ProjectSummaryDTO]:
+        """Get counters for many projects; inaccessible projects are skipped"""
+        summaries = []
+        for i in range(0, len(project_ids), self.SUMMARY_BATCH_SIZE):
+            chunk = project_ids[i:i + self.SUMMARY_BATCH_SIZE]
+            response = self._make_request("GET", "/api/projects/summary", token=token, params={"ids": chunk})
+            summaries.extend(ProjectSummaryDTO(**summary) for summary in response)
+        return summaries
+
     def get_project_members(self, project_id: int, token: str) -> List[ProjectMemberWithUserDTO]:
         """Get project members"""
-        response = self._make_request("GET", f"/api/projects/{project_id}/members", token=token)
+        response = self._get_all_pages(f"/api/projects/{project_id}/members", token)
         return [ProjectMemberWithUserDTO(**member) for member in response]
     
     def add_project_member(self, project_id: int, member_data: ProjectMemberCreateDTO, token: str) -> ProjectMemberDTO:
@@ -107,7 +172,7 @@ class ProjectsAPI:
 
     def get_project_roles(self, project_id: int, token: str) -> List[ProjectRoleDTO]:
         """Get project-defined roles (admin-only endpoint on backend)"""
-        response = self._make_request("GET", f"/api/projects/{project_id}/roles", token=token)
+        response = self._get_all_pages(f"/api/projects/{project_id}/roles", token)
         return [ProjectRoleDTO(**role) for role in response]
 
     def create_project_role(self, project_id: int, role_data: ProjectRoleCreateDTO, token: str) -> ProjectRoleDTO:
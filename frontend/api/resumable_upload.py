@@ -0,0 +1,200 @@
+"""Resumable chunked uploads of large files.
+
+The backend accepts a file as an upload session of ChunkSize pieces:
+POST /api/files/uploads, then PUT /api/files/uploads/{id}?offset=N for each
+piece, then POST /api/files/uploads/{id}/complete. ResumableUploader sends the
+pieces the server does not have yet in parallel, each with its SHA-256 in
+X-Chunk-Sha256. A piece is retried with backoff after a dropped connection,
+a timeout or a 5xx answer.
+
+The session id is saved in STATE_DIR under the file's path, size and mtime.
+An upload interrupted by a lost network or a closed client continues from the
+pieces the server already has when it is started again for the same file.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import requests
+
+from .dtos import StoreFileDTO, UploadSessionDTO
+
+STATE_DIR = os.path.join(tempfile.gettempdir(), "workbench-uploads")
+PARALLEL_CHUNKS = 4
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 0.5
+# (connect, read): часть в несколько мегабайт на медленном канале идёт долго
+CHUNK_TIMEOUT = (10.0, 120.0)
+HASH_BLOCK_SIZE = 1024 * 1024
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class UploadSessionLost(Exception):
+    """The server no longer knows the session (expired, completed or cancelled)"""
+
+
+def _retryable(response: requests.Response) -> bool:
+    return response.status_code >= 500 or response.status_code == 429
+
+
+class ResumableUploader:
+    def __init__(self, base_url: str, token: str, parallel: int = PARALLEL_CHUNKS, timeout: float = 10.0):
+        self.base_url = base_url
+        self.token = token
+        self.parallel = parallel
+        self.timeout = timeout
+        # requests.Session не рассчитан на общий доступ из потоков: у каждого потока свой
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.trust_env = False
+            session.headers["Authorization"] = f"Bearer {self.token}"
+            self._local.session = session
+        return session
+
+    def _request(self, method: str, endpoint: str, timeout=None, **kwargs) -> requests.Response:
+        """Send with retries on network errors and 5xx; other statuses are returned as is"""
+        url = f"{self.base_url}{endpoint}"
+        timeout = timeout or self.timeout
+        for attempt in range(MAX_ATTEMPTS - 1):
+            try:
+                response = self._session().request(method, url, timeout=timeout, **kwargs)
+                if not _retryable(response):
+                    return response
+            except (requests.ConnectionError, requests.Timeout):
+                pass
+            time.sleep(BACKOFF_SECONDS * 2 ** attempt)
+        return self._session().request(method, url, timeout=timeout, **kwargs)
+
+    def _checked(self, response: requests.Response) -> requests.Response:
+        if response.status_code == 404:
+            raise UploadSessionLost(response.text)
+        response.raise_for_status()
+        return response
+
+    # ---------- state of interrupted uploads ----------
+
+    @staticmethod
+    def _state_path(file_path: str) -> str:
+        stat = os.stat(file_path)
+        key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return os.path.join(STATE_DIR, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _load_state(self, file_path: str) -> Optional[str]:
+        try:
+            with open(self._state_path(file_path), encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state.get("upload_id") if state.get("base_url") == self.base_url else None
+
+    def _save_state(self, file_path: str, upload_id: str) -> None:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        with open(self._state_path(file_path), "w", encoding="utf-8") as f:
+            json.dump({"base_url": self.base_url, "upload_id": upload_id}, f)
+
+    def _forget_state(self, file_path: str) -> None:
+        try:
+            os.remove(self._state_path(file_path))
+        except OSError:
+            pass
+
+    # ---------- protocol ----------
+
+    @staticmethod
+    def _file_sha256(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while block := f.read(HASH_BLOCK_SIZE):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _create(self, file_path: str) -> UploadSessionDTO:
+        payload = {
+            "SourceName": os.path.basename(file_path),
+            "Size": os.path.getsize(file_path),
+            "Sha256": self._file_sha256(file_path),
+        }
+        response = self._checked(self._request("POST", "/api/files/uploads", json=payload))
+        return UploadSessionDTO(**response.json())
+
+    def _status(self, upload_id: str) -> UploadSessionDTO:
+        response = self._checked(self._request("GET", f"/api/files/uploads/{upload_id}"))
+        return UploadSessionDTO(**response.json())
+
+    def _open_session(self, file_path: str) -> UploadSessionDTO:
+        """The saved session of this file if the server still has it, otherwise a new one"""
+        upload_id = self._load_state(file_path)
+        if upload_id:
+            try:
+                return self._status(upload_id)
+            except UploadSessionLost:
+                self._forget_state(file_path)
+        session = self._create(file_path)
+        self._save_state(file_path, session.Id)
+        return session
+
+    def _put_chunk(self, file_path: str, session: UploadSessionDTO, offset: int) -> int:
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(session.ChunkSize)
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "X-Chunk-Sha256": hashlib.sha256(data).hexdigest(),
+        }
+        response = self._request(
+            "PUT", f"/api/files/uploads/{session.Id}",
+            params={"offset": offset}, data=data, headers=headers, timeout=CHUNK_TIMEOUT,
+        )
+        self._checked(response)
+        return len(data)
+
+    def _send_missing(self, file_path: str, session: UploadSessionDTO, on_progress: Optional[ProgressCallback]) -> None:
+        received = set(session.Received)
+        missing: List[int] = [offset for offset in range(0, session.Size, session.ChunkSize) if offset not in received]
+        sent = sum(min(session.ChunkSize, session.Size - offset) for offset in received)
+        if on_progress:
+            on_progress(sent, session.Size)
+
+        with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            futures = [pool.submit(self._put_chunk, file_path, session, offset) for offset in missing]
+            try:
+                for future in futures:
+                    sent += future.result()
+                    if on_progress:
+                        on_progress(sent, session.Size)
+            except BaseException:
+                # Принятые части останутся на сервере; следующий upload() дошлёт остальное
+                pool.shutdown(cancel_futures=True)
+                raise
+
+    def upload(self, file_path: str, on_progress: Optional[ProgressCallback] = None) -> StoreFileDTO:
+        """Upload the file, resuming an earlier interrupted upload of it"""
+        session = self._open_session(file_path)
+        for _ in range(MAX_ATTEMPTS):
+            self._send_missing(file_path, session, on_progress)
+            response = self._request("POST", f"/api/files/uploads/{session.Id}/complete", timeout=CHUNK_TIMEOUT)
+            if response.status_code == 409:
+                # Часть потерялась между проверкой и сборкой: дослать недостающее
+                session = self._status(session.Id)
+                continue
+            self._checked(response)
+            self._forget_state(file_path)
+            return StoreFileDTO(**response.json())
+        raise UploadSessionLost(f"Upload {session.Id} could not be completed")
+
+    def abort(self, file_path: str) -> None:
+        """Cancel the saved upload of the file, if any"""
+        upload_id = self._load_state(file_path)
+        if upload_id:
+            self._request("DELETE", f"/api/files/uploads/{upload_id}")
+            self._forget_state(file_path)
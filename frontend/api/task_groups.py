@@ -2,6 +2,10 @@ from typing import Optional, Any, List
 from .dtos import *
 import requests
 
+from .compression import enable_compression
+from .etag_cache import install_etag_cache
+from .pagination import fetch_all_pages
+
 class TaskGroupsAPI:
     """Task groups API client with token per method"""
     
@@ -10,10 +14,14 @@ class TaskGroupsAPI:
         self.timeout = timeout
         self.session = requests.Session()
         self.session.trust_env = False
+        enable_compression(self.session)
+        # Conditional GETs: unchanged project data comes back as 304 without a body
+        install_etag_cache(self.session)
     
     def _make_request(self, method: str, endpoint: str, token: Optional[str] = None, **kwargs) -> Any:
         """Make an API request with optional token and timing/logging (includes DNS resolution diagnostics)"""
         url = f"{self.base_url}{endpoint}"
+        raw_response = kwargs.pop("raw_response", False)
         headers = {"Content-Type": "application/json"}
         
         if token:
@@ -40,15 +48,23 @@ class TaskGroupsAPI:
             elapsed = time.monotonic() - start
             print(f"[API] {method} {url} completed in {elapsed:.3f}s")
             response.raise_for_status()
+            if raw_response:
+                return response
             return response.json()
         except requests.exceptions.RequestException as e:
             elapsed = time.monotonic() - start
             print(f"API request failed after {elapsed:.3f}s: {e}")
             raise
     
+    def _get_all_pages(self, endpoint: str, token: str) -> List[Any]:
+        """Fetch every page of a cursor-paginated listing"""
+        return fetch_all_pages(
+            lambda params: self._make_request("GET", endpoint, token=token, params=params, raw_response=True)
+        )
+
     def get_task_groups_for_project(self, project_id: int, token: str) -> List[TaskGroupDTO]:
         """Get all task groups for a project"""
-        response = self._make_request("GET", f"/api/task_groups/projects/{project_id}/groups", token=token)
+        response = self._get_all_pages(f"/api/task_groups/projects/{project_id}/groups", token)
         return [TaskGroupDTO(**group) for group in response]
     
     def get_task_group(self, group_id: int, token: str) -> TaskGroupDTO:
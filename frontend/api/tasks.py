@@ -2,6 +2,10 @@ from typing import Optional, Any, List
 from .dtos import *
 import requests
 
+from .compression import enable_compression
+from .etag_cache import install_etag_cache
+from .pagination import fetch_all_pages
+
 class TasksAPI:
     """Tasks API client with token per method"""
     
@@ -10,10 +14,14 @@ class TasksAPI:
         self.timeout = timeout
         self.session = requests.Session()
         self.session.trust_env = False
+        enable_compression(self.session)
+        # Conditional GETs: unchanged project data comes back as 304 without a body
+        install_etag_cache(self.session)
     
     def _make_request(self, method: str, endpoint: str, token: Optional[str] = None, **kwargs) -> Any:
         """Make an API request with optional token and timing/logging (includes DNS resolution diagnostics)"""
         url = f"{self.base_url}{endpoint}"
+        raw_response = kwargs.pop("raw_response", False)
         headers = {"Content-Type": "application/json"}
         
         if token:
@@ -42,6 +50,8 @@ class TasksAPI:
             # Try to return json payload, but fall back to raw text
             try:
                 response.raise_for_status()
+                if raw_response:
+                    return response
                 try:
                     return response.json()
                 except Exception:
@@ -73,9 +83,16 @@ class TasksAPI:
                 msg = f"API request failed: {detail}"
             raise Exception(msg) from e
     
-    def get_tasks(self, project_id: int, token: str) -> List[TaskDTO]:
-        """Get tasks for a project"""
-        response = self._make_request("GET", f"/api/tasks/projects/{project_id}/tasks", token=token)
+    def _get_all_pages(self, endpoint: str, token: str, params: Optional[dict] = None) -> List[Any]:
+        """Fetch every page of a cursor-paginated listing"""
+        return fetch_all_pages(
+            lambda params: self._make_request("GET", endpoint, token=token, params=params, raw_response=True),
+            params,
+        )
+
+    def get_tasks(self, project_id: int, token: str, view: str = "full") -> List[TaskDTO]:
+        """Get tasks for a project; view="card" skips Text (Description stays None)"""
+        response = self._get_all_pages(f"/api/tasks/projects/{project_id}/tasks", token, {"view": view})
         return [TaskDTO(**task) for task in response]
     
     def create_task(self, project_id: int, task_data: TaskCreateDTO, token: str) -> TaskDTO:
@@ -2,6 +2,9 @@ from typing import Optional, Any, List
 from .dtos import *
 import requests
 
+from .compression import enable_compression
+from .pagination import fetch_all_pages
+
 class UsersAPI:
     """Users API client with token per method"""
     
@@ -10,10 +13,12 @@ class UsersAPI:
         self.timeout = timeout
         self.session = requests.Session()
         self.session.trust_env = False
+        enable_compression(self.session)
     
     def _make_request(self, method: str, endpoint: str, token: Optional[str] = None, **kwargs) -> Any:
         """Make an API request with optional token and timing/logging (includes DNS resolution diagnostics)"""
         url = f"{self.base_url}{endpoint}"
+        raw_response = kwargs.pop("raw_response", False)
         headers = {"Content-Type": "application/json"}
         
         if token:
@@ -40,15 +45,23 @@ class UsersAPI:
             elapsed = time.monotonic() - start
             print(f"[API] {method} {url} completed in {elapsed:.3f}s")
             response.raise_for_status()
+            if raw_response:
+                return response
             return response.json()
         except requests.exceptions.RequestException as e:
             elapsed = time.monotonic() - start
             print(f"API request failed after {elapsed:.3f}s: {e}")
             raise
     
+    def _get_all_pages(self, endpoint: str, token: str) -> List[Any]:
+        """Fetch every page of a cursor-paginated listing"""
+        return fetch_all_pages(
+            lambda params: self._make_request("GET", endpoint, token=token, params=params, raw_response=True)
+        )
+
     def get_users(self, token: str) -> List[UserDTO]:
         """Get all users"""
-        response = self._make_request("GET", "/api/users/", token=token)
+        response = self._get_all_pages("/api/users/", token)
         return [UserDTO(**user) for user in response]
     
     def get_user(self, user_id: int, token: str) -> UserDTO:
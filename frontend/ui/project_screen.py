@@ -13,9 +13,8 @@ from typing import Optional, List
 
 from services.auth_service import AuthService
 from api.projects import projects_api
-from api.task_groups import task_groups_api
 from api.tasks import tasks_api
-from api.dtos import ProjectWithDetailsDTO, ProjectMemberWithUserDTO, TaskGroupDTO, TaskDTO
+from api.dtos import ProjectBoardDTO, ProjectWithDetailsDTO, ProjectMemberWithUserDTO, TaskGroupDTO, TaskDTO
 from ui.components import UserDropdown, PrimaryButton, SecondaryButton
 from ui.components.kanban_board import KanbanBoard
 from ui.dialogs.project_members_dialog import ProjectMembersDialog
@@ -246,12 +245,9 @@ class ProjectScreen(QWidget):
     # ----- Data loading -----
 
     def _load_data(self):
-        """Загрузить детали проекта и участников и отобразить их в шапке."""
+        """Загрузить доску проекта одним запросом и отобразить её."""
         try:
-            self.project = projects_api.get_project_details(self.project_id, self.auth_service.token)
-            self.members = projects_api.get_project_members(self.project_id, self.auth_service.token)
-            self.task_groups = task_groups_api.get_task_groups_for_project(self.project_id, self.auth_service.token)
-            self.tasks = tasks_api.get_tasks(self.project_id, self.auth_service.token)
+            self._apply_board(projects_api.get_project_board(self.project_id, self.auth_service.token))
 
             self._update_header_info()
             self._update_content()
@@ -259,6 +255,19 @@ class ProjectScreen(QWidget):
             print(f"Error loading project {self.project_id}: {e}")
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить проект: {e}")
 
+    def _apply_board(self, board: ProjectBoardDTO):
+        """Разложить ответ /board по полям экрана."""
+        self.project = ProjectWithDetailsDTO(
+            **board.project.dict(),
+            owner=board.owner,
+            members=board.members,
+            task_groups=board.groups,
+            roles=board.roles,
+        )
+        self.members = board.members
+        self.task_groups = board.groups
+        self.tasks = board.tasks
+
     def _update_content(self):
         """Обновить содержимое канбан-доски после загрузки данных."""
         # Очистить текущий контент
@@ -403,8 +412,7 @@ class ProjectScreen(QWidget):
 
         # После закрытия диалога обновим локальные группы и перерисуем доску
         try:
-            self.task_groups = task_groups_api.get_task_groups_for_project(self.project_id, self.auth_service.token)
-            self.tasks = tasks_api.get_tasks(self.project_id, self.auth_service.token)
+            self._apply_board(projects_api.get_project_board(self.project_id, self.auth_service.token))
             self._update_content()
         except Exception as e:
             print(f"Error reloading groups/tasks: {e}")